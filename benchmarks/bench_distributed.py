@@ -0,0 +1,74 @@
+"""
+分布式扫描吞吐量基准测试
+
+在本机启动不同数量的工作进程，测量 标的 × 参数 工作单元的吞吐量及相对单个工作进程的加速比。
+多机部署时，在其他机器上运行 `python src/distributed.py worker --host <协调器地址> --port <端口>` 即可加入。
+
+示例:
+    python benchmarks/bench_distributed.py --workers 1,2,4 --symbols 8 --bars 500
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from distributed import SweepCoordinator, spawn_local_workers
+from job_scheduler import make_backtest_units
+from synthetic_data import generate_universe
+
+
+def _parse_int_list(value: str) -> list:
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="分布式扫描吞吐量基准测试")
+    parser.add_argument('--workers', type=_parse_int_list, default=[1, 2, 4], help="工作进程数量列表")
+    parser.add_argument('--symbols', type=int, default=8, help="标的数量")
+    parser.add_argument('--bars', type=int, default=500, help="每个标的的K线数量")
+    parser.add_argument('--entry-windows', type=_parse_int_list, default=[10, 20, 55], help="入场窗口参数列表")
+    parser.add_argument('--seed', type=int, default=42, help="合成数据随机种子")
+    parser.add_argument('--output', help="结果输出文件（JSON）")
+    args = parser.parse_args(argv)
+
+    universe = generate_universe(args.symbols, args.bars, seed=args.seed)
+    index = next(iter(universe.values())).index
+    units = make_backtest_units(universe, [{'entry_window': window} for window in args.entry_windows],
+                                start_date=str(index[0].date()), end_date=str(index[-1].date()))
+
+    results = []
+    baseline = None
+    for n_workers in args.workers:
+        with SweepCoordinator() as coordinator:
+            workers = spawn_local_workers(coordinator.address, n_workers, coordinator.authkey)
+            start = time.perf_counter()
+            report = coordinator.run(units)
+            elapsed = time.perf_counter() - start
+        for worker in workers:
+            worker.join(timeout=10)
+
+        throughput = len(units) / elapsed
+        baseline = baseline or throughput
+        results.append({
+            'workers': n_workers,
+            'units': len(units),
+            'seconds': elapsed,
+            'units_per_second': throughput,
+            'speedup': throughput / baseline,
+            'failed': len(report.failed),
+        })
+        print(f"{n_workers} 个工作进程: {elapsed:.2f}s, {throughput:.2f} 单元/秒, 加速比 {throughput / baseline:.2f}x")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
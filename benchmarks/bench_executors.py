@@ -0,0 +1,79 @@
+"""
+多股票回测执行方式基准测试：串行 / 线程池 / 进程池
+
+线程池模式下各线程共享同一份内存中的行情数据，安装 numba 时计算内核释放 GIL；
+进程池模式需要把数据复制到每个工作进程。输出各模式的耗时以及线程池相对进程池的加速比。
+
+示例:
+    python benchmarks/bench_executors.py --symbols 200 --bars 2000 --workers 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import kernels
+from synthetic_data import generate_universe
+from turtle_backtest import EXECUTORS, TurtleBacktester
+
+
+def time_executor(universe: dict, executor: str, max_workers: int, repeat: int) -> float:
+    """
+    以指定执行方式运行 repeat 次多股票回测，返回最短耗时（秒）
+    """
+    index = next(iter(universe.values())).index
+    best = float('inf')
+    for _ in range(repeat):
+        backtester = TurtleBacktester(symbols=list(universe), start_date=str(index[0].date()),
+                                      end_date=str(index[-1].date()), executor=executor, max_workers=max_workers)
+        backtester.data = universe
+        start = time.perf_counter()
+        backtester.run_backtest()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="多股票回测执行方式基准测试")
+    parser.add_argument('--symbols', type=int, default=200, help="标的数量")
+    parser.add_argument('--bars', type=int, default=2000, help="每个标的的K线数量")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="线程池/进程池大小")
+    parser.add_argument('--repeat', type=int, default=3, help="每种方式的重复次数（取最短耗时）")
+    parser.add_argument('--seed', type=int, default=42, help="合成数据随机种子")
+    parser.add_argument('--output', help="结果输出文件（JSON）")
+    args = parser.parse_args(argv)
+
+    universe = generate_universe(args.symbols, args.bars, seed=args.seed)
+    # 预热：触发内核编译，避免计入首个模式的耗时
+    time_executor({symbol: universe[symbol] for symbol in list(universe)[:1]}, 'serial', 1, 1)
+
+    seconds = {}
+    for executor in EXECUTORS:
+        seconds[executor] = time_executor(universe, executor, args.workers, args.repeat)
+        print(f"{executor:>8}: {seconds[executor]:.3f}s")
+
+    speedup = seconds['process'] / seconds['thread']
+    print(f"线程池相对进程池的加速比: {speedup:.2f}x（numba {'已' if kernels.numba_available() else '未'}安装，"
+          f"{args.workers} 个工作线程/进程，{os.cpu_count()} 个 CPU 核）")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'symbols': args.symbols,
+                'bars': args.bars,
+                'workers': args.workers,
+                'cpu_count': os.cpu_count(),
+                'numba': kernels.numba_available(),
+                'seconds': seconds,
+                'thread_vs_process_speedup': speedup,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
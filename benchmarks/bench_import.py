@@ -0,0 +1,121 @@
+"""
+核心模块导入耗时基准测试
+
+在全新的 Python 子进程中导入核心模块，统计导入耗时，并检查数据供应商模块（如 yfinance）没有被加载。
+
+示例:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --runs 20 --output import_bench.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+CORE_MODULES = ('turtle_trading_strategy', 'turtle_backtest')
+VENDOR_MODULES = ('yfinance', 'requests', 'curl_cffi')
+
+# 子进程内执行：导入模块并输出耗时和已加载的供应商模块
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'vendor_modules': [name for name in {vendors!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure_import(module: str, runs: int = 10) -> dict:
+    """
+    在 runs 个全新子进程中导入 module，返回耗时统计
+
+    Args:
+        module: 模块名称
+        runs: 子进程数量
+
+    Returns:
+        耗时统计及导入后已加载的供应商模块
+    """
+    samples = []
+    vendor_modules = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(src=SRC_DIR, module=module, vendors=VENDOR_MODULES)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        samples.append(probe['seconds'])
+        vendor_modules.update(probe['vendor_modules'])
+
+    return {
+        'module': module,
+        'runs': runs,
+        'min_seconds': min(samples),
+        'median_seconds': statistics.median(samples),
+        'max_seconds': max(samples),
+        'vendor_modules_loaded': sorted(vendor_modules),
+    }
+
+
+def import_time_breakdown(module: str, top: int = 15) -> list:
+    """
+    使用 `python -X importtime` 统计导入 module 时累计耗时最高的模块
+
+    Returns:
+        [(模块名, 累计耗时微秒)] 列表，按耗时降序
+    """
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import sys; sys.path.insert(0, {SRC_DIR!r}); import {module}"],
+        check=True, capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # 格式: "import time:  self [us] | cumulative | imported package"
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(cumulative_us)))
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="核心模块导入耗时基准测试")
+    parser.add_argument('--runs', type=int, default=10, help="每个模块的子进程数量")
+    parser.add_argument('--top', type=int, default=10, help="显示导入耗时最高的模块数量")
+    parser.add_argument('--output', help="结果输出文件（JSON）")
+    args = parser.parse_args(argv)
+
+    report = {'imports': [], 'breakdown': {}}
+    exit_code = 0
+    for module in CORE_MODULES:
+        result = measure_import(module, args.runs)
+        report['imports'].append(result)
+        print(f"{module}: 中位数 {result['median_seconds'] * 1000:.1f}ms "
+              f"(最小 {result['min_seconds'] * 1000:.1f}ms, 最大 {result['max_seconds'] * 1000:.1f}ms)")
+        if result['vendor_modules_loaded']:
+            print(f"  警告: 导入时加载了数据供应商模块 {', '.join(result['vendor_modules_loaded'])}")
+            exit_code = 1
+
+        breakdown = import_time_breakdown(module, args.top)
+        report['breakdown'][module] = breakdown
+        for name, cumulative_us in breakdown:
+            print(f"    {name:<40} {cumulative_us / 1000:8.1f}ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+数据规范化基准测试：逐标的 pandas 清洗、整体数组规范化与读取规范化缓存的耗时对比
+
+示例:
+    python benchmarks/bench_normalization.py --symbols 500 --bars 2520
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.append(SRC_DIR)
+
+from data_normalization import load_normalized, normalize_universe
+from synthetic_data import generate_universe
+
+
+def _messy_universe(n_symbols: int, n_bars: int, seed: int) -> dict:
+    # 模拟下载数据的常见问题：缺失K线、收盘价缺失、重复时间戳、带时区的索引
+    rng = np.random.default_rng(seed)
+    data = {}
+    for symbol, frame in generate_universe(n_symbols, n_bars, seed=seed).items():
+        frame = frame[rng.random(len(frame)) > 0.02].copy()
+        frame.loc[rng.random(len(frame)) < 0.01, 'Close'] = np.nan
+        frame = pd.concat([frame, frame.iloc[rng.integers(0, len(frame), 5)]])
+        frame.index = frame.index.tz_localize('America/New_York')
+        data[symbol] = frame
+    return data
+
+
+def _pandas_baseline(data: dict) -> dict:
+    # 逐标的清洗并 reindex 到日期并集（对照组）
+    frames = {}
+    for symbol, frame in data.items():
+        frame = frame.tz_localize(None).sort_index()
+        frames[symbol] = frame[~frame.index.duplicated(keep='last')]
+    calendar = frames[next(iter(frames))].index
+    for frame in frames.values():
+        calendar = calendar.union(frame.index)
+    result = {}
+    for symbol, frame in frames.items():
+        frame = frame.reindex(calendar)
+        close = frame['Close'].ffill()
+        halted = frame['Close'].isna() & close.notna()
+        for column in ('Open', 'High', 'Low', 'Close'):
+            frame[column] = frame[column].where(~halted, close)
+        frame.loc[halted, 'Volume'] = 0
+        result[symbol] = frame
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="数据规范化基准测试（离线合成数据）")
+    parser.add_argument('--symbols', type=int, default=500, help="标的数量")
+    parser.add_argument('--bars', type=int, default=2520, help="每个标的的K线数量")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    args = parser.parse_args(argv)
+
+    data = _messy_universe(args.symbols, args.bars, args.seed)
+
+    start = time.perf_counter()
+    _pandas_baseline(data)
+    baseline = time.perf_counter() - start
+    print(f"逐标的 pandas 清洗: {baseline:.2f}s")
+
+    start = time.perf_counter()
+    normalize_universe(data)
+    bulk = time.perf_counter() - start
+    print(f"整体数组规范化: {bulk:.2f}s（{baseline / bulk:.1f}x）")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fetch = lambda symbol, start_date, end_date: data[symbol]
+        load_normalized(list(data), '2000-01-01', '2010-01-01', cache_dir, fetch=fetch)
+        start = time.perf_counter()
+        load_normalized(list(data), '2000-01-01', '2010-01-01', cache_dir, fetch=fetch)
+        cached = time.perf_counter() - start
+    print(f"读取规范化缓存（不读取原始数据）: {cached:.2f}s（{baseline / cached:.1f}x）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+参数优化方法对比基准测试
+
+在合成行情上分别运行穷举网格、随机搜索、逐次减半和 TPE 搜索，
+比较各方法找到的最优目标值与网格最优值，以及所用的评估成本（1.0 = 一次全数据回测）。
+
+示例:
+    python benchmarks/bench_optimizer.py --symbols 12 --bars 1000 --metric 卡玛比率
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from optimizer import BacktestObjective, ParameterOptimizer
+from synthetic_data import generate_universe
+
+# 对照用的网格（3 × 2 × 2 × 3 × 2 = 72 组参数）
+GRID = {
+    'entry_window': [20, 40, 60],
+    'exit_window': [10, 20],
+    'atr_window': [14, 20],
+    'atr_multiplier': [1.5, 2.5, 3.5],
+    'risk_percent': [0.01, 0.02],
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="参数优化方法对比基准测试")
+    parser.add_argument('--symbols', type=int, default=12, help="标的数量")
+    parser.add_argument('--bars', type=int, default=1000, help="每个标的的K线数量")
+    parser.add_argument('--metric', default='卡玛比率', help="目标指标")
+    parser.add_argument('--subset', choices=['symbols', 'years'], default='symbols', help="低保真度评估的数据子集")
+    parser.add_argument('--trials', type=int, default=24, help="随机搜索和 TPE 的评估次数")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--output', help="结果输出文件（JSON）")
+    args = parser.parse_args(argv)
+
+    universe = generate_universe(args.symbols, args.bars, seed=args.seed)
+    objective = BacktestObjective(universe, metric=args.metric, subset=args.subset, seed=args.seed)
+    search_space = {name: list(values) for name, values in GRID.items()}
+    search_space.update({name: (min(values), max(values)) for name, values in GRID.items() if name != 'risk_percent'})
+
+    methods = {
+        'grid': lambda optimizer: optimizer.grid_search(GRID),
+        'random': lambda optimizer: optimizer.random_search(args.trials),
+        'successive_halving': lambda optimizer: optimizer.successive_halving(n_candidates=81, min_fidelity=1 / 9),
+        'tpe': lambda optimizer: optimizer.tpe_search(args.trials, n_startup=8),
+    }
+
+    results = {}
+    for name, run in methods.items():
+        optimizer = ParameterOptimizer(objective, search_space, seed=args.seed)
+        start = time.perf_counter()
+        best = run(optimizer)
+        results[name] = {
+            'best_value': best['value'],
+            'best_params': best['params'],
+            'evaluations': optimizer.evaluations,
+            'cost': optimizer.cost,
+            'seconds': time.perf_counter() - start,
+        }
+
+    grid = results['grid']
+    for name, result in results.items():
+        print(f"{name:>20}: {args.metric} {result['best_value']:.4f}"
+              f"（网格最优的 {result['best_value'] / grid['best_value']:.0%}），"
+              f"成本 {result['cost']:.1f}（网格的 {result['cost'] / grid['cost']:.0%}），{result['seconds']:.1f}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'metric': args.metric, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
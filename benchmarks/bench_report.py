@@ -0,0 +1,47 @@
+"""
+HTML 报告生成基准测试
+
+示例:
+    python benchmarks/bench_report.py --symbols 1000 --bars 2500 --output report.html
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from html_report import generate_html_report
+from synthetic_data import generate_universe
+from turtle_backtest import TurtleBacktester
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="HTML 报告生成基准测试（离线合成数据）")
+    parser.add_argument('--symbols', type=int, default=1000, help="标的数量")
+    parser.add_argument('--bars', type=int, default=2500, help="每个标的的K线数量")
+    parser.add_argument('--points', type=int, default=500, help="每条曲线的点数")
+    parser.add_argument('--seed', type=int, default=42, help="合成数据随机种子")
+    parser.add_argument('--output', default='report.html', help="报告输出文件")
+    args = parser.parse_args(argv)
+
+    universe = generate_universe(args.symbols, args.bars, seed=args.seed)
+    index = next(iter(universe.values())).index
+    backtester = TurtleBacktester(symbols=list(universe), start_date=str(index[0].date()),
+                                  end_date=str(index[-1].date()))
+    backtester.data = universe
+    start = time.perf_counter()
+    results = backtester.run_backtest()
+    metrics = {symbol: backtester._calculate_metrics(result) for symbol, result in results.items()}
+    print(f"回测 {args.symbols} 个标的 × {args.bars} 根K线: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    generate_html_report(results, metrics, path=args.output, points=args.points)
+    elapsed = time.perf_counter() - start
+    print(f"生成报告: {elapsed:.2f}s, 文件大小 {os.path.getsize(args.output) / 1e6:.2f}MB ({args.output})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
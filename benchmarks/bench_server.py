@@ -0,0 +1,99 @@
+"""
+常驻回测服务基准测试：冷启动（新进程导入依赖并计算指标）与常驻服务的请求耗时对比
+
+示例:
+    python benchmarks/bench_server.py --symbols 50 --bars 2500 --requests 200 --concurrency 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.append(SRC_DIR)
+
+from backtest_server import BacktestServer, BacktestService
+from synthetic_data import generate_universe
+
+# 冷启动：新进程导入依赖、生成数据（代替下载）、计算指标并回测一次
+COLD_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+sys.path.append({src!r})
+from synthetic_data import generate_ohlcv
+from turtle_backtest import TurtleBacktester
+backtester = TurtleBacktester(symbol='SYM', start_date='2000-01-03', end_date='2010-01-01')
+backtester.data = generate_ohlcv({bars}, seed=0)
+backtester.get_performance_metrics()
+print(time.perf_counter() - start)
+"""
+
+
+def _post(url: str, body: dict) -> dict:
+    request = urllib.request.Request(url, data=json.dumps(body).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="常驻回测服务基准测试（离线合成数据）")
+    parser.add_argument('--symbols', type=int, default=50, help="常驻标的数量")
+    parser.add_argument('--bars', type=int, default=2500, help="每个标的的K线数量")
+    parser.add_argument('--requests', type=int, default=200, help="回测请求数量")
+    parser.add_argument('--concurrency', type=int, default=4, help="并发客户端数量")
+    parser.add_argument('--workers', type=int, default=4, help="服务线程池大小")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', COLD_SCRIPT.format(src=os.path.abspath(SRC_DIR), bars=args.bars)],
+                            capture_output=True, text=True, check=True).stdout
+    cold_total = time.perf_counter() - start
+    print(f"冷启动单次回测: 进程总耗时 {cold_total * 1000:.0f}ms（其中导入和计算 {float(output) * 1000:.0f}ms）")
+
+    universe = generate_universe(args.symbols, args.bars, seed=0)
+    symbols = list(universe)
+    server = BacktestServer(BacktestService(data=universe, max_workers=args.workers)).start()
+    rng = np.random.default_rng(0)
+    bodies = [{'symbol': symbols[int(rng.integers(len(symbols)))],
+               'params': {'entry_window': int(rng.choice([10, 20, 55])), 'exit_window': int(rng.choice([10, 20]))}}
+              for _ in range(args.requests)]
+
+    latencies = []
+    lock = threading.Lock()
+
+    def client(chunk):
+        for body in chunk:
+            sent = time.perf_counter()
+            _post(server.url + '/backtest', body)
+            with lock:
+                latencies.append((time.perf_counter() - sent) * 1000)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(bodies[k::args.concurrency],)) for k in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats = server.service.stats()
+    server.stop()
+    latencies = np.asarray(latencies)
+    print(f"常驻服务 {args.requests} 个回测请求（并发 {args.concurrency}）: "
+          f"p50 {np.percentile(latencies, 50):.1f}ms, p95 {np.percentile(latencies, 95):.1f}ms, "
+          f"吞吐 {args.requests / elapsed:.0f} 请求/秒")
+    print(f"指标缓存命中率 {stats['indicator_cache']['hit_rate']:.1%}，"
+          f"相对冷启动加速 {cold_total * 1000 / np.percentile(latencies, 50):.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""
+海龟交易策略性能基准测试
+
+使用合成行情数据（完全离线）分别计时回测流程的各个阶段，
+结果写入 JSON 文件（包含耗时与峰值内存），并可与已保存的基准结果对比以发现性能回退。
+
+示例:
+    python benchmarks/run_benchmarks.py --preset quick --output bench.json
+    python benchmarks/run_benchmarks.py --preset quick --compare baseline.json
+    python benchmarks/run_benchmarks.py --bars 1000,100000 --symbols 1,100 --stages generate_signals
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from turtle_backtest import TurtleBacktester
+from synthetic_data import generate_universe
+
+STAGES = (
+    'generate_signals',
+    'calculate_trades',
+    'calculate_equity_curve',
+    'performance_metrics',
+    'run_backtest',
+)
+
+# 各阶段需要预先计算的输入（BenchmarkCase 的属性，首次访问时才计算）
+STAGE_INPUTS = {
+    'calculate_trades': 'sized',
+    'calculate_equity_curve': 'trades',
+    'performance_metrics': 'results',
+}
+
+# 对比模式下每个阶段至少重复的次数（取中位数比较，避免单次运行的抖动被误报为回退）
+MIN_COMPARE_REPEAT = 5
+
+# 峰值内存增幅低于该值（字节）时不视为回退，避免小规模用例的分配噪声
+MEMORY_NOISE_BYTES = 1_000_000
+
+# 中位数耗时增幅低于该值（秒）时不视为回退，毫秒级用例的调度抖动常超过相对阈值
+WALL_NOISE_SECONDS = 0.005
+
+# 预设规模：K线数量扫描（单标的）+ 标的数量扫描（固定K线数量）
+PRESETS = {
+    'quick': [(1_000, 1), (10_000, 1), (1_000, 10)],
+    'full': [(n_bars, 1) for n_bars in (1_000, 10_000, 100_000, 1_000_000, 10_000_000)]
+            + [(1_000, n_symbols) for n_symbols in (10, 100, 1_000, 5_000)],
+}
+
+
+class BenchmarkCase:
+    """
+    单个规模（K线数量 × 标的数量）下的基准测试输入
+
+    各阶段的输入（信号、交易、权益曲线）在第一次被需要时才计算，
+    被跳过的阶段（如超过 --time-budget）不会付出准备输入的代价。
+    """
+
+    def __init__(self, n_bars: int, n_symbols: int, seed: int):
+        self.n_bars = n_bars
+        self.n_symbols = n_symbols
+        self.universe = generate_universe(n_symbols, n_bars, seed=seed)
+        index = next(iter(self.universe.values())).index
+        self.start_date = str(index[0].date())
+        self.end_date = str(index[-1].date() + pd.Timedelta(days=1))
+        self.backtester = self.make_backtester()
+        self.backtester.setup_strategy()
+
+    @cached_property
+    def sized(self) -> dict:
+        """
+        各标的计算了信号和头寸规模的策略结果
+        """
+        strategy = self.backtester.strategy
+        return {symbol: strategy.calculate_position_size(strategy.generate_signals(data),
+                                                         self.backtester.initial_capital,
+                                                         self.backtester.contract_size)
+                for symbol, data in self.universe.items()}
+
+    @cached_property
+    def trades(self) -> dict:
+        """
+        各标的的交易记录
+        """
+        return {symbol: self.backtester._calculate_trades(sized) for symbol, sized in self.sized.items()}
+
+    @cached_property
+    def results(self) -> dict:
+        """
+        各标的的回测结果（与 run_backtest 的单标的结果相同）
+        """
+        results = {}
+        for symbol, sized in self.sized.items():
+            trades = self.trades[symbol]
+            equity = self.backtester._calculate_equity_curve(trades, sized)
+            final_capital = equity['Equity'].iloc[-1]
+            results[symbol] = {
+                'symbol': symbol,
+                'initial_capital': self.backtester.initial_capital,
+                'final_capital': final_capital,
+                'total_return': (final_capital / self.backtester.initial_capital - 1) * 100,
+                'trades': trades,
+                'equity_curve': equity,
+                'strategy_results': sized,
+            }
+        return results
+
+    def prepare(self, stage: str):
+        """
+        计算阶段所需的输入（在计时之前调用）
+        """
+        if stage in STAGE_INPUTS:
+            getattr(self, STAGE_INPUTS[stage])
+
+    def make_backtester(self) -> TurtleBacktester:
+        backtester = TurtleBacktester(symbols=list(self.universe),
+                                      start_date=self.start_date,
+                                      end_date=self.end_date)
+        backtester.data = self.universe
+        return backtester
+
+    def run_stage(self, stage: str):
+        backtester = self.backtester
+        if stage == 'generate_signals':
+            for data in self.universe.values():
+                backtester.strategy.generate_signals(data)
+        elif stage == 'calculate_trades':
+            for sized in self.sized.values():
+                backtester._calculate_trades(sized)
+        elif stage == 'calculate_equity_curve':
+            for symbol, sized in self.sized.items():
+                backtester._calculate_equity_curve(self.trades[symbol], sized)
+        elif stage == 'performance_metrics':
+            for result in self.results.values():
+                backtester._calculate_metrics(result)
+        elif stage == 'run_backtest':
+            self.make_backtester().run_backtest()
+        else:
+            raise ValueError(f"未知的基准测试阶段: {stage}")
+
+
+def time_stage(case: BenchmarkCase, stage: str, repeat: int) -> dict:
+    """
+    对单个阶段计时：记录 repeat 次中的最短和中位数耗时，再单独运行一次测量峰值内存
+    """
+    case.prepare(stage)
+    wall_times = []
+    cpu_times = []
+    for _ in range(repeat):
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        case.run_stage(stage)
+        wall_times.append(time.perf_counter() - wall_start)
+        cpu_times.append(time.process_time() - cpu_start)
+
+    # tracemalloc 会拖慢执行，因此与计时分开运行
+    tracemalloc.start()
+    try:
+        case.run_stage(stage)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    wall = min(wall_times)
+    total_bars = case.n_bars * case.n_symbols
+    return {
+        'case': case_key(stage, case.n_bars, case.n_symbols),
+        'stage': stage,
+        'n_bars': case.n_bars,
+        'n_symbols': case.n_symbols,
+        'repeat': repeat,
+        'wall_seconds': wall,
+        'median_seconds': float(np.median(wall_times)),
+        'cpu_seconds': min(cpu_times),
+        'peak_memory_bytes': peak_memory,
+        'bars_per_second': total_bars / wall if wall > 0 else float('inf'),
+    }
+
+
+def case_key(stage: str, n_bars: int, n_symbols: int) -> str:
+    return f"{stage}/bars={n_bars}/symbols={n_symbols}"
+
+
+def run_benchmarks(sizes, stages=STAGES, repeat: int = 3, seed: int = 42,
+                   time_budget: float = None, log=print) -> dict:
+    """
+    运行基准测试
+
+    Args:
+        sizes: (K线数量, 标的数量) 列表
+        stages: 需要计时的阶段
+        repeat: 每个阶段的重复次数
+        seed: 合成数据随机种子
+        time_budget: 单个阶段的耗时上限（秒）；某阶段超过上限后跳过该阶段更大的规模
+        log: 进度输出函数
+
+    Returns:
+        可直接序列化为 JSON 的结果字典
+    """
+    results = []
+    skipped = []
+    over_budget = {}
+    for n_bars, n_symbols in sorted(sizes, key=lambda size: size[0] * size[1]):
+        pending = [stage for stage in stages
+                   if stage not in over_budget or n_bars * n_symbols <= over_budget[stage]]
+        for stage in stages:
+            if stage not in pending:
+                skipped.append(case_key(stage, n_bars, n_symbols))
+        if not pending:
+            continue
+
+        log(f"生成合成数据: {n_bars} 根K线 × {n_symbols} 个标的")
+        case = BenchmarkCase(n_bars, n_symbols, seed)
+        for stage in pending:
+            record = time_stage(case, stage, repeat)
+            results.append(record)
+            log(f"  {record['case']}: {record['wall_seconds']:.4f}s, "
+                f"峰值内存 {record['peak_memory_bytes'] / 1e6:.1f}MB")
+            if time_budget is not None and record['wall_seconds'] > time_budget:
+                over_budget[stage] = n_bars * n_symbols
+        del case
+
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def _typical_seconds(record: dict) -> float:
+    # 中位数耗时（旧结果文件没有中位数时使用最短耗时）
+    return record.get('median_seconds', record['wall_seconds'])
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float = 0.25,
+                    memory_tolerance: float = 0.25) -> list:
+    """
+    与基准结果对比，返回回退的用例列表
+
+    耗时按中位数比较，超过 baseline × (1 + tolerance) 且增幅超过 WALL_NOISE_SECONDS
+    视为回退；峰值内存超过 baseline × (1 + memory_tolerance) 且增幅超过
+    MEMORY_NOISE_BYTES 视为回退。
+
+    Returns:
+        [{'case', 'metric'（'wall_seconds' 或 'peak_memory_bytes'）, 'baseline', 'current', 'ratio'}]
+    """
+    baseline_by_case = {record['case']: record for record in baseline.get('results', [])}
+    regressions = []
+    for record in current.get('results', []):
+        reference = baseline_by_case.get(record['case'])
+        if reference is None:
+            continue
+        checks = [('wall_seconds', _typical_seconds(reference), _typical_seconds(record), tolerance,
+                   WALL_NOISE_SECONDS)]
+        if reference.get('peak_memory_bytes') and record.get('peak_memory_bytes') is not None:
+            checks.append(('peak_memory_bytes', reference['peak_memory_bytes'], record['peak_memory_bytes'],
+                           memory_tolerance, MEMORY_NOISE_BYTES))
+        for metric, baseline_value, current_value, limit, noise in checks:
+            if baseline_value <= 0:
+                continue
+            ratio = current_value / baseline_value
+            if ratio > 1 + limit and current_value - baseline_value > noise:
+                regressions.append({
+                    'case': record['case'],
+                    'metric': metric,
+                    'baseline': baseline_value,
+                    'current': current_value,
+                    'ratio': ratio,
+                })
+    return regressions
+
+
+def _parse_int_list(value: str) -> list:
+    return [int(item.replace('_', '')) for item in value.split(',') if item.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="海龟交易策略性能基准测试（离线合成数据）")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick', help="预设规模")
+    parser.add_argument('--bars', type=_parse_int_list, help="K线数量列表（逗号分隔），与 --symbols 组合覆盖预设")
+    parser.add_argument('--symbols', type=_parse_int_list, help="标的数量列表（逗号分隔）")
+    parser.add_argument('--stages', default=','.join(STAGES), help="需要计时的阶段（逗号分隔）")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help=f"每个阶段的重复次数（对比模式下至少 {MIN_COMPARE_REPEAT} 次）")
+    parser.add_argument('--seed', type=int, default=42, help="合成数据随机种子")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="单阶段耗时上限（秒），超过后跳过该阶段更大的规模")
+    parser.add_argument('--output', default='bench_results.json', help="结果输出文件")
+    parser.add_argument('--compare', help="与该基准结果文件对比")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="允许的耗时增幅（默认25%%）")
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help="允许的峰值内存增幅（默认25%%）")
+    args = parser.parse_args(argv)
+    if args.compare and args.repeat < MIN_COMPARE_REPEAT:
+        print(f"对比模式下每个阶段重复 {MIN_COMPARE_REPEAT} 次（--repeat {args.repeat} 不足以区分抖动和回退）")
+        args.repeat = MIN_COMPARE_REPEAT
+
+    if args.bars or args.symbols:
+        sizes = [(n_bars, n_symbols)
+                 for n_bars in (args.bars or [1_000])
+                 for n_symbols in (args.symbols or [1])]
+    else:
+        sizes = PRESETS[args.preset]
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"未知的阶段: {', '.join(sorted(unknown))}")
+
+    report = run_benchmarks(sizes, stages, repeat=args.repeat, seed=args.seed,
+                            time_budget=args.time_budget)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('repeat', 0) < MIN_COMPARE_REPEAT:
+            print(f"注意: 基准结果每个阶段只重复了 {baseline.get('meta', {}).get('repeat')} 次，"
+                  f"建议用 --repeat {MIN_COMPARE_REPEAT} 以上重新生成")
+        regressions = compare_results(report, baseline, args.tolerance, args.memory_tolerance)
+        if regressions:
+            print("发现性能回退:")
+            for item in regressions:
+                if item['metric'] == 'wall_seconds':
+                    change = f"{item['baseline']:.4f}s -> {item['current']:.4f}s（中位数）"
+                else:
+                    change = f"峰值内存 {item['baseline'] / 1e6:.1f}MB -> {item['current'] / 1e6:.1f}MB"
+                print(f"  {item['case']}: {change} ({item['ratio']:.2f}x)")
+            return 1
+        print("未发现性能回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
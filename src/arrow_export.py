@@ -0,0 +1,242 @@
+"""
+回测结果导出为 Apache Arrow（记录批 / IPC / Feather 文件）
+
+交易记录、权益曲线、信号和绩效指标各导出为一张表，每个标的一个记录批，
+标的代码列使用字典编码（所有记录批共享同一个字典）。数值列和时间列直接引用
+pandas 底层的 numpy 缓冲区，不做复制；NaN 按浮点数值保留，不转换为空值。
+绩效指标列使用 METRIC_KEYS 中稳定的英文名称，中文标签保存在字段元数据的 'label' 中。
+
+需要安装 pyarrow（`pip install pyarrow`），仅在导出时导入。
+"""
+
+import importlib
+import os
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+import pandas as pd
+import numpy as np
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from turtle_backtest import METRIC_KEYS, METRIC_LABELS
+
+# 计数类指标导出为整数列，其余为浮点列
+_INTEGER_METRICS = ('总交易次数', '盈利次数', '亏损次数')
+
+_pyarrow_module = None
+
+
+def _pyarrow():
+    """
+    延迟导入 pyarrow
+    """
+    global _pyarrow_module
+    if _pyarrow_module is None:
+        try:
+            _pyarrow_module = importlib.import_module('pyarrow')
+        except ImportError as e:
+            raise ImportError("导出 Arrow 格式需要安装 pyarrow: pip install pyarrow") from e
+    return _pyarrow_module
+
+
+def _split_results(results: Dict) -> List[Tuple[str, Dict]]:
+    """
+    把 run_backtest 的结果统一为 [(标的代码, 单个标的的结果)]（兼容单股票和多股票模式）
+    """
+    if 'trades' in results and 'equity_curve' in results:
+        return [(results.get('symbol'), results)]
+    return list(results.items())
+
+
+def numpy_to_arrow(values: np.ndarray):
+    """
+    把一维 numpy 数组转换为 Arrow 数组
+
+    连续存储的数值数组和 datetime64 数组直接引用原缓冲区（零复制）；
+    布尔数组（Arrow 按位存储）和其他类型会被复制。
+    """
+    pa = _pyarrow()
+    if values.dtype.kind in 'iuf':
+        values = np.ascontiguousarray(values)
+        return pa.Array.from_buffers(pa.from_numpy_dtype(values.dtype), len(values), [None, pa.py_buffer(values)])
+    if values.dtype.kind == 'M':
+        values = np.ascontiguousarray(values)
+        unit, _ = np.datetime_data(values.dtype)
+        return pa.Array.from_buffers(pa.timestamp(unit), len(values), [None, pa.py_buffer(values.view(np.int64))])
+    return pa.array(values)
+
+
+def _series_to_arrow(values):
+    """
+    pandas 列或索引转换为 Arrow 数组（时间列保留单位和时区）
+    """
+    pa = _pyarrow()
+    if values.dtype.kind == 'M':
+        index = pd.DatetimeIndex(values)
+        if index.hasnans:
+            # NaT 需要有效位图，无法零复制
+            return pa.array(index)
+        tz = str(index.tz) if index.tz is not None else None
+        return pa.Array.from_buffers(pa.timestamp(index.unit, tz=tz), len(index), [None, pa.py_buffer(index.asi8)])
+    return numpy_to_arrow(values.to_numpy())
+
+
+def _symbol_column(symbol_index: int, length: int, dictionary):
+    pa = _pyarrow()
+    indices = pa.array(np.full(length, symbol_index, dtype=np.int32))
+    return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+
+def frames_to_batches(frames: Iterable[Tuple[str, pd.DataFrame]], index_name: str = None) -> List:
+    """
+    把每个标的的数据框转换为一个记录批，第一列为字典编码的 symbol 列
+
+    Args:
+        frames: [(标的代码, 数据框)]
+        index_name: 索引导出为的列名，None 表示不导出索引
+
+    Returns:
+        记录批列表（各记录批的结构和 symbol 字典相同）
+    """
+    pa = _pyarrow()
+    frames = [(symbol, frame) for symbol, frame in frames if frame is not None and len(frame.columns) > 0]
+    dictionary = pa.array([str(symbol) for symbol, _ in frames], type=pa.string())
+
+    batches = []
+    for k, (symbol, frame) in enumerate(frames):
+        names = ['symbol']
+        arrays = [_symbol_column(k, len(frame), dictionary)]
+        if index_name is not None:
+            names.append(index_name)
+            arrays.append(_series_to_arrow(frame.index))
+        for column in frame.columns:
+            names.append(str(column))
+            arrays.append(_series_to_arrow(frame[column]))
+        batches.append(pa.RecordBatch.from_arrays(arrays, names=names))
+    return batches
+
+
+def _to_table(batches: List):
+    pa = _pyarrow()
+    if not batches:
+        return pa.table({'symbol': pa.array([], type=pa.dictionary(pa.int32(), pa.string()))})
+    return pa.Table.from_batches(batches)
+
+
+def trades_table(results: Dict):
+    """
+    交易记录表（run_backtest 的结果，单股票或多股票模式）
+    """
+    return _to_table(frames_to_batches((symbol, result['trades']) for symbol, result in _split_results(results)))
+
+
+def equity_table(results: Dict):
+    """
+    权益曲线表，包含 Date、Equity、Returns 列
+    """
+    return _to_table(frames_to_batches(((symbol, result['equity_curve']) for symbol, result in _split_results(results)),
+                                       index_name='Date'))
+
+
+def signals_table(results: Dict):
+    """
+    策略信号表（价格、通道、ATR、信号、持仓和头寸规模）
+    """
+    return _to_table(frames_to_batches(((symbol, result['strategy_results'])
+                                        for symbol, result in _split_results(results)), index_name='Date'))
+
+
+def metrics_schema():
+    """
+    绩效指标表的结构：symbol 列 + 按 METRIC_LABELS 顺序的指标列，字段元数据保存中文标签
+    """
+    pa = _pyarrow()
+    fields = [pa.field('symbol', pa.dictionary(pa.int32(), pa.string()))]
+    for label in METRIC_LABELS:
+        data_type = pa.int64() if label in _INTEGER_METRICS else pa.float64()
+        fields.append(pa.field(METRIC_KEYS[label], data_type, metadata={'label': label}))
+    return pa.schema(fields)
+
+
+def metrics_table(metrics: Dict, symbol: str = None):
+    """
+    绩效指标表，每个标的一行
+
+    Args:
+        metrics: get_performance_metrics 的结果（单股票为 {指标: 值}，多股票为 {标的: {指标: 值}}）
+        symbol: 单股票模式下的标的代码
+
+    Returns:
+        pyarrow.Table，缺失的指标为空值
+    """
+    pa = _pyarrow()
+    if metrics and not all(isinstance(value, dict) for value in metrics.values()):
+        metrics = {symbol: metrics}
+    schema = metrics_schema()
+    symbols = [str(name) for name in metrics]
+    dictionary = pa.array(symbols, type=pa.string())
+    arrays = [pa.DictionaryArray.from_arrays(pa.array(np.arange(len(symbols), dtype=np.int32)), dictionary)]
+    for field, label in zip(list(schema)[1:], METRIC_LABELS):
+        arrays.append(pa.array([values.get(label) for values in metrics.values()], type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_ipc(table, path: str, stream: bool = False) -> str:
+    """
+    写入 Arrow IPC 文件（stream=True 时为流格式）
+
+    Returns:
+        文件路径
+    """
+    pa = _pyarrow()
+    writer_class = pa.ipc.RecordBatchStreamWriter if stream else pa.ipc.RecordBatchFileWriter
+    with pa.OSFile(path, 'wb') as sink, writer_class(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+
+def write_feather(table, path: str, compression: str = 'uncompressed') -> str:
+    """
+    写入 Feather（V2，即 Arrow IPC 文件）
+
+    Args:
+        table: pyarrow.Table
+        path: 文件路径
+        compression: 'uncompressed'、'lz4' 或 'zstd'（压缩后读取时不再是零复制）
+
+    Returns:
+        文件路径
+    """
+    _pyarrow()
+    feather = importlib.import_module('pyarrow.feather')
+    feather.write_feather(table, path, compression=compression)
+    return path
+
+
+def export_backtest(results: Dict, directory: str, metrics: Dict = None, symbol: str = None,
+                    compression: str = 'uncompressed') -> Dict[str, str]:
+    """
+    把一次回测的交易记录、权益曲线、信号（和绩效指标）写为 Feather 文件
+
+    Args:
+        results: run_backtest 的结果
+        directory: 输出目录
+        metrics: get_performance_metrics 的结果（可选）
+        symbol: 单股票模式下绩效指标对应的标的代码
+        compression: Feather 压缩方式
+
+    Returns:
+        {表名: 文件路径}
+    """
+    os.makedirs(directory, exist_ok=True)
+    tables = {
+        'trades': trades_table(results),
+        'equity': equity_table(results),
+        'signals': signals_table(results),
+    }
+    if metrics is not None:
+        tables['metrics'] = metrics_table(metrics, symbol)
+    return {name: write_feather(table, os.path.join(directory, f"{name}.feather"), compression)
+            for name, table in tables.items()}
@@ -0,0 +1,679 @@
+"""
+常驻回测服务（本地 HTTP 服务，JSON 请求/响应）
+
+服务进程启动后一直保留已加载的价格数据和已计算的指标（唐奇安通道、ATR），
+回测、参数扫描和全市场扫描请求不再需要重新导入依赖、下载数据和计算指标。
+请求由有界线程池执行，排队请求数超过上限时返回 503；每个响应都带有排队和计算耗时。
+
+接口：
+    POST /backtest  {"symbol" 或 "symbols", "start_date", "end_date", "params", "backtester", "include"}
+    POST /sweep     {"symbols", "grid": {参数名: 候选值列表}, "metric", "top", ...}
+    POST /scan      {"symbols"（可选）, "params", "positions", "include_all", "account_value"}
+    POST /load      {"symbols", "start_date", "end_date"}  预先加载数据
+    GET  /stats     请求耗时统计和缓存命中率
+
+命令行用法：
+    python src/backtest_server.py --port 8765 --workers 4 --synthetic 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import product
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+import numpy as np
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from turtle_backtest import METRIC_KEYS, TurtleBacktester
+from turtle_trading_strategy import TurtleTradingStrategy
+from universe_scanner import UniverseScanner
+
+# 请求中允许设置的回测参数（其余参数如成交模型不能通过 JSON 传递）
+BACKTESTER_OPTIONS = ('initial_capital', 'commission_rate', 'slippage', 'contract_size')
+
+# 稳定的英文指标名 -> 中文标签
+_METRIC_LABELS_BY_KEY = {key: label for label, key in METRIC_KEYS.items()}
+
+
+class ServiceBusy(RuntimeError):
+    """
+    排队请求数已达上限
+    """
+
+
+def _to_jsonable(value):
+    """
+    把 numpy/pandas 值转换为可 JSON 序列化的值（NaN 和无穷大转换为 null）
+    """
+    if isinstance(value, dict):
+        return {str(key): _to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return [_to_jsonable(item) for item in value.tolist()]
+    if isinstance(value, pd.Timestamp):
+        return None if pd.isna(value) else value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if value is pd.NaT:
+        return None
+    return value
+
+
+def _frame_records(frame: pd.DataFrame) -> List[Dict]:
+    return [_to_jsonable(record) for record in frame.to_dict('records')]
+
+
+class LRUCache:
+    def __init__(self, max_entries: int):
+        """
+        线程安全的 LRU 缓存，记录命中和未命中次数
+
+        Args:
+            max_entries: 最多保留的条目数
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key) -> Tuple[bool, object]:
+        """
+        查询缓存
+
+        Returns:
+            (是否命中, 值)
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def get(self, key, compute: Callable):
+        """
+        返回 key 对应的值，不存在时调用 compute() 计算并缓存（计算在锁外进行）
+        """
+        found, value = self.lookup(key)
+        if not found:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+class PriceCache:
+    def __init__(self, loader: Callable = None, max_entries: int = 1024):
+        """
+        常驻内存的价格数据
+
+        Args:
+            loader: 数据加载函数 loader(symbol, start_date, end_date) -> DataFrame，默认使用 get_stock_data
+            max_entries: 最多保留的下载结果数量（通过 put 放入的数据不受限制）
+        """
+        self.loader = loader
+        self._resident = {}       # put 放入的完整数据：{标的: (版本号, 数据)}
+        self._loaded = LRUCache(max_entries)
+        self._lock = threading.Lock()
+        self._loading = {}        # 正在下载的键 -> threading.Event，同一数据只下载一次
+        self._generation = 0
+
+    def put(self, symbol: str, data: pd.DataFrame):
+        """
+        放入（或替换）一个标的的完整价格数据，按日期区间查询时从中切片
+        """
+        with self._lock:
+            self._generation += 1
+            self._resident[symbol] = (self._generation, data)
+
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return list(self._resident)
+
+    def get(self, symbol: str, start_date: str = None, end_date: str = None) -> Tuple[Tuple, pd.DataFrame]:
+        """
+        获取价格数据
+
+        Args:
+            symbol: 标的代码
+            start_date: 开始日期（None 表示不限）
+            end_date: 结束日期（None 表示不限；常驻数据按闭区间切片）
+
+        Returns:
+            (数据键, 价格数据)，数据键唯一标识这份数据，用作指标缓存的键
+
+        Raises:
+            KeyError: 没有该标的的数据
+        """
+        with self._lock:
+            resident = self._resident.get(symbol)
+        if resident is not None:
+            generation, data = resident
+            if start_date is not None or end_date is not None:
+                data = data.loc[start_date:end_date]
+            return (symbol, generation, start_date, end_date), data
+
+        key = (symbol, 0, start_date, end_date)
+        while True:
+            with self._lock:
+                found, cached = self._loaded.lookup(key)
+                if found:
+                    return key, cached
+                event = self._loading.get(key)
+                if event is None:
+                    event = self._loading[key] = threading.Event()
+                    break
+            # 其他线程正在下载同一数据，等待其完成后重新查询
+            event.wait()
+
+        try:
+            data = self._load(symbol, start_date, end_date)
+            if data is None or data.empty:
+                raise KeyError(f"没有 {symbol} 的价格数据")
+            self._loaded.put(key, data)
+            return key, data
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def _load(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        if self.loader is not None:
+            return self.loader(symbol, start_date, end_date)
+        from data_utils import get_stock_data
+        return get_stock_data(symbol, start_date, end_date)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            resident = len(self._resident)
+            rows = sum(len(data) for _, data in self._resident.values())
+        stats = self._loaded.stats()
+        stats.update({'resident_symbols': resident, 'resident_rows': rows})
+        return stats
+
+
+class CachedIndicatorStrategy(TurtleTradingStrategy):
+    def __init__(self, cache: LRUCache, data_key: Tuple, **kwargs):
+        """
+        从指标缓存中取唐奇安通道和ATR的策略，信号逻辑与 TurtleTradingStrategy 相同
+
+        通道按窗口长度、ATR 按周期分别缓存，入场和出场窗口相同或多组参数共用同一窗口时只计算一次。
+
+        Args:
+            cache: 指标缓存
+            data_key: 价格数据的键（PriceCache.get 的返回值）
+            **kwargs: 策略参数
+        """
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.data_key = data_key
+
+    def _channel(self, data: pd.DataFrame, window: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.cache.get((self.data_key, 'donchian', window), lambda: self._channel_arrays(data, window))
+
+    def calculate_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
+        data_copy = data.copy()
+        data_copy['Donchian_High'], data_copy['Donchian_Low'] = self._channel(data, self.entry_window)
+        data_copy['Exit_High'], data_copy['Exit_Low'] = self._channel(data, self.exit_window)
+        data_copy['ATR'] = self.cache.get((self.data_key, 'atr', self.atr_window),
+                                          lambda: self._atr_array(data, self.atr_window))
+        return data_copy
+
+
+class LatencyStats:
+    def __init__(self, window: int = 1000):
+        """
+        每个接口最近 window 个请求的耗时统计（毫秒）
+        """
+        self._samples = {}
+        self._counts = {}
+        self._errors = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, total_ms: float, error: bool = False):
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self._window)).append(total_ms)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            if error:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            summary = {}
+            for endpoint, samples in self._samples.items():
+                values = np.asarray(samples)
+                summary[endpoint] = {
+                    'count': self._counts[endpoint],
+                    'errors': self._errors.get(endpoint, 0),
+                    'mean_ms': float(values.mean()),
+                    'p50_ms': float(np.percentile(values, 50)),
+                    'p95_ms': float(np.percentile(values, 95)),
+                    'max_ms': float(values.max()),
+                }
+            return summary
+
+
+class BacktestService:
+    def __init__(self,
+                 data: Dict[str, pd.DataFrame] = None,
+                 loader: Callable = None,
+                 max_workers: int = 4,
+                 max_pending: int = 64,
+                 engine: str = 'fast',
+                 indicator_cache_size: int = 4096,
+                 price_cache_size: int = 1024,
+                 warmup: bool = True):
+        """
+        常驻回测服务（不含 HTTP 层，可直接在 Python 中调用 execute）
+
+        Args:
+            data: 预先放入内存的价格数据 {标的代码: 价格数据}
+            loader: 数据加载函数 loader(symbol, start_date, end_date)，默认使用 get_stock_data
+            max_workers: 同时执行的请求数（线程池大小）
+            max_pending: 执行中和排队中的请求数上限，超过时拒绝新请求
+            engine: 回测计算引擎
+            indicator_cache_size: 指标缓存条目数上限
+            price_cache_size: 下载数据缓存条目数上限
+            warmup: 启动时在合成数据上回测一次，提前加载计算内核（首个请求不再承担编译或加载耗时）
+        """
+        self.prices = PriceCache(loader, max_entries=price_cache_size)
+        self.indicators = LRUCache(indicator_cache_size)
+        self.latency = LatencyStats()
+        self.engine = engine
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='backtest')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._started = time.time()
+        self.handlers = {
+            'backtest': self.backtest,
+            'sweep': self.sweep,
+            'scan': self.scan,
+            'load': self.load,
+        }
+        for symbol, frame in (data or {}).items():
+            self.prices.put(symbol, frame)
+        if warmup:
+            self.warmup()
+
+    def warmup(self):
+        """
+        在合成数据上回测一次，加载计算内核
+        """
+        from synthetic_data import generate_ohlcv
+        backtester = TurtleBacktester(symbol='WARMUP', engine=self.engine)
+        backtester.data = generate_ohlcv(300, seed=0)
+        backtester.run_backtest()
+
+    @property
+    def pending(self) -> int:
+        with self._pending_lock:
+            return self._pending
+
+    def execute(self, endpoint: str, request: Dict) -> Dict:
+        """
+        在线程池中执行一个请求并等待结果
+
+        Args:
+            endpoint: 'backtest'、'sweep'、'scan' 或 'load'
+            request: 请求参数
+
+        Returns:
+            响应字典，包含 latency_ms: {'queue', 'compute', 'total'}
+
+        Raises:
+            ServiceBusy: 排队请求数已达上限
+            ValueError: 请求参数错误
+            KeyError: 没有所需的价格数据
+        """
+        handler = self.handlers.get(endpoint)
+        if handler is None:
+            raise KeyError(f"未知的接口 {endpoint!r}")
+        if not self._slots.acquire(blocking=False):
+            raise ServiceBusy("排队请求过多，请稍后重试")
+
+        submitted = time.perf_counter()
+        timing = {}
+
+        def run():
+            started = time.perf_counter()
+            try:
+                return handler(request)
+            finally:
+                timing['queue'] = (started - submitted) * 1000
+                timing['compute'] = (time.perf_counter() - started) * 1000
+
+        with self._pending_lock:
+            self._pending += 1
+        error = True
+        try:
+            response = self._executor.submit(run).result()
+            error = False
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+            self._slots.release()
+            total = (time.perf_counter() - submitted) * 1000
+            self.latency.record(endpoint, total, error)
+
+        response['latency_ms'] = {'queue': timing['queue'], 'compute': timing['compute'], 'total': total}
+        return response
+
+    def _make_backtester(self, symbol: str, data_key: Tuple, data: pd.DataFrame, request: Dict,
+                         params: Dict) -> TurtleBacktester:
+        options = request.get('backtester') or {}
+        unknown = set(options) - set(BACKTESTER_OPTIONS)
+        if unknown:
+            raise ValueError(f"不支持的回测参数: {sorted(unknown)}，可选: {list(BACKTESTER_OPTIONS)}")
+        if data.empty:
+            raise KeyError(f"{symbol} 在指定日期区间内没有数据")
+        backtester = TurtleBacktester(symbol=symbol,
+                                      start_date=request.get('start_date') or str(data.index[0].date()),
+                                      end_date=request.get('end_date') or str(data.index[-1].date()),
+                                      engine=self.engine, **options)
+        backtester.data = data
+        try:
+            backtester.strategy = CachedIndicatorStrategy(self.indicators, data_key, engine=self.engine, **params)
+        except TypeError as e:
+            raise ValueError(f"策略参数错误: {e}") from e
+        return backtester
+
+    def _symbols(self, request: Dict) -> List[str]:
+        symbols = request.get('symbols')
+        if symbols is None and request.get('symbol') is not None:
+            symbols = [request['symbol']]
+        if not symbols:
+            raise ValueError("请求中缺少 symbol 或 symbols")
+        return list(symbols)
+
+    def _run_one(self, symbol: str, request: Dict, params: Dict) -> Tuple[Dict, Dict]:
+        data_key, data = self.prices.get(symbol, request.get('start_date'), request.get('end_date'))
+        backtester = self._make_backtester(symbol, data_key, data, request, params)
+        result = backtester.run_backtest()
+        # 资金为负时年化收益率为 NaN（与 BacktestObjective 相同，不输出警告）
+        with np.errstate(invalid='ignore'):
+            metrics = backtester._calculate_metrics(result)
+        return result, {METRIC_KEYS.get(label, label): value for label, value in metrics.items()}
+
+    def backtest(self, request: Dict) -> Dict:
+        """
+        回测一个或多个标的
+
+        请求: symbol/symbols、start_date、end_date、params（策略参数）、
+              backtester（BACKTESTER_OPTIONS 中的参数）、include（可含 'trades'、'equity'）
+
+        Returns:
+            {'results': {标的: {'final_capital', 'total_return', 'num_trades', 'metrics', ['trades'], ['equity']}}}
+        """
+        params = request.get('params') or {}
+        include = set(request.get('include') or ())
+        results = {}
+        for symbol in self._symbols(request):
+            result, metrics = self._run_one(symbol, request, params)
+            entry = {
+                'final_capital': result['final_capital'],
+                'total_return': result['total_return'],
+                'num_trades': len(result['trades']),
+                'metrics': metrics,
+            }
+            if 'trades' in include:
+                entry['trades'] = _frame_records(result['trades'])
+            if 'equity' in include:
+                equity = result['equity_curve']['Equity']
+                entry['equity'] = {'index': [timestamp.isoformat() for timestamp in equity.index],
+                                   'values': equity.to_numpy()}
+            results[symbol] = entry
+        return _to_jsonable({'results': results})
+
+    def sweep(self, request: Dict) -> Dict:
+        """
+        参数网格扫描（各组参数共用同一份常驻数据，相同窗口的指标只计算一次）
+
+        请求: symbols、grid（{参数名: 候选值列表}）、metric（英文指标名或中文标签，默认 calmar_ratio）、
+              top（返回的组数，默认全部）、start_date、end_date、backtester
+
+        Returns:
+            {'metric', 'evaluated', 'runs': [{'params', 'value', 'per_symbol'}]}，按 value 降序
+        """
+        grid = request.get('grid')
+        if not grid:
+            raise ValueError("请求中缺少 grid")
+        metric = request.get('metric', 'calmar_ratio')
+        metric = METRIC_KEYS.get(metric, metric)
+        if metric not in _METRIC_LABELS_BY_KEY:
+            raise ValueError(f"未知的指标 {metric!r}")
+        symbols = self._symbols(request)
+
+        names = list(grid)
+        runs = []
+        for values in product(*(grid[name] for name in names)):
+            params = dict(zip(names, values))
+            per_symbol = {}
+            for symbol in symbols:
+                _, metrics = self._run_one(symbol, request, params)
+                per_symbol[symbol] = metrics.get(metric, 0.0)
+            with np.errstate(invalid='ignore'):
+                value = float(np.mean(list(per_symbol.values())))
+            runs.append({'params': params, 'value': value, 'per_symbol': per_symbol})
+
+        runs.sort(key=lambda run: run['value'] if np.isfinite(run['value']) else -np.inf, reverse=True)
+        top = request.get('top')
+        return _to_jsonable({'metric': metric, 'evaluated': len(runs),
+                             'runs': runs[:top] if top is not None else runs})
+
+    def scan(self, request: Dict) -> Dict:
+        """
+        对常驻数据做全市场突破扫描
+
+        请求: symbols（默认全部常驻标的）、params、positions（{标的: [方向, 入场价格]}）、
+              include_all、account_value、end_date（扫描截至的日期）、start_date
+
+        Returns:
+            {'scanned', 'candidates': [候选记录]}
+        """
+        symbols = request.get('symbols') or self.prices.symbols()
+        try:
+            strategy = TurtleTradingStrategy(**(request.get('params') or {}))
+        except TypeError as e:
+            raise ValueError(f"策略参数错误: {e}") from e
+        scanner = UniverseScanner(strategy, account_value=request.get('account_value', 100000.0))
+        data = {symbol: self.prices.get(symbol, request.get('start_date'), request.get('end_date'))[1]
+                for symbol in symbols}
+        positions = {symbol: tuple(position) for symbol, position in (request.get('positions') or {}).items()}
+        table = scanner.scan(data, positions=positions, include_all=bool(request.get('include_all', False)))
+        return _to_jsonable({'scanned': len(data), 'candidates': _frame_records(table)})
+
+    def load(self, request: Dict) -> Dict:
+        """
+        预先加载数据到缓存
+
+        Returns:
+            {'rows': {标的: K线数量}}
+        """
+        rows = {}
+        for symbol in self._symbols(request):
+            _, data = self.prices.get(symbol, request.get('start_date'), request.get('end_date'))
+            rows[symbol] = len(data)
+        return {'rows': rows}
+
+    def stats(self) -> Dict:
+        """
+        服务状态：运行时间、线程池、各接口耗时统计和缓存命中率
+        """
+        return _to_jsonable({
+            'uptime_s': time.time() - self._started,
+            'workers': self.max_workers,
+            'pending': self.pending,
+            'requests': self.latency.summary(),
+            'price_cache': self.prices.stats(),
+            'indicator_cache': self.indicators.stats(),
+        })
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = 'TurtleBacktestServer/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Dict, timing: Dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if timing:
+            # 浏览器开发者工具和常见 HTTP 客户端可以直接显示 Server-Timing
+            self.send_header('Server-Timing', ', '.join(f"{name};dur={value:.3f}" for name, value in timing.items()))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, self.server.service.stats())
+        else:
+            self._send_json(404, {'error': f"未知的路径 {self.path}"})
+
+    def do_POST(self):
+        received = time.perf_counter()
+        service = self.server.service
+        endpoint = self.path.strip('/')
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if endpoint not in service.handlers:
+                raise LookupError(f"未知的路径 {self.path}")
+            if not isinstance(request, dict):
+                raise ValueError("请求体必须是 JSON 对象")
+            response = service.execute(endpoint, request)
+        except ServiceBusy as e:
+            self._send_json(503, {'error': str(e)})
+            return
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except LookupError as e:
+            self._send_json(404, {'error': e.args[0] if e.args else str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+            return
+
+        latency = response['latency_ms']
+        latency['total'] = (time.perf_counter() - received) * 1000
+        self._send_json(200, response, timing=latency)
+
+
+class BacktestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service: BacktestService, address: Tuple[str, int] = ('127.0.0.1', 0), verbose: bool = False):
+        """
+        回测服务的 HTTP 层（每个连接一个线程，计算在 service 的有界线程池中执行）
+
+        Args:
+            service: 回测服务
+            address: 监听地址，端口为 0 时自动分配
+            verbose: 是否输出访问日志
+        """
+        super().__init__(address, _RequestHandler)
+        self.service = service
+        self.verbose = verbose
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'BacktestServer':
+        """
+        在后台线程中开始服务
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        停止服务并关闭线程池
+        """
+        self.shutdown()
+        self.server_close()
+        self.service.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="海龟交易策略常驻回测服务")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    parser.add_argument('--port', type=int, default=8765, help="监听端口")
+    parser.add_argument('--workers', type=int, default=4, help="同时执行的请求数")
+    parser.add_argument('--max-pending', type=int, default=64, help="排队请求数上限")
+    parser.add_argument('--preload', default='', help="启动时加载的标的，逗号分隔")
+    parser.add_argument('--start-date', default=None, help="预加载数据的开始日期")
+    parser.add_argument('--end-date', default=None, help="预加载数据的结束日期")
+    parser.add_argument('--synthetic', type=int, default=0, help="放入内存的合成标的数量（离线演示）")
+    parser.add_argument('--bars', type=int, default=2500, help="合成标的的K线数量")
+    parser.add_argument('--verbose', action='store_true', help="输出访问日志")
+    args = parser.parse_args(argv)
+
+    data = {}
+    if args.synthetic:
+        from synthetic_data import generate_universe
+        data = generate_universe(args.synthetic, args.bars, seed=0)
+    service = BacktestService(data=data, max_workers=args.workers, max_pending=args.max_pending)
+    symbols = [symbol for symbol in args.preload.split(',') if symbol]
+    if symbols:
+        print(service.execute('load', {'symbols': symbols, 'start_date': args.start_date,
+                                       'end_date': args.end_date})['rows'])
+
+    server = BacktestServer(service, (args.host, args.port), verbose=args.verbose)
+    print(f"回测服务已启动: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+交易成本模型：手续费、滑点和成交量约束
+
+所有模型都对整组交易数组一次性计算，便于对不同成本假设做参数扫描。
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+from typing import List, Tuple
+
+
+class CommissionModel(ABC):
+    """
+    手续费模型基类
+    """
+
+    @abstractmethod
+    def compute(self, notional: np.ndarray, quantity: np.ndarray) -> np.ndarray:
+        """
+        计算每笔成交的手续费
+
+        Args:
+            notional: 成交金额（价格 × 数量）
+            quantity: 成交数量（股数/合约数 × 合约乘数）
+
+        Returns:
+            手续费数组
+        """
+
+
+class PercentageCommission(CommissionModel):
+    def __init__(self, rate: float = 0.001, min_fee: float = 0.0):
+        """
+        按成交金额比例收取手续费
+
+        Args:
+            rate: 手续费率
+            min_fee: 每笔最低手续费
+        """
+        self.rate = rate
+        self.min_fee = min_fee
+
+    def compute(self, notional: np.ndarray, quantity: np.ndarray) -> np.ndarray:
+        fee = np.abs(notional) * self.rate
+        return np.maximum(fee, self.min_fee) if self.min_fee else fee
+
+
+class PerShareCommission(CommissionModel):
+    def __init__(self, per_share: float = 0.005, min_fee: float = 1.0, max_rate: float = None):
+        """
+        按成交数量收取手续费
+
+        Args:
+            per_share: 每股（每单位）手续费
+            min_fee: 每笔最低手续费
+            max_rate: 手续费占成交金额的上限比例，None 表示不设上限
+        """
+        self.per_share = per_share
+        self.min_fee = min_fee
+        self.max_rate = max_rate
+
+    def compute(self, notional: np.ndarray, quantity: np.ndarray) -> np.ndarray:
+        fee = np.maximum(np.abs(quantity) * self.per_share, self.min_fee)
+        if self.max_rate is not None:
+            fee = np.minimum(fee, np.abs(notional) * self.max_rate)
+        return fee
+
+
+class TieredCommission(CommissionModel):
+    def __init__(self, tiers: List[Tuple[float, float]], min_fee: float = 0.0):
+        """
+        按成交金额分档收取手续费
+
+        Args:
+            tiers: [(成交金额上限, 费率)] 列表，按上限升序排列；超过最后一档上限时使用最后一档费率
+            min_fee: 每笔最低手续费
+        """
+        if not tiers:
+            raise ValueError("tiers 不能为空")
+        thresholds = np.array([threshold for threshold, _ in tiers], dtype=np.float64)
+        if np.any(np.diff(thresholds) <= 0):
+            raise ValueError("tiers 的成交金额上限必须严格递增")
+        self.thresholds = thresholds
+        self.rates = np.array([rate for _, rate in tiers], dtype=np.float64)
+        self.min_fee = min_fee
+
+    def compute(self, notional: np.ndarray, quantity: np.ndarray) -> np.ndarray:
+        notional = np.abs(notional)
+        tier = np.minimum(np.searchsorted(self.thresholds, notional, side='left'), len(self.rates) - 1)
+        fee = notional * self.rates[tier]
+        return np.maximum(fee, self.min_fee) if self.min_fee else fee
+
+
+class SlippageModel(ABC):
+    """
+    滑点模型基类
+    """
+
+    @abstractmethod
+    def apply(self,
+              prices: np.ndarray,
+              side: np.ndarray,
+              quantity: np.ndarray,
+              atr: np.ndarray,
+              volume: np.ndarray) -> np.ndarray:
+        """
+        计算计入滑点后的成交价格
+
+        Args:
+            prices: 成交模型给出的成交价格
+            side: 买卖方向（1 为买入，-1 为卖出）
+            quantity: 成交数量（股数/合约数 × 合约乘数）
+            atr: 成交K线的ATR
+            volume: 成交K线的成交量（数据不含 Volume 列时为 None）
+
+        Returns:
+            计入滑点后的成交价格
+        """
+
+
+class ProportionalSlippage(SlippageModel):
+    def __init__(self, rate: float = 0.001):
+        """
+        按价格比例计算的固定滑点（原回测引擎的滑点方式）
+
+        Args:
+            rate: 滑点比例
+        """
+        self.rate = rate
+
+    def apply(self, prices, side, quantity, atr, volume):
+        return prices * (1 + side * self.rate)
+
+
+class ATRSlippage(SlippageModel):
+    def __init__(self, atr_fraction: float = 0.1):
+        """
+        按ATR比例计算的滑点，波动越大滑点越大
+
+        Args:
+            atr_fraction: 滑点占ATR的比例
+        """
+        self.atr_fraction = atr_fraction
+
+    def apply(self, prices, side, quantity, atr, volume):
+        atr = np.nan_to_num(atr, nan=0.0)
+        return prices + side * self.atr_fraction * atr
+
+
+class VolumeParticipationSlippage(SlippageModel):
+    def __init__(self,
+                 impact: float = 0.1,
+                 exponent: float = 0.5,
+                 base_rate: float = 0.0,
+                 max_rate: float = 0.05):
+        """
+        按成交量参与率计算的冲击成本：滑点比例 = base_rate + impact × (成交数量 / 成交量) ^ exponent
+
+        Args:
+            impact: 冲击系数
+            exponent: 参与率指数（0.5 即平方根冲击模型）
+            base_rate: 固定滑点比例
+            max_rate: 滑点比例上限（成交量为0时也使用该上限）
+        """
+        self.impact = impact
+        self.exponent = exponent
+        self.base_rate = base_rate
+        self.max_rate = max_rate
+
+    def apply(self, prices, side, quantity, atr, volume):
+        if volume is None:
+            raise ValueError("VolumeParticipationSlippage 需要数据包含 Volume 列")
+        with np.errstate(divide='ignore', invalid='ignore'):
+            participation = np.abs(quantity) / volume
+        rate = self.base_rate + self.impact * np.power(participation, self.exponent)
+        rate = np.where(np.isfinite(rate), np.minimum(rate, self.max_rate), self.max_rate)
+        return prices * (1 + side * rate)
+
+
+class CostModel:
+    def __init__(self,
+                 commission: CommissionModel = None,
+                 slippage: SlippageModel = None,
+                 max_volume_participation: float = None,
+                 adv_window: int = 20):
+        """
+        交易成本模型：组合手续费模型、滑点模型和成交量约束
+
+        Args:
+            commission: 手续费模型，默认按 0.1% 费率收取
+            slippage: 滑点模型，默认 0.1% 比例滑点
+            max_volume_participation: 单笔开仓数量占平均日成交量的上限比例，None 表示不限制
+            adv_window: 计算平均日成交量的窗口（只使用开仓K线之前的数据）
+        """
+        self.commission = commission if commission is not None else PercentageCommission(0.001)
+        self.slippage = slippage if slippage is not None else ProportionalSlippage(0.001)
+        self.max_volume_participation = max_volume_participation
+        self.adv_window = adv_window
+
+    def average_daily_volume(self, volume: np.ndarray) -> np.ndarray:
+        """
+        计算每根K线之前 adv_window 根K线的平均成交量（第一根K线为 NaN）
+        """
+        volume = np.nan_to_num(np.asarray(volume, dtype=np.float64), nan=0.0)
+        cumulative = np.concatenate(([0.0], np.cumsum(volume)))
+        end = np.arange(len(volume))
+        start = np.maximum(end - self.adv_window, 0)
+        counts = end - start
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(counts > 0, (cumulative[end] - cumulative[start]) / counts, np.nan)
+
+    def cap_quantity(self, quantity: np.ndarray, adv: np.ndarray) -> np.ndarray:
+        """
+        按平均日成交量限制开仓数量；没有成交量历史时不限制
+
+        Args:
+            quantity: 开仓数量（股数/合约数 × 合约乘数）
+            adv: 开仓K线的平均日成交量
+
+        Returns:
+            限制后的开仓数量
+        """
+        if self.max_volume_participation is None:
+            return quantity
+        limit = np.where(np.isnan(adv), np.inf, adv * self.max_volume_participation)
+        return np.minimum(quantity, limit)
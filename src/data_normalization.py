@@ -0,0 +1,337 @@
+"""
+行情数据规范化：清洗、去重、复权并对齐到共同交易日历
+
+所有标的先排成 (列 × 标的 × K线) 的三维数组，缺失K线填充、价格区间修正等步骤
+在整个数组上一次完成，不逐标的循环。处理内容：
+- 时区：带时区的索引（如 yfinance 返回的交易所时间）去掉时区，保留当地时间；
+- 重复时间戳：按时间排序，重复的K线保留最后一条；
+- 复权：有 'Adj Close' 列时按 Adj Close / Close 缩放开高低收，并去掉该列；
+- 缺失K线：收盘价缺失（或价格非正）的K线视为停牌，开高低收都取前一根K线的收盘价，成交量为 0；
+- 价格区间：最高价不低于开盘/收盘/最低价，最低价不高于开盘/收盘/最高价；
+- 日历对齐：所有标的对齐到共同日历（并集、交集或指定日历）。
+
+规范化结果可以缓存为 pickle 文件，与原始数据放在同一目录，原始数据和参数不变时直接读取。
+load_normalized 以原始数据缓存文件的名称、修改时间和大小作为缓存键，命中时不读取原始数据。
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+from typing import Callable, Dict, List, Tuple, Union
+
+import pandas as pd
+import numpy as np
+
+# 添加当前目录到Python路径（下载函数在首次使用时才导入）
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+CALENDARS = ('union', 'intersection')
+
+
+def _prepare_frame(frame: pd.DataFrame, adjust: bool) -> Tuple[pd.DatetimeIndex, List[str], np.ndarray]:
+    """
+    单个标的的预处理：时间索引去时区、排序、去重、复权，只保留数值列
+
+    Returns:
+        (时间索引, 列名列表, float64 数值矩阵)
+    """
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    numeric = frame.select_dtypes(include='number')
+    columns = list(numeric.columns)
+    # 后面会原地复权；全部为 float64 的单块数据框返回的是只读视图（或调用方数据本身），必须复制
+    values = numeric.to_numpy(dtype=np.float64, copy=True)
+
+    keys = index.asi8
+    if len(keys) > 1 and not (keys[1:] > keys[:-1]).all():
+        # 稳定排序后，重复时间戳保留最后一条
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        keep = np.append(keys[1:] != keys[:-1], True)
+        index = index[order[keep]]
+        values = values[order[keep]]
+
+    if adjust and 'Adj Close' in columns and 'Close' in columns:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factor = values[:, columns.index('Adj Close')] / values[:, columns.index('Close')]
+        price_rows = [columns.index(column) for column in PRICE_COLUMNS if column in columns]
+        values[:, price_rows] *= factor[:, None]
+        keep_columns = [k for k, column in enumerate(columns) if column != 'Adj Close']
+        columns = [columns[k] for k in keep_columns]
+        values = values[:, keep_columns]
+    return index, columns, values
+
+
+def _common_calendar(keys: List[np.ndarray], units: set, calendar) -> pd.DatetimeIndex:
+    """
+    由各标的的时间（纳秒整数）得到目标日历
+    """
+    if isinstance(calendar, pd.DatetimeIndex):
+        calendar = calendar.tz_localize(None) if calendar.tz is not None else calendar
+        return calendar.unique().sort_values()
+    if calendar not in CALENDARS:
+        raise ValueError(f"calendar 必须是 {CALENDARS} 之一或 DatetimeIndex，实际为 {calendar!r}")
+    if calendar == 'union':
+        common = np.unique(np.concatenate(keys))
+    else:
+        common = keys[0]
+        for other in keys[1:]:
+            common = np.intersect1d(common, other, assume_unique=True)
+    result = pd.DatetimeIndex(common.view('datetime64[ns]'))
+    return result.as_unit(units.pop()) if len(units) == 1 else result
+
+
+def _forward_fill_positions(valid: np.ndarray) -> np.ndarray:
+    """
+    每个位置之前（含）最近一个有效值的位置，没有时为 -1（沿最后一个轴）
+    """
+    positions = np.where(valid, np.arange(valid.shape[-1]), -1)
+    np.maximum.accumulate(positions, axis=-1, out=positions)
+    return positions
+
+
+def normalize_universe(data: Dict[str, pd.DataFrame],
+                       calendar: Union[str, pd.DatetimeIndex] = 'union',
+                       adjust: bool = True,
+                       max_fill: int = None,
+                       trim_leading: bool = False) -> Dict[str, pd.DataFrame]:
+    """
+    规范化多个标的的价格数据并对齐到共同日历
+
+    Args:
+        data: {标的代码: 价格数据}
+        calendar: 'union'（所有标的日期的并集）、'intersection'（交集）或指定的 DatetimeIndex
+        adjust: 是否按 'Adj Close' 列复权
+        max_fill: 最多连续填充的缺失K线数量，超过的部分保持为 NaN；None 表示不限
+        trim_leading: 是否去掉每个标的第一根有效K线之前的部分（否则这些K线全为 NaN）
+
+    Returns:
+        {标的代码: 规范化后的价格数据}，索引不带时区；只保留数值列，
+        开高低收在前、其余列（成交量等）在后，均为 float64
+    """
+    frames = {symbol: _prepare_frame(frame, adjust) for symbol, frame in data.items()
+              if frame is not None and not frame.empty}
+    if not frames:
+        return {}
+    for symbol, (_, frame_columns, _) in frames.items():
+        missing = [column for column in PRICE_COLUMNS if column not in frame_columns]
+        if missing:
+            raise ValueError(f"{symbol} 缺少价格列 {missing}")
+
+    symbols = list(frames)
+    indexes = [index for index, _, _ in frames.values()]
+    index_keys = [index.as_unit('ns').asi8 for index in indexes]
+    union = isinstance(calendar, str) and calendar == 'union'
+    calendar = _common_calendar(index_keys, {index.unit for index in indexes}, calendar)
+    target_keys = calendar.as_unit('ns').asi8
+    # 在所有日期（含目标日历）上清洗和填充，最后再取目标日历：
+    # 交集或指定日历之前的K线仍可用于填充目标日历上的第一根缺失K线
+    calendar_keys = target_keys if union else np.union1d(np.concatenate(index_keys), target_keys)
+    columns = list(PRICE_COLUMNS)
+    for _, frame_columns, _ in frames.values():
+        columns.extend(column for column in frame_columns if column not in columns)
+    n_bars = len(calendar_keys)
+
+    # (列 × 标的 × K线) 面板，没有数据的位置为 NaN
+    panel = np.full((len(columns), len(symbols), n_bars), np.nan)
+    for k, (keys, (_, frame_columns, values)) in enumerate(zip(index_keys, frames.values())):
+        rows = [columns.index(column) for column in frame_columns]
+        panel[np.ix_(rows, [k], np.searchsorted(calendar_keys, keys))] = values.T[:, None, :]
+
+    prices = panel[:len(PRICE_COLUMNS)]
+    with np.errstate(invalid='ignore'):
+        prices[~np.isfinite(prices) | (prices <= 0)] = np.nan
+    open_, high, low, close = prices
+
+    # 收盘价缺失的K线视为停牌：用最近一根有效K线的收盘价填充
+    has_close = ~np.isnan(close)
+    last_valid = _forward_fill_positions(has_close)
+    fillable = last_valid >= 0
+    if max_fill is not None:
+        fillable &= np.arange(n_bars) - last_valid <= max_fill
+    filled_close = np.where(fillable, np.take_along_axis(close, np.maximum(last_valid, 0), axis=-1), np.nan)
+    halted = fillable & ~has_close
+
+    # 有收盘价但开盘价缺失时，以前一根K线的收盘价（没有时为当根收盘价）作为开盘价
+    prev_close = np.empty_like(filled_close)
+    prev_close[:, 0] = np.nan
+    prev_close[:, 1:] = filled_close[:, :-1]
+    open_filled = np.where(np.isnan(open_), np.where(np.isnan(prev_close), close, prev_close), open_)
+
+    new_open = np.where(halted, filled_close, open_filled)
+    with np.errstate(invalid='ignore'):
+        new_high = np.where(halted, filled_close, np.fmax(np.fmax(high, low), np.fmax(new_open, close)))
+        new_low = np.where(halted, filled_close, np.fmin(np.fmin(low, high), np.fmin(new_open, close)))
+    prices[0], prices[1], prices[2], prices[3] = new_open, new_high, new_low, filled_close
+    prices[:, ~fillable] = np.nan
+
+    # 成交量等其余列：有价格的K线中缺失值为 0，没有价格的K线为 NaN
+    others = panel[len(PRICE_COLUMNS):]
+    others[:, halted] = 0.0
+    np.nan_to_num(others, copy=False, nan=0.0)
+    others[:, ~fillable] = np.nan
+
+    if not union:
+        target = np.searchsorted(calendar_keys, target_keys)
+        panel = panel[:, :, target]
+        fillable = fillable[:, target]
+        n_bars = len(target)
+
+    normalized = {}
+    for k, symbol in enumerate(symbols):
+        start = 0
+        if trim_leading:
+            valid = np.flatnonzero(fillable[k])
+            start = int(valid[0]) if len(valid) else n_bars
+        normalized[symbol] = pd.DataFrame(panel[:, k, start:].T, index=calendar[start:], columns=columns)
+    return normalized
+
+
+def normalize_data(data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """
+    规范化单个标的的价格数据（参数同 normalize_universe）
+    """
+    return normalize_universe({None: data}, **kwargs).get(None, pd.DataFrame())
+
+
+def _options_repr(options: Dict) -> bytes:
+    # DatetimeIndex 等参数按内容参与摘要
+    options = {name: (value.asi8.tobytes() if isinstance(value, pd.DatetimeIndex) else value)
+               for name, value in options.items()}
+    return repr(sorted(options.items(), key=lambda item: item[0])).encode('utf-8')
+
+
+def data_token(data: Dict[str, pd.DataFrame], **options) -> str:
+    """
+    原始数据和规范化参数的内容摘要，作为规范化缓存的文件名
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(_options_repr(options))
+    for symbol in sorted(data, key=str):
+        frame = data[symbol]
+        digest.update(repr((symbol, list(frame.columns), str(frame.index.dtype))).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def files_token(paths: Dict[str, str], **options) -> str:
+    """
+    原始数据缓存文件（名称、修改时间、大小）和规范化参数的摘要，只读取文件元信息
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(_options_repr(options))
+    for symbol in sorted(paths, key=str):
+        stat = os.stat(paths[symbol])
+        digest.update(repr((symbol, os.path.basename(paths[symbol]), stat.st_mtime_ns, stat.st_size)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _write_pickle(obj, path: str):
+    # 先写临时文件再替换，中断时不会留下不完整的缓存
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def raw_cache_path(cache_dir: str, symbol: str, start_date: str, end_date: str) -> str:
+    """
+    原始数据缓存文件路径
+    """
+    return os.path.join(cache_dir, f"{symbol}_{start_date}_{end_date}.raw.pkl")
+
+
+def _read_pickle(path: str):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def cache_raw_data(symbols: List[str], start_date: str, end_date: str, cache_dir: str,
+                   fetch: Callable = None) -> Dict[str, str]:
+    """
+    下载缓存中没有的标的并写入缓存，不读取已缓存的数据
+
+    Args:
+        symbols: 标的代码列表
+        start_date: 开始日期
+        end_date: 结束日期
+        cache_dir: 缓存目录
+        fetch: 下载函数 fetch(symbol, start_date, end_date)，默认使用 get_stock_data
+
+    Returns:
+        {标的代码: 原始数据缓存文件路径}（下载失败的标的不包含在内）
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = {}
+    for symbol in symbols:
+        path = raw_cache_path(cache_dir, symbol, start_date, end_date)
+        if not os.path.exists(path):
+            if fetch is None:
+                from data_utils import get_stock_data as fetch
+            frame = fetch(symbol, start_date, end_date)
+            if frame is None or frame.empty:
+                continue
+            _write_pickle(frame, path)
+        paths[symbol] = path
+    return paths
+
+
+def load_raw_data(symbols: List[str], start_date: str, end_date: str, cache_dir: str,
+                  fetch: Callable = None) -> Dict[str, pd.DataFrame]:
+    """
+    读取原始数据，缓存中没有的标的调用 fetch 下载后写入缓存（参数同 cache_raw_data）
+
+    Returns:
+        {标的代码: 原始价格数据}（下载失败的标的不包含在内）
+    """
+    paths = cache_raw_data(symbols, start_date, end_date, cache_dir, fetch)
+    return {symbol: _read_pickle(path) for symbol, path in paths.items()}
+
+
+def load_normalized(symbols: List[str], start_date: str, end_date: str, cache_dir: str,
+                    fetch: Callable = None, **kwargs) -> Dict[str, pd.DataFrame]:
+    """
+    读取规范化后的数据：缓存以原始数据缓存文件的名称、修改时间、大小和参数为键，
+    命中时直接读取规范化结果，不读取原始数据；原始数据文件被替换后自动重新计算
+
+    Args:
+        symbols, start_date, end_date, cache_dir, fetch: 同 cache_raw_data
+        **kwargs: normalize_universe 的参数
+
+    Returns:
+        {标的代码: 规范化后的价格数据}
+    """
+    paths = cache_raw_data(symbols, start_date, end_date, cache_dir, fetch)
+    path = os.path.join(cache_dir, f"normalized_{files_token(paths, **kwargs)}.pkl")
+    if os.path.exists(path):
+        return _read_pickle(path)
+    normalized = normalize_universe({symbol: _read_pickle(raw_path) for symbol, raw_path in paths.items()},
+                                    **kwargs)
+    _write_pickle(normalized, path)
+    return normalized
+
+
+def normalize_cached(data: Dict[str, pd.DataFrame], cache_dir: str, **kwargs) -> Dict[str, pd.DataFrame]:
+    """
+    规范化内存中的数据并缓存：原始数据和参数都相同时直接读取缓存文件
+
+    缓存键由数据内容计算，命中时仍需对原始数据求摘要；数据来自原始数据缓存时使用 load_normalized。
+
+    Args:
+        data: {标的代码: 原始价格数据}
+        cache_dir: 缓存目录（与原始数据缓存相同）
+        **kwargs: normalize_universe 的参数（calendar 为 DatetimeIndex 时也参与摘要）
+
+    Returns:
+        {标的代码: 规范化后的价格数据}
+    """
+    path = os.path.join(cache_dir, f"normalized_{data_token(data, **kwargs)}.pkl")
+    if os.path.exists(path):
+        return _read_pickle(path)
+    normalized = normalize_universe(data, **kwargs)
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_pickle(normalized, path)
+    return normalized
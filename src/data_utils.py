@@ -2,8 +2,29 @@
 数据工具函数
 """
 
+import importlib
+
 import pandas as pd
-import yfinance as yf
+
+# 数据供应商模块在首次获取数据时才导入（yfinance 及其网络依赖导入较慢）
+_vendor_modules = {}
+
+
+def _load_vendor(module_name: str):
+    """
+    延迟导入数据供应商模块
+    
+    Args:
+        module_name: 模块名称，如 'yfinance'
+        
+    Returns:
+        已导入的模块
+    """
+    module = _vendor_modules.get(module_name)
+    if module is None:
+        module = _vendor_modules[module_name] = importlib.import_module(module_name)
+    return module
+
 
 def get_stock_data(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
     """
@@ -18,6 +39,7 @@ def get_stock_data(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         股票数据
     """
     try:
+        yf = _load_vendor('yfinance')
         stock = yf.Ticker(symbol)
         data = stock.history(start=start_date, end=end_date)
         if data.empty:
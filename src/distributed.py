@@ -0,0 +1,462 @@
+"""
+多机分布式参数扫描：协调器 / 工作进程模式
+
+协调器通过 TCP（multiprocessing.connection，带 authkey 认证）把 标的 × 参数 工作单元分发给工作进程。
+价格数据以紧凑的 numpy 数组形式传输，工作进程在本地的 LRU 缓存中保留最近使用的数据，
+缓存中已有的数据不再重复传输。结果按工作单元的输入顺序合并，与工作进程数量和完成顺序无关。
+工作进程断开时正在处理的单元可能就是导致其崩溃的单元，它不再分发给其他工作进程，
+而是在协调器本机的单独进程中隔离重试一次；所有工作进程都断开后，剩余单元记为失败。
+
+连接内容用 pickle 传输，持有密钥即可在对端执行任意代码，因此没有默认密钥：协调器未指定密钥时
+生成随机密钥（见 SweepCoordinator.authkey），工作进程必须通过 --authkey 或环境变量 TURTLE_AUTHKEY 提供。
+
+启动工作进程（可在多台机器上运行）:
+    TURTLE_AUTHKEY=<密钥> python src/distributed.py worker --host 10.0.0.1 --port 6000
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import queue
+import secrets
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.connection import Client, Listener
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import pandas as pd
+import numpy as np
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from job_scheduler import (STATUS_FAILED, BatchReport, BatchScheduler, WorkUnit, _execute_in_new_process,
+                           backtest_unit, execute_unit)
+
+# 工作进程命令行读取密钥的环境变量
+AUTHKEY_ENV = 'TURTLE_AUTHKEY'
+
+# 工作进程默认缓存的价格数据份数（按标的计），超出时淘汰最久未使用的数据
+DATA_CACHE_SIZE = 256
+
+
+def pack_price_data(data: pd.DataFrame) -> Dict:
+    """
+    把价格数据转换为紧凑的数组表示（时间索引为 int64 纳秒，数值列为 float64 矩阵）
+    """
+    index = pd.DatetimeIndex(data.index)
+    return {
+        'index': index.as_unit('ns').asi8,
+        'tz': str(index.tz) if index.tz is not None else None,
+        'unit': index.unit,
+        'columns': list(data.columns),
+        'values': np.ascontiguousarray(data.to_numpy(dtype=np.float64)),
+    }
+
+
+def unpack_price_data(packed: Dict) -> pd.DataFrame:
+    """
+    pack_price_data 的逆操作
+    """
+    index = pd.DatetimeIndex(packed['index'].view('datetime64[ns]'))
+    if packed.get('tz'):
+        index = index.tz_localize('UTC').tz_convert(packed['tz'])
+    if packed.get('unit'):
+        index = index.as_unit(packed['unit'])
+    return pd.DataFrame(packed['values'], index=index, columns=packed['columns'])
+
+
+def _data_token(packed: Dict) -> str:
+    """
+    价格数据的内容摘要，工作进程以此为键缓存数据
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(packed['index'].tobytes())
+    digest.update(packed['values'].tobytes())
+    digest.update(repr((packed['columns'], packed['tz'])).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SweepCoordinator:
+    def __init__(self,
+                 address: Tuple[str, int] = ('127.0.0.1', 0),
+                 authkey: bytes = None,
+                 journal_path: str = None,
+                 max_retries: int = 2,
+                 log: Callable[[str], None] = None):
+        """
+        分布式扫描协调器
+
+        Args:
+            address: 监听地址，端口为 0 时自动分配（实际地址见 self.address）
+            authkey: 连接认证密钥，工作进程必须使用相同的密钥；None 时生成随机密钥（见 self.authkey）
+            journal_path: 任务日志路径，提供时支持断点续跑（见 job_scheduler）
+            max_retries: 单元失败或工作进程断开后的最大重试次数
+            log: 进度输出函数，默认不输出
+        """
+        self._scheduler = BatchScheduler(journal_path, max_retries=max_retries, log=log)
+        if authkey is None:
+            # 十六进制文本形式，可以直接作为工作进程的 --authkey 参数；不写入进度输出，避免密钥泄露到日志
+            authkey = secrets.token_hex(32).encode()
+        self.authkey = authkey
+        self._listener = Listener(address, authkey=authkey)
+        self.address = self._listener.address
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._report = None
+        self._remaining = 0
+        self._done = threading.Event()
+        self._func = None
+        self._packed = {}
+        self._connections = []
+        self._workers_seen = set()
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+
+    @property
+    def workers(self) -> int:
+        """
+        已连接过的工作进程数量
+        """
+        with self._lock:
+            return len(self._workers_seen)
+
+    def _accept_loop(self):
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if self._closed.is_set():
+                    return
+                continue
+            except Exception:
+                # 认证失败等错误只影响该连接
+                continue
+            with self._lock:
+                self._connections.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _next_unit(self):
+        while not self._closed.is_set():
+            try:
+                return self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _serve(self, conn):
+        """
+        为一个工作进程分发任务，直到协调器关闭或连接断开
+        """
+        # 与工作进程的数据缓存同步维护的 LRU 记录：其中的数据不再重复传输
+        shipped = OrderedDict()
+        unit = None
+        try:
+            message = conn.recv()
+            worker_name = message[1]
+            cache_size = message[2] if len(message) > 2 else DATA_CACHE_SIZE
+            with self._lock:
+                self._workers_seen.add(worker_name)
+            while True:
+                unit = self._next_unit()
+                if unit is None:
+                    conn.send(('stop',))
+                    return
+
+                try:
+                    payload = dict(unit.payload or {})
+                    data = payload.pop('data', None)
+                    token = packed = None
+                    if data is not None:
+                        token, packed = self._pack(data)
+                        # 工作进程缓存中仍有这份数据时不再传输
+                        if token in shipped:
+                            packed = None
+                    conn.send(('task', unit.key, self._func, payload, token, packed))
+                except (EOFError, OSError):
+                    raise
+                except Exception as e:
+                    # func 或 payload 无法打包或 pickle（发送前就失败，连接仍可使用）：记为该单元失败
+                    self._on_outcome(unit, {'key': unit.key, 'status': STATUS_FAILED,
+                                            'error': f"{type(e).__name__}: {e}", 'elapsed_seconds': None})
+                    unit = None
+                    continue
+                if token is not None:
+                    _touch_cache(shipped, token, True, cache_size)
+
+                _, key, outcome = conn.recv()
+                self._on_outcome(unit, outcome)
+                unit = None
+        except (EOFError, OSError):
+            # 工作进程断开：正在处理的单元计为一次失败，并且可能正是它导致了工作进程崩溃
+            if unit is not None:
+                self._on_lost_unit(unit)
+        except Exception as e:
+            # 其他错误（如无法解析工作进程的回复）：关闭该连接，正在处理的单元计为一次失败，
+            # 不能让单元随线程一起丢失，否则 run() 会一直等待
+            if unit is not None:
+                self._on_outcome(unit, {'key': unit.key, 'status': STATUS_FAILED,
+                                        'error': f"{type(e).__name__}: {e}", 'elapsed_seconds': None})
+        finally:
+            conn.close()
+            with self._lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            self._fail_if_no_workers()
+
+    def _pack(self, data: pd.DataFrame) -> Tuple[str, Dict]:
+        """
+        打包价格数据并计算摘要，同一批任务中同一份数据对象只处理一次
+        """
+        with self._lock:
+            cached = self._packed.get(id(data))
+        if cached is None or cached[0] is not data:
+            packed = pack_price_data(data)
+            cached = (data, _data_token(packed), packed)
+            with self._lock:
+                self._packed[id(data)] = cached
+        return cached[1], cached[2]
+
+    def _finish_unit(self):
+        # 调用方需持有 self._lock
+        self._remaining -= 1
+        if self._remaining == 0:
+            self._done.set()
+
+    def _on_outcome(self, unit: WorkUnit, outcome: Dict):
+        with self._lock:
+            # 没有可用的工作进程时不再重试，否则单元会留在队列中无人处理
+            retry = self._scheduler.record_outcome(unit, outcome, self._report,
+                                                   allow_retry=bool(self._connections))
+            if retry:
+                self._queue.put(unit)
+                return
+            self._finish_unit()
+
+    def _on_lost_unit(self, unit: WorkUnit):
+        """
+        工作进程断开时正在处理的单元：不再交给其他工作进程（若是它导致崩溃，会把工作进程逐个拖垮），
+        而是在本机的单独进程中隔离重试一次
+        """
+        outcome = {'key': unit.key, 'status': STATUS_FAILED,
+                   'error': 'ConnectionError: 工作进程断开', 'elapsed_seconds': None}
+        with self._lock:
+            if not self._scheduler.record_outcome(unit, outcome, self._report):
+                self._finish_unit()
+                return
+        threading.Thread(target=self._run_isolated, args=(unit,), daemon=True).start()
+
+    def _run_isolated(self, unit: WorkUnit):
+        outcome = _execute_in_new_process(self._func, unit)
+        with self._lock:
+            self._scheduler.record_outcome(unit, outcome, self._report, allow_retry=False)
+            self._finish_unit()
+
+    def _fail_if_no_workers(self):
+        """
+        工作进程全部断开后，把队列中剩余的单元记为失败，使 run() 返回而不是一直等待
+        """
+        with self._lock:
+            if (self._connections or not self._workers_seen or self._closed.is_set()
+                    or self._report is None or self._done.is_set()):
+                return
+            while True:
+                try:
+                    unit = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+                self._scheduler.record_outcome(unit, {'key': unit.key, 'status': STATUS_FAILED,
+                                                      'error': 'ConnectionError: 没有可用的工作进程',
+                                                      'elapsed_seconds': None},
+                                               self._report, allow_retry=False)
+                self._finish_unit()
+
+    def run(self, units: Iterable[WorkUnit], func: Callable = backtest_unit, timeout: float = None) -> BatchReport:
+        """
+        分发一批工作单元并等待全部完成
+
+        Args:
+            units: 工作单元列表（可用 job_scheduler.make_backtest_units 生成）
+            func: 任务函数（模块级函数，工作进程按名称导入）
+            timeout: 最长等待时间（秒），None 表示一直等待（工作进程连接过但已全部断开时，
+                剩余单元记为失败并返回）
+
+        Returns:
+            批次运行结果，results 按输入顺序排列
+        """
+        units = list(units)
+        keys = [unit.key for unit in units]
+        if len(set(keys)) != len(keys):
+            raise ValueError("工作单元的 key 必须唯一")
+
+        with self._lock:
+            if self._report is not None and not self._done.is_set():
+                raise RuntimeError("协调器正在运行另一批任务")
+            report = self._report = BatchReport()
+            pending = self._scheduler.skip_completed(units, report)
+            self._func = func
+            self._packed = {}
+            self._remaining = len(pending)
+            self._done.clear()
+            if not pending:
+                self._done.set()
+            for unit in pending:
+                self._queue.put(unit)
+        self._fail_if_no_workers()
+
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"等待超时，仍有 {self._remaining} 个单元未完成")
+
+        # 确定性合并：按输入顺序排列结果
+        report.results = {key: report.results[key] for key in keys if key in report.results}
+        report.failed = {key: report.failed[key] for key in keys if key in report.failed}
+        return report
+
+    def close(self):
+        """
+        通知工作进程退出并关闭监听端口
+        """
+        self._closed.set()
+        # 建立一个空连接唤醒阻塞在 accept 上的线程
+        try:
+            socket.create_connection(self.address, timeout=1).close()
+        except OSError:
+            pass
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+        self._accept_thread.join(timeout=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def run_worker(address: Tuple[str, int],
+               authkey: bytes,
+               connect_timeout: float = 30.0,
+               name: str = None,
+               cache_size: int = DATA_CACHE_SIZE) -> int:
+    """
+    工作进程主循环：从协调器领取单元、执行并返回结果，直到收到退出指令
+
+    Args:
+        address: 协调器地址
+        authkey: 连接认证密钥
+        connect_timeout: 连接协调器的最长等待时间（秒）
+        name: 工作进程名称，默认为 主机名-进程号
+        cache_size: 本地缓存的价格数据份数，超出时淘汰最久未使用的数据（协调器会重新传输）
+
+    Returns:
+        处理的单元数量
+    """
+    if cache_size < 1:
+        raise ValueError("cache_size 必须大于 0")
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            conn = Client(tuple(address), authkey=authkey)
+            break
+        except (ConnectionRefusedError, FileNotFoundError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+    data_cache = OrderedDict()
+    processed = 0
+    try:
+        conn.send(('ready', name or f"{socket.gethostname()}-{os.getpid()}", cache_size))
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message[0] == 'stop':
+                break
+            _, key, func, payload, token, packed = message
+            if token is not None:
+                data = unpack_price_data(packed) if packed is not None else data_cache[token]
+                _touch_cache(data_cache, token, data, cache_size)
+                payload['data'] = data
+            outcome = execute_unit(func, key, payload)
+            outcome.pop('traceback', None)
+            try:
+                conn.send(('result', key, outcome))
+            except (EOFError, OSError):
+                raise
+            except Exception as e:
+                # 结果无法 pickle：返回失败记录，工作进程继续运行
+                conn.send(('result', key, {'key': key, 'status': STATUS_FAILED,
+                                           'error': f"结果无法 pickle: {type(e).__name__}: {e}",
+                                           'elapsed_seconds': outcome.get('elapsed_seconds')}))
+            processed += 1
+    finally:
+        conn.close()
+    return processed
+
+
+def _touch_cache(cache: OrderedDict, token: str, value, size: int):
+    """
+    LRU 缓存：把 token 放到最近使用的位置，超出容量时淘汰最久未使用的条目
+
+    协调器和工作进程按相同的任务顺序调用，两边的缓存内容保持一致。
+    """
+    cache[token] = value
+    cache.move_to_end(token)
+    while len(cache) > size:
+        cache.popitem(last=False)
+
+
+def spawn_local_workers(address: Tuple[str, int],
+                        n_workers: int,
+                        authkey: bytes,
+                        cache_size: int = DATA_CACHE_SIZE) -> List[multiprocessing.Process]:
+    """
+    在本机启动 n_workers 个工作进程（测试和单机扩展使用）
+    """
+    workers = []
+    for i in range(n_workers):
+        process = multiprocessing.Process(target=run_worker, args=(address, authkey),
+                                          kwargs={'name': f"local-{i}", 'cache_size': cache_size}, daemon=True)
+        process.start()
+        workers.append(process)
+    return workers
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="海龟交易策略分布式扫描工作进程")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    worker = subparsers.add_parser('worker', help="连接协调器并处理工作单元")
+    worker.add_argument('--host', default='127.0.0.1', help="协调器地址")
+    worker.add_argument('--port', type=int, required=True, help="协调器端口")
+    worker.add_argument('--authkey', default=None,
+                        help=f"连接认证密钥（与协调器相同），未指定时读取环境变量 {AUTHKEY_ENV}")
+    worker.add_argument('--processes', type=int, default=1, help="本机启动的工作进程数量")
+    worker.add_argument('--cache-size', type=int, default=DATA_CACHE_SIZE,
+                        help="每个工作进程缓存的价格数据份数（按标的计）")
+    args = parser.parse_args(argv)
+
+    authkey = args.authkey or os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        parser.error(f"必须通过 --authkey 或环境变量 {AUTHKEY_ENV} 提供连接认证密钥")
+    address = (args.host, args.port)
+    authkey = authkey.encode()
+    if args.processes == 1:
+        processed = run_worker(address, authkey, cache_size=args.cache_size)
+        print(f"已处理 {processed} 个工作单元")
+    else:
+        for process in spawn_local_workers(address, args.processes, authkey, args.cache_size):
+            process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+成交价格模型：根据策略信号计算每根K线的成交价格
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from turtle_trading_strategy import SIGNAL_TYPE_ENTRY, SIGNAL_TYPE_EXIT, SIGNAL_TYPE_STOP
+
+# 突破入场/通道出场可选的成交方式
+BREAKOUT_FILLS = ('close', 'channel', 'next_open')
+# 止损可选的成交方式
+STOP_FILLS = ('close', 'stop', 'next_open')
+
+
+class FillModel:
+    def __init__(self,
+                 entry_fill: str = 'close',
+                 exit_fill: str = 'close',
+                 stop_fill: str = 'close'):
+        """
+        初始化成交模型
+
+        成交方式:
+            close: 按信号当根K线的收盘价成交（默认，与原回测行为一致）
+            channel / stop: 按触发价位（唐奇安通道或ATR止损价）成交；
+                如果开盘价已跳空越过该价位，则按开盘价成交
+            next_open: 按下一根K线的开盘价成交（最后一根K线按收盘价成交）
+
+        Args:
+            entry_fill: 突破入场的成交方式
+            exit_fill: 唐奇安通道出场的成交方式
+            stop_fill: ATR止损的成交方式
+        """
+        if entry_fill not in BREAKOUT_FILLS:
+            raise ValueError(f"entry_fill 必须是 {BREAKOUT_FILLS} 之一，实际为 {entry_fill!r}")
+        if exit_fill not in BREAKOUT_FILLS:
+            raise ValueError(f"exit_fill 必须是 {BREAKOUT_FILLS} 之一，实际为 {exit_fill!r}")
+        if stop_fill not in STOP_FILLS:
+            raise ValueError(f"stop_fill 必须是 {STOP_FILLS} 之一，实际为 {stop_fill!r}")
+        self.entry_fill = entry_fill
+        self.exit_fill = exit_fill
+        self.stop_fill = stop_fill
+
+    def fill_prices(self, strategy_results: pd.DataFrame) -> np.ndarray:
+        """
+        计算每根K线的成交价格（未计滑点），无信号的K线为收盘价
+
+        全部使用数组运算，开销与按收盘价成交相当。
+
+        Args:
+            strategy_results: generate_signals 输出的策略结果
+
+        Returns:
+            与 strategy_results 等长的成交价格数组
+        """
+        close = strategy_results['Close'].to_numpy(dtype=np.float64)
+        if self.entry_fill == self.exit_fill == self.stop_fill == 'close':
+            return close.copy()
+        if 'Open' not in strategy_results.columns:
+            raise ValueError("非收盘价成交模型需要数据包含 Open 列")
+
+        open_ = strategy_results['Open'].to_numpy(dtype=np.float64)
+        high = strategy_results['High'].to_numpy(dtype=np.float64)
+        low = strategy_results['Low'].to_numpy(dtype=np.float64)
+        signal = strategy_results['Signal'].to_numpy()
+        signal_type = strategy_results['Signal_Type'].to_numpy()
+        trigger = strategy_results['Trigger_Price'].to_numpy(dtype=np.float64)
+
+        # 触发价成交：买入止损单按 max(开盘价, 触发价) 成交，卖出止损单按 min(开盘价, 触发价) 成交，
+        # 开盘即跳空越过触发价时按开盘价成交；结果限制在当根K线的价格范围内
+        at_trigger = np.where(signal > 0, np.fmax(open_, trigger), np.fmin(open_, trigger))
+        at_trigger = np.clip(at_trigger, low, high)
+        at_trigger = np.where(np.isnan(trigger) | np.isnan(at_trigger), close, at_trigger)
+
+        next_open = np.empty_like(close)
+        next_open[:-1] = open_[1:]
+        next_open[-1:] = close[-1:]
+        next_open = np.where(np.isnan(next_open), close, next_open)
+
+        fills = {'close': close, 'channel': at_trigger, 'stop': at_trigger, 'next_open': next_open}
+        return np.select(
+            [signal_type == SIGNAL_TYPE_ENTRY,
+             signal_type == SIGNAL_TYPE_EXIT,
+             signal_type == SIGNAL_TYPE_STOP],
+            [fills[self.entry_fill], fills[self.exit_fill], fills[self.stop_fill]],
+            default=close,
+        )
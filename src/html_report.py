@@ -0,0 +1,295 @@
+"""
+回测结果的 HTML 报告
+
+生成单个自包含的 HTML 文件（内联 CSS 和 SVG，不依赖任何外部资源），包含：
+组合权益与回撤曲线、所有标的的绩效指标汇总表（附权益缩略图）、
+以及排名靠前标的的权益/回撤曲线和交易明细。所有曲线都用 LTTB 算法降采样到固定点数，
+报告大小只取决于标的数量和点数设置，与K线数量无关。
+"""
+
+import html
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import pandas as pd
+import numpy as np
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from kernels import lttb_indices
+from turtle_backtest import METRIC_LABELS
+
+_STYLE = """
+body { font-family: -apple-system, "Segoe UI", "PingFang SC", "Microsoft YaHei", sans-serif; margin: 24px; color: #222; }
+h1 { font-size: 22px; } h2 { font-size: 18px; margin-top: 32px; } h3 { font-size: 15px; margin-top: 24px; }
+table { border-collapse: collapse; font-size: 12px; margin: 8px 0; }
+th, td { border: 1px solid #ddd; padding: 3px 6px; text-align: right; white-space: nowrap; }
+th { background: #f3f3f3; position: sticky; top: 0; }
+td.text { text-align: left; }
+.pos { color: #0a7d32; } .neg { color: #c0392b; }
+.chart text { font-size: 10px; fill: #555; }
+.meta { color: #777; font-size: 12px; }
+"""
+
+_EQUITY_COLOR = '#1f6fb2'
+_DRAWDOWN_COLOR = '#c0392b'
+
+
+def _split_results(results: Dict) -> List[Tuple[str, Dict]]:
+    """
+    把 run_backtest 的结果统一为 [(标的代码, 单个标的的结果)]（兼容单股票和多股票模式）
+    """
+    if 'trades' in results and 'equity_curve' in results:
+        return [(results.get('symbol'), results)]
+    return list(results.items())
+
+
+def downsample(index: pd.Index, values: np.ndarray, points: int) -> Tuple[pd.Index, np.ndarray]:
+    """
+    用 LTTB 把一条曲线降采样到 points 个点
+
+    Args:
+        index: 时间索引
+        values: 数值
+        points: 目标点数
+
+    Returns:
+        (降采样后的索引, 数值)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if isinstance(index, pd.DatetimeIndex):
+        x = index.asi8.astype(np.float64)
+    else:
+        x = np.arange(len(values), dtype=np.float64)
+    selected = lttb_indices(x, values, points)
+    return index[selected], values[selected]
+
+
+def drawdown_percent(equity: np.ndarray) -> np.ndarray:
+    """
+    回撤（%）：相对历史最高权益的跌幅
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    peak = np.fmax.accumulate(equity)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = (equity - peak) / peak * 100
+    return np.where(np.isfinite(drawdown), drawdown, 0.0)
+
+
+def _format_number(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (int, np.integer)):
+        return str(value)
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return ''
+        if np.isinf(value):
+            return '∞' if value > 0 else '-∞'
+        return f"{value:,.2f}"
+    return html.escape(str(value))
+
+
+def _format_date(value) -> str:
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d %H:%M') if (value.hour or value.minute) else value.strftime('%Y-%m-%d')
+    return html.escape(str(value))
+
+
+def svg_chart(index: pd.Index,
+              values: np.ndarray,
+              width: int = 800,
+              height: int = 200,
+              color: str = _EQUITY_COLOR,
+              area: bool = False,
+              axes: bool = True) -> str:
+    """
+    把一条（已降采样的）曲线绘制为内联 SVG
+
+    Args:
+        index: 横坐标（时间索引）
+        values: 纵坐标
+        width: 宽度（像素）
+        height: 高度（像素）
+        color: 线条颜色
+        area: 是否填充曲线与零线之间的区域（用于回撤）
+        axes: 是否绘制坐标轴标签（缩略图不绘制）
+
+    Returns:
+        SVG 字符串
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    if len(values) == 0 or not finite.any():
+        return f'<svg class="chart" width="{width}" height="{height}"></svg>'
+
+    left, right, top, bottom = (60, 10, 10, 20) if axes else (1, 1, 1, 1)
+    plot_width = width - left - right
+    plot_height = height - top - bottom
+    low = float(np.min(values[finite]))
+    high = float(np.max(values[finite]))
+    if area:
+        high = max(high, 0.0)
+    if high == low:
+        high, low = high + 1.0, low - 1.0
+
+    xs = left + np.linspace(0.0, plot_width, len(values)) if len(values) > 1 else np.array([left + plot_width / 2])
+    ys = top + (high - np.where(finite, values, low)) / (high - low) * plot_height
+    points = ' '.join(f"{x:.1f},{y:.1f}" for x, y in zip(xs, ys))
+
+    parts = [f'<svg class="chart" width="{width}" height="{height}" viewBox="0 0 {width} {height}" '
+             f'xmlns="http://www.w3.org/2000/svg">']
+    if area:
+        zero = top + high / (high - low) * plot_height
+        parts.append(f'<polygon points="{xs[0]:.1f},{zero:.1f} {points} {xs[-1]:.1f},{zero:.1f}" '
+                     f'fill="{color}" fill-opacity="0.25" stroke="none"/>')
+    parts.append(f'<polyline points="{points}" fill="none" stroke="{color}" stroke-width="1.2"/>')
+    if axes:
+        parts.append(f'<line x1="{left}" y1="{top}" x2="{left}" y2="{top + plot_height}" stroke="#999"/>')
+        parts.append(f'<line x1="{left}" y1="{top + plot_height}" x2="{left + plot_width}" '
+                     f'y2="{top + plot_height}" stroke="#999"/>')
+        parts.append(f'<text x="{left - 4}" y="{top + 8}" text-anchor="end">{_format_number(high)}</text>')
+        parts.append(f'<text x="{left - 4}" y="{top + plot_height}" text-anchor="end">{_format_number(low)}</text>')
+        parts.append(f'<text x="{left}" y="{height - 4}">{_format_date(index[0])}</text>')
+        parts.append(f'<text x="{left + plot_width}" y="{height - 4}" text-anchor="end">{_format_date(index[-1])}</text>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def _equity_charts(index: pd.Index, equity: np.ndarray, points: int, width: int) -> str:
+    equity_index, equity_values = downsample(index, equity, points)
+    drawdown_index, drawdown_values = downsample(index, drawdown_percent(equity), points)
+    return (svg_chart(equity_index, equity_values, width=width, height=200) +
+            '<br>' +
+            svg_chart(drawdown_index, drawdown_values, width=width, height=110, color=_DRAWDOWN_COLOR, area=True))
+
+
+def _basic_metrics(result: Dict) -> Dict:
+    """
+    没有提供绩效指标时，从回测结果中取最基本的指标
+    """
+    return {
+        '初始资金': result['initial_capital'],
+        '最终资金': result['final_capital'],
+        '总收益率(%)': result['total_return'],
+        '总交易次数': len(result['trades']),
+    }
+
+
+def _signed_class(value) -> str:
+    if isinstance(value, (int, float, np.integer, np.floating)) and np.isfinite(value) and value != 0:
+        return ' class="pos"' if value > 0 else ' class="neg"'
+    return ''
+
+
+def _trades_table(trades: pd.DataFrame, max_trades: int) -> str:
+    if trades.empty:
+        return '<p class="meta">无交易</p>'
+    columns = list(trades.columns)
+    rows = []
+    for record in trades.tail(max_trades).itertuples(index=False):
+        cells = []
+        for column, value in zip(columns, record):
+            if isinstance(value, pd.Timestamp):
+                cells.append(f'<td>{_format_date(value)}</td>')
+            else:
+                cls = _signed_class(value) if column in ('Profit', 'Return') else ''
+                cells.append(f'<td{cls}>{_format_number(value)}</td>')
+        rows.append('<tr>' + ''.join(cells) + '</tr>')
+    note = f'<p class="meta">共 {len(trades)} 笔交易，显示最近 {min(max_trades, len(trades))} 笔</p>'
+    header = ''.join(f'<th>{html.escape(str(column))}</th>' for column in columns)
+    return f'{note}<table><tr>{header}</tr>{"".join(rows)}</table>'
+
+
+def generate_html_report(results: Dict,
+                         metrics: Dict = None,
+                         path: str = None,
+                         title: str = '海龟交易策略回测报告',
+                         points: int = 500,
+                         sparkline_points: int = 60,
+                         max_detail_symbols: int = 20,
+                         max_trades: int = 50,
+                         sort_by: str = '总收益率(%)') -> str:
+    """
+    生成自包含的 HTML 回测报告
+
+    Args:
+        results: run_backtest 的结果（单股票或多股票模式）
+        metrics: get_performance_metrics 的结果，None 时只显示资金、收益率和交易次数
+        path: 输出文件路径，None 表示不写文件
+        title: 报告标题
+        points: 每条权益/回撤曲线的点数
+        sparkline_points: 汇总表中每个标的权益缩略图的点数
+        max_detail_symbols: 显示详细曲线和交易明细的标的数量（按 sort_by 降序）
+        max_trades: 每个标的最多显示的交易笔数（最近的交易）
+        sort_by: 汇总表和详细部分的排序指标
+
+    Returns:
+        HTML 字符串
+    """
+    start = time.perf_counter()
+    items = [(symbol, result) for symbol, result in _split_results(results) if result]
+    if metrics is not None and metrics and not all(isinstance(value, dict) for value in metrics.values()):
+        metrics = {items[0][0]: metrics} if items else {}
+    symbol_metrics = {}
+    for symbol, result in items:
+        values = _basic_metrics(result)
+        if metrics is not None:
+            values.update(metrics.get(symbol, {}))
+        symbol_metrics[symbol] = values
+
+    def sort_key(symbol):
+        value = symbol_metrics[symbol].get(sort_by)
+        return -value if isinstance(value, (int, float, np.integer, np.floating)) and np.isfinite(value) else np.inf
+    ranked = sorted(symbol_metrics, key=sort_key)
+    labels = [label for label in METRIC_LABELS if any(label in values for values in symbol_metrics.values())]
+
+    parts = [f'<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+             f'<style>{_STYLE}</style></head><body><h1>{html.escape(title)}</h1>']
+
+    # 组合权益：各标的权益曲线在共同日历上前向填充后求和
+    if items:
+        equity = pd.concat({symbol: result['equity_curve']['Equity'] for symbol, result in items}, axis=1)
+        equity = equity.sort_index().ffill()
+        for symbol, result in items:
+            equity[symbol] = equity[symbol].fillna(result['initial_capital'])
+        portfolio = equity.sum(axis=1)
+        parts.append(f'<h2>组合权益（{len(items)} 个标的）</h2>')
+        parts.append(_equity_charts(portfolio.index, portfolio.to_numpy(), points, 900))
+
+    # 汇总表
+    parts.append(f'<h2>绩效指标（按 {html.escape(sort_by)} 排序）</h2><table><tr><th>标的</th><th>权益</th>')
+    parts.append(''.join(f'<th>{html.escape(label)}</th>' for label in labels) + '</tr>')
+    results_by_symbol = dict(items)
+    for symbol in ranked:
+        curve = results_by_symbol[symbol]['equity_curve']
+        spark_index, spark_values = downsample(curve.index, curve['Equity'].to_numpy(), sparkline_points)
+        sparkline = svg_chart(spark_index, spark_values, width=120, height=24, axes=False)
+        cells = []
+        for label in labels:
+            value = symbol_metrics[symbol].get(label)
+            cls = _signed_class(value) if label in ('总收益率(%)', '年化收益率(%)') else ''
+            cells.append(f'<td{cls}>{_format_number(value)}</td>')
+        parts.append(f'<tr><td class="text">{html.escape(str(symbol))}</td><td>{sparkline}</td>{"".join(cells)}</tr>')
+    parts.append('</table>')
+
+    # 排名靠前标的的详细曲线和交易明细
+    for symbol in ranked[:max_detail_symbols]:
+        result = results_by_symbol[symbol]
+        curve = result['equity_curve']
+        parts.append(f'<h3>{html.escape(str(symbol))}</h3>')
+        parts.append(_equity_charts(curve.index, curve['Equity'].to_numpy(), points, 800))
+        parts.append(_trades_table(result['trades'], max_trades))
+
+    elapsed = time.perf_counter() - start
+    parts.append(f'<p class="meta">生成于 {time.strftime("%Y-%m-%d %H:%M:%S")}，耗时 {elapsed:.2f} 秒，'
+                 f'曲线降采样为 {points} 点（LTTB）</p></body></html>')
+    report = ''.join(parts)
+
+    if path is not None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(report)
+    return report
@@ -0,0 +1,193 @@
+"""
+回测流程的分阶段计时与性能分析工具
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+
+class NullProfiler:
+    """
+    不记录任何信息的分析器，TurtleBacktester 默认使用，开销可忽略
+    """
+
+    enabled = False
+
+    @contextmanager
+    def stage(self, name: str, symbol: str = None, rows: int = None):
+        yield {}
+
+    @contextmanager
+    def memory_paused(self):
+        yield
+
+    @property
+    def records(self) -> List[Dict]:
+        return []
+
+
+class PipelineProfiler:
+    enabled = True
+
+    def __init__(self,
+                 track_memory: bool = False,
+                 callbacks: List[Callable[[Dict], None]] = None):
+        """
+        分阶段性能分析器
+
+        每个阶段记录墙钟时间、当前线程的CPU时间、处理行数，开启 track_memory 时还记录峰值内存。
+        不开启内存跟踪时开销仅为几次计时调用，可以在生产环境中常开。
+
+        tracemalloc 的峰值是整个进程的，每个阶段开始时都会重置它，因此峰值内存只在各阶段
+        串行执行时有效。多个线程同时执行阶段时应放在 memory_paused() 中，这些阶段不记录峰值内存；
+        TurtleBacktester 的 executor='thread' 会自动这样做。
+
+        Args:
+            track_memory: 是否使用 tracemalloc 记录各阶段的峰值内存（会明显拖慢执行）
+            callbacks: 每个阶段结束时调用的回调函数列表，参数为该阶段的记录字典
+        """
+        self.track_memory = track_memory
+        self.callbacks = list(callbacks or [])
+        self._records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracemalloc = False
+        self._memory_paused = 0
+
+    @property
+    def records(self) -> List[Dict]:
+        """
+        已完成阶段的记录列表（按结束顺序）
+        """
+        with self._lock:
+            return list(self._records)
+
+    def _memory_stack(self) -> list:
+        stack = getattr(self._local, 'memory_stack', None)
+        if stack is None:
+            stack = self._local.memory_stack = []
+        return stack
+
+    @contextmanager
+    def memory_paused(self):
+        """
+        在该上下文中开始的阶段不记录峰值内存，也不重置 tracemalloc 的峰值
+
+        用于包住并行执行阶段的代码（如线程池）。外层阶段的峰值内存仍然包含并行阶段的分配。
+        """
+        with self._lock:
+            self._memory_paused += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._memory_paused -= 1
+
+    @contextmanager
+    def stage(self, name: str, symbol: str = None, rows: int = None):
+        """
+        记录一个阶段
+
+        Args:
+            name: 阶段名称
+            symbol: 标的代码
+            rows: 处理的行数，也可以在阶段内修改 yield 出的记录字典的 'rows'
+
+        Yields:
+            该阶段的记录字典
+        """
+        record = {'stage': name, 'symbol': symbol, 'rows': rows}
+
+        memory_stack = None
+        if self.track_memory and not self._memory_paused:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            memory_stack = self._memory_stack()
+            # 嵌套阶段会重置峰值，先把外层阶段目前的峰值保存下来
+            _, peak = tracemalloc.get_traced_memory()
+            for frame in memory_stack:
+                frame[1] = max(frame[1], peak - frame[0])
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            memory_stack.append([current, 0])
+
+        record['started_at'] = time.time()
+        cpu_start = time.thread_time()
+        wall_start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.thread_time() - cpu_start
+
+            if memory_stack is not None:
+                baseline, nested_peak = memory_stack.pop()
+                _, peak = tracemalloc.get_traced_memory()
+                peak_allocated = max(peak - baseline, nested_peak, 0)
+                record['peak_memory_bytes'] = peak_allocated
+                for frame in memory_stack:
+                    frame[1] = max(frame[1], peak_allocated + baseline - frame[0])
+
+            with self._lock:
+                self._records.append(record)
+            for callback in self.callbacks:
+                callback(record)
+
+    def stop(self):
+        """
+        停止由本分析器启动的 tracemalloc
+        """
+        if self._started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracemalloc = False
+
+    def reset(self):
+        """
+        清空已有记录
+        """
+        with self._lock:
+            self._records = []
+
+    def to_dict(self) -> Dict:
+        """
+        导出为字典：包含全部阶段记录和按阶段汇总的统计
+        """
+        return {'records': self.records, 'summary': self.summary()}
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        按阶段汇总调用次数、总耗时、总行数和最大峰值内存
+        """
+        summary = {}
+        for record in self.records:
+            item = summary.setdefault(record['stage'], {
+                'count': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'rows': 0,
+            })
+            item['count'] += 1
+            item['wall_seconds'] += record['wall_seconds']
+            item['cpu_seconds'] += record['cpu_seconds']
+            item['rows'] += record['rows'] or 0
+            if 'peak_memory_bytes' in record:
+                item['peak_memory_bytes'] = max(item.get('peak_memory_bytes', 0), record['peak_memory_bytes'])
+        return summary
+
+    def to_json_lines(self, path: str = None) -> str:
+        """
+        导出为 JSON Lines（每个阶段一行）
+
+        Args:
+            path: 输出文件路径；提供时以追加模式写入
+
+        Returns:
+            JSON Lines 文本
+        """
+        text = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in self.records)
+        if path is not None:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(text)
+        return text
@@ -0,0 +1,358 @@
+"""
+批量回测任务调度：断点续跑、失败隔离与重试
+
+把长时间运行的参数优化或全市场回测拆分为工作单元，每完成一个单元就写入本地日志（JSON Lines）。
+进程被中断后重新运行时会跳过日志中已完成的单元；单个单元出错只会被重试，不会中断整个批次。
+"""
+
+import json
+import os
+import time
+import traceback
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class WorkUnit:
+    def __init__(self, key: str, payload=None):
+        """
+        工作单元
+
+        Args:
+            key: 单元的唯一标识（用于断点续跑，重新运行时必须保持不变）
+            payload: 传给任务函数的参数（进程池模式下需可 pickle）
+        """
+        self.key = key
+        self.payload = payload
+
+    def __repr__(self):
+        return f"WorkUnit({self.key!r})"
+
+
+def _json_default(value):
+    """
+    把 numpy 和 pandas 标量转换为 JSON 可序列化的类型
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"无法序列化为 JSON: {type(value).__name__}")
+
+
+class JobJournal:
+    def __init__(self, path: str):
+        """
+        任务日志：每个单元结束（成功或最终失败）时追加一行
+
+        Args:
+            path: 日志文件路径（JSON Lines）
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self) -> Dict[str, Dict]:
+        """
+        读取日志，返回 {单元标识: 最后一条记录}
+
+        写入中断造成的不完整末行会被忽略。
+        """
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record['key']] = record
+        return records
+
+    def completed(self) -> Dict[str, Dict]:
+        """
+        已成功完成的单元 {单元标识: 记录}
+        """
+        return {key: record for key, record in self.load().items() if record['status'] == STATUS_DONE}
+
+    def append(self, record: Dict):
+        """
+        追加一条记录并同步到磁盘
+        """
+        line = json.dumps(record, ensure_ascii=False, default=_json_default) + '\n'
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def execute_unit(func: Callable, key: str, payload) -> Dict:
+    """
+    在工作进程中执行单个单元，异常被捕获并作为结果返回，不会影响其他单元
+    """
+    start = time.perf_counter()
+    try:
+        result = func(payload)
+        return {'key': key, 'status': STATUS_DONE, 'result': result,
+                'elapsed_seconds': time.perf_counter() - start}
+    except Exception as e:
+        return {'key': key, 'status': STATUS_FAILED, 'error': f"{type(e).__name__}: {e}",
+                'traceback': traceback.format_exc(), 'elapsed_seconds': time.perf_counter() - start}
+
+
+class BatchReport:
+    def __init__(self):
+        """
+        批次运行结果
+        """
+        self.results = {}     # 成功单元的结果（包括此前已完成、本次跳过的单元）
+        self.failed = {}      # 重试后仍失败的单元及错误信息
+        self.skipped = []     # 日志中已完成而跳过的单元
+        self.attempts = {}    # 本次运行中每个单元的尝试次数
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def __repr__(self):
+        return (f"BatchReport(completed={len(self.results)}, failed={len(self.failed)}, "
+                f"skipped={len(self.skipped)})")
+
+
+class BatchScheduler:
+    def __init__(self,
+                 journal_path: str,
+                 executor: str = 'serial',
+                 max_workers: int = None,
+                 max_retries: int = 2,
+                 log: Callable[[str], None] = None):
+        """
+        初始化批量任务调度器
+
+        Args:
+            journal_path: 任务日志文件路径，None 表示不记录日志（无法断点续跑）
+            executor: 执行方式，'serial'（单进程）或 'process'（进程池）
+            max_workers: 进程池大小，默认为 CPU 核数
+            max_retries: 单元失败后的最大重试次数
+            log: 进度输出函数，默认不输出
+        """
+        if executor not in ('serial', 'process'):
+            raise ValueError(f"executor 必须是 'serial' 或 'process'，实际为 {executor!r}")
+        self.journal = JobJournal(journal_path) if journal_path is not None else None
+        self.executor = executor
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.log = log or (lambda message: None)
+
+    def run(self, units: Iterable[WorkUnit], func: Callable) -> BatchReport:
+        """
+        运行一批工作单元
+
+        Args:
+            units: 工作单元列表
+            func: 任务函数，参数为单元的 payload，返回值需可序列化为 JSON；
+                  进程池模式下必须是模块级函数
+
+        Returns:
+            批次运行结果
+        """
+        units = list(units)
+        keys = [unit.key for unit in units]
+        if len(set(keys)) != len(keys):
+            raise ValueError("工作单元的 key 必须唯一")
+
+        report = BatchReport()
+        pending = self.skip_completed(units, report)
+
+        if self.executor == 'serial':
+            self._run_serial(pending, func, report)
+        else:
+            self._run_process_pool(pending, func, report)
+
+        # 按输入顺序返回结果
+        report.results = {key: report.results[key] for key in keys if key in report.results}
+        return report
+
+    def skip_completed(self, units: List[WorkUnit], report: BatchReport) -> List[WorkUnit]:
+        """
+        从日志中读取已完成单元的结果，返回仍需运行的单元
+        """
+        completed = self.journal.completed() if self.journal is not None else {}
+        pending = []
+        for unit in units:
+            if unit.key in completed:
+                report.results[unit.key] = completed[unit.key].get('result')
+                report.skipped.append(unit.key)
+            else:
+                pending.append(unit)
+        if report.skipped:
+            self.log(f"跳过已完成的 {len(report.skipped)} 个单元")
+        return pending
+
+    def record_outcome(self, unit: WorkUnit, outcome: Dict, report: BatchReport,
+                       allow_retry: bool = True) -> bool:
+        """
+        记录一次尝试的结果（成功或最终失败时写入日志），返回该单元是否需要重试
+
+        allow_retry 为 False 时失败即为最终失败，不论已尝试几次。
+        """
+        attempt = report.attempts.get(unit.key, 0) + 1
+        report.attempts[unit.key] = attempt
+        outcome['attempt'] = attempt
+        outcome['finished_at'] = time.time()
+
+        if outcome['status'] == STATUS_DONE:
+            try:
+                if self.journal is not None:
+                    self.journal.append(outcome)
+            except (TypeError, ValueError) as e:
+                # 结果无法写入日志：按该单元失败处理，重试也会得到同样的结果，因此不再重试
+                outcome = {'key': unit.key, 'status': STATUS_FAILED,
+                           'error': f"结果无法序列化为 JSON: {type(e).__name__}: {e}",
+                           'elapsed_seconds': outcome.get('elapsed_seconds'),
+                           'attempt': attempt, 'finished_at': outcome['finished_at']}
+            else:
+                report.results[unit.key] = outcome['result']
+                report.failed.pop(unit.key, None)
+                return False
+        elif allow_retry and attempt <= self.max_retries:
+            self.log(f"{unit.key} 第 {attempt} 次尝试失败，准备重试: {outcome['error']}")
+            return True
+
+        self.log(f"{unit.key} 失败: {outcome['error']}")
+        if self.journal is not None:
+            self.journal.append({key: value for key, value in outcome.items() if key != 'traceback'})
+        report.failed[unit.key] = outcome['error']
+        return False
+
+    def _run_serial(self, units: List[WorkUnit], func: Callable, report: BatchReport):
+        for unit in units:
+            while self.record_outcome(unit, execute_unit(func, unit.key, unit.payload), report):
+                pass
+
+    def _run_process_pool(self, units: List[WorkUnit], func: Callable, report: BatchReport):
+        max_workers = self.max_workers or os.cpu_count() or 1
+        queue = deque(units)
+        while queue:
+            # 工作进程异常退出（如内存不足被杀）时，崩溃时正在执行的单元逐个在单独的进程中重新运行，
+            # 只有确实导致崩溃的单元计为一次失败；尚未开始的单元不计失败，在新进程池中继续运行
+            for unit in self._run_pool_round(queue, func, report, max_workers):
+                while self.record_outcome(unit, _execute_in_new_process(func, unit), report):
+                    pass
+
+    def _run_pool_round(self, queue: deque, func: Callable, report: BatchReport,
+                        max_workers: int) -> List[WorkUnit]:
+        """
+        在一个进程池中运行队列中的单元，同时提交的单元不超过进程数（其余单元留在队列中）
+
+        Returns:
+            进程池崩溃时正在执行的单元（未崩溃时为空列表）
+        """
+        in_flight = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                while queue or in_flight:
+                    while queue and len(in_flight) < max_workers:
+                        # 进程池已崩溃时 submit 会抛出异常，提交成功后再从队列中取出，避免丢失单元
+                        future = executor.submit(execute_unit, func, queue[0].key, queue[0].payload)
+                        in_flight[future] = queue.popleft()
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        outcome = _future_outcome(future, in_flight[future])
+                        unit = in_flight.pop(future)
+                        if self.record_outcome(unit, outcome, report):
+                            queue.append(unit)
+            except BrokenProcessPool:
+                wait(in_flight)
+                suspects = []
+                for future, unit in in_flight.items():
+                    if future.exception() is None:
+                        if self.record_outcome(unit, future.result(), report):
+                            queue.append(unit)
+                    else:
+                        suspects.append(unit)
+                return suspects
+        return []
+
+
+def _future_outcome(future, unit: WorkUnit) -> Dict:
+    """
+    进程池中单元的结果；func 或 payload 无法 pickle 等提交错误记为该单元失败，进程池崩溃时抛出 BrokenProcessPool
+    """
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        raise
+    except Exception as e:
+        return {'key': unit.key, 'status': STATUS_FAILED, 'error': f"{type(e).__name__}: {e}",
+                'elapsed_seconds': None}
+
+
+def _execute_in_new_process(func: Callable, unit: WorkUnit) -> Dict:
+    """
+    在单独的进程中运行一个单元，进程异常退出时记为该单元失败
+    """
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(execute_unit, func, unit.key, unit.payload)
+        try:
+            return _future_outcome(future, unit)
+        except BrokenProcessPool:
+            return {'key': unit.key, 'status': STATUS_FAILED,
+                    'error': 'BrokenProcessPool: 工作进程异常退出', 'elapsed_seconds': None}
+
+
+def backtest_unit(payload: Dict) -> Dict:
+    """
+    标准回测任务：对一个标的、一组策略参数运行回测并返回绩效指标
+
+    Args:
+        payload: {'symbol': 标的代码, 'data': 价格数据（可选，缺省时由回测引擎下载）,
+                  'params': 策略参数, 'backtester': TurtleBacktester 的其他参数}
+
+    Returns:
+        绩效指标字典
+    """
+    from turtle_backtest import TurtleBacktester
+
+    backtester = TurtleBacktester(symbol=payload['symbol'], **payload.get('backtester', {}))
+    if payload.get('data') is not None:
+        backtester.data = payload['data']
+    backtester.setup_strategy(**payload.get('params', {}))
+    return backtester.get_performance_metrics()
+
+
+def make_backtest_units(data: Dict, param_grid: Iterable[Dict], **backtester_kwargs) -> List[WorkUnit]:
+    """
+    为 标的 × 参数组合 生成回测工作单元
+
+    Args:
+        data: {标的代码: 价格数据}，价格数据为 None 时由回测引擎下载
+        param_grid: 策略参数字典列表
+        **backtester_kwargs: TurtleBacktester 的其他参数（如 start_date、end_date、initial_capital）
+
+    Returns:
+        工作单元列表，key 形如 "AAPL|atr_window=20,entry_window=20"
+    """
+    units = []
+    for params in param_grid:
+        params_key = ','.join(f"{name}={params[name]}" for name in sorted(params))
+        for symbol, symbol_data in data.items():
+            units.append(WorkUnit(f"{symbol}|{params_key}", {
+                'symbol': symbol,
+                'data': symbol_data,
+                'params': dict(params),
+                'backtester': dict(backtester_kwargs),
+            }))
+    return units
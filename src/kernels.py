@@ -0,0 +1,490 @@
+"""
+回测核心计算内核（唐奇安通道、ATR、信号状态机、交易提取、权益曲线、图表降采样）
+
+内核只接受 numpy 数组，不访问 pandas 对象。安装了 numba 时在首次调用时编译为
+nogil 机器码，计算期间释放 GIL，多个线程可以在同一进程内并行处理共享内存中的数据；
+未安装 numba 时内核仍可调用（等价的纯 Python 实现，结果完全相同），但逐元素访问 numpy 数组
+比 pandas 实现更慢，因此策略和回测引擎只在 use_kernels() 为真时使用内核，否则使用 pandas/逐行实现。
+"""
+
+import importlib
+import importlib.util
+import math
+import os
+import sys
+import threading
+
+import numpy as np
+
+# 信号类型（与 turtle_trading_strategy 中的 SIGNAL_TYPE_* 一致）
+_SIGNAL_TYPE_ENTRY = 1
+_SIGNAL_TYPE_EXIT = 2
+_SIGNAL_TYPE_STOP = 3
+
+# 编译后的内核在首次调用时才生成（导入 numba 和编译都较慢，不应拖慢模块导入）
+_compiled_kernels = {}
+_compile_lock = threading.Lock()
+
+
+def numba_available() -> bool:
+    """
+    是否安装了 numba（决定内核能否释放 GIL）
+    """
+    return importlib.util.find_spec('numba') is not None
+
+
+def use_kernels(engine: str) -> bool:
+    """
+    给定计算引擎时是否使用编译内核：engine 为 'fast' 且安装了 numba
+    """
+    return engine == 'fast' and numba_available()
+
+
+def _compiled(func):
+    """
+    返回 func 的 nogil 编译版本，未安装 numba 时返回 func 本身
+    """
+    cache = True
+    if __name__ != 'kernels':
+        # numba 的磁盘缓存记录编译时的模块名：以 src.kernels 导入（测试）时写入的缓存，在只能
+        # import kernels 的进程（脚本、基准测试）中读取会失败，因此统一在名为 kernels 的模块中编译
+        canonical = _canonical_module()
+        if canonical is not None:
+            return canonical._compiled(getattr(canonical, func.__name__))
+        cache = False
+    kernel = _compiled_kernels.get(func.__name__)
+    if kernel is None:
+        with _compile_lock:
+            kernel = _compiled_kernels.get(func.__name__)
+            if kernel is None:
+                if numba_available():
+                    numba = importlib.import_module('numba')
+                    kernel = numba.njit(nogil=True, cache=cache)(func)
+                else:
+                    kernel = func
+                _compiled_kernels[func.__name__] = kernel
+    return kernel
+
+
+def _canonical_module():
+    """
+    以 kernels 为名导入的本模块；该名称被其他模块占用时返回 None
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    if directory not in sys.path:
+        sys.path.append(directory)
+    module = importlib.import_module('kernels')
+    if os.path.abspath(getattr(module, '__file__', '')) != os.path.abspath(__file__):
+        return None
+    return module
+
+
+def _signal_kernel(high, low, close, donchian_high, donchian_low, exit_high, exit_low, atr, atr_multiplier):
+    n = len(close)
+    signal = np.zeros(n, dtype=np.int64)
+    position_out = np.zeros(n, dtype=np.int64)
+    entry_price_out = np.zeros(n, dtype=np.float64)
+    stop_loss_out = np.zeros(n, dtype=np.float64)
+    signal_type = np.zeros(n, dtype=np.int64)
+    trigger_price = np.full(n, np.nan)
+
+    position = 0
+    entry_price = 0.0
+    for i in range(1, n):
+        current_close = close[i]
+        current_high = high[i]
+        current_low = low[i]
+        atr_value = atr[i]
+
+        # 止损价以当日 ATR 计算，通道取前一日的值
+        long_stop_loss = entry_price - atr_value * atr_multiplier if position > 0 else 0.0
+        short_stop_loss = entry_price + atr_value * atr_multiplier if position < 0 else 0.0
+
+        stop_loss_triggered = False
+        if position > 0 and current_low <= long_stop_loss:
+            signal[i] = -1
+            signal_type[i] = _SIGNAL_TYPE_STOP
+            trigger_price[i] = long_stop_loss
+            position = 0
+            entry_price = 0.0
+            stop_loss_triggered = True
+        elif position < 0 and current_high >= short_stop_loss:
+            signal[i] = 1
+            signal_type[i] = _SIGNAL_TYPE_STOP
+            trigger_price[i] = short_stop_loss
+            position = 0
+            entry_price = 0.0
+            stop_loss_triggered = True
+
+        if not stop_loss_triggered:
+            if position == 0:
+                if current_close > donchian_high[i - 1]:
+                    signal[i] = 1
+                    signal_type[i] = _SIGNAL_TYPE_ENTRY
+                    trigger_price[i] = donchian_high[i - 1]
+                    position = 1
+                    entry_price = current_close
+                elif current_close < donchian_low[i - 1]:
+                    signal[i] = -1
+                    signal_type[i] = _SIGNAL_TYPE_ENTRY
+                    trigger_price[i] = donchian_low[i - 1]
+                    position = -1
+                    entry_price = current_close
+            else:
+                if position > 0 and (current_close < exit_low[i - 1] or current_close < long_stop_loss):
+                    signal[i] = -1
+                    if current_close < exit_low[i - 1]:
+                        signal_type[i] = _SIGNAL_TYPE_EXIT
+                        trigger_price[i] = exit_low[i - 1]
+                    else:
+                        signal_type[i] = _SIGNAL_TYPE_STOP
+                        trigger_price[i] = long_stop_loss
+                    position = 0
+                    entry_price = 0.0
+                elif position < 0 and (current_close > exit_high[i - 1] or current_close > short_stop_loss):
+                    signal[i] = 1
+                    if current_close > exit_high[i - 1]:
+                        signal_type[i] = _SIGNAL_TYPE_EXIT
+                        trigger_price[i] = exit_high[i - 1]
+                    else:
+                        signal_type[i] = _SIGNAL_TYPE_STOP
+                        trigger_price[i] = short_stop_loss
+                    position = 0
+                    entry_price = 0.0
+
+        position_out[i] = position
+        entry_price_out[i] = entry_price
+        if position > 0:
+            stop_loss_out[i] = long_stop_loss
+        elif position < 0:
+            stop_loss_out[i] = short_stop_loss
+
+    return signal, position_out, entry_price_out, stop_loss_out, signal_type, trigger_price
+
+
+def _legs_kernel(signal, position_size):
+    n = len(signal)
+    capacity = 1
+    for i in range(n):
+        if signal[i] != 0:
+            capacity += 1
+    entry_idx = np.empty(capacity, dtype=np.int64)
+    exit_idx = np.empty(capacity, dtype=np.int64)
+    direction = np.empty(capacity, dtype=np.int64)
+    size = np.empty(capacity, dtype=np.float64)
+    forced_exit = np.zeros(capacity, dtype=np.bool_)
+
+    count = 0
+    position = 0.0
+    entry = -1
+    for i in range(n):
+        current_signal = signal[i]
+        if current_signal == 0:
+            continue
+
+        # 与持仓方向相反的信号先平仓，同一根K线再按信号方向开仓
+        if (position > 0 and current_signal == -1) or (position < 0 and current_signal == 1):
+            entry_idx[count] = entry
+            exit_idx[count] = i
+            direction[count] = 1 if position > 0 else -1
+            size[count] = abs(position)
+            count += 1
+            position = 0.0
+
+        if position == 0:
+            position = position_size[i] if current_signal == 1 else -position_size[i]
+            entry = i
+
+    if position != 0:
+        entry_idx[count] = entry
+        exit_idx[count] = n - 1
+        direction[count] = 1 if position > 0 else -1
+        size[count] = abs(position)
+        forced_exit[count] = True
+        count += 1
+
+    return entry_idx[:count], exit_idx[:count], direction[:count], size[:count], forced_exit[:count]
+
+
+def _equity_kernel(bar_keys, exit_keys, profit, initial_capital):
+    n = len(bar_keys)
+    equity = np.empty(n, dtype=np.float64)
+    returns = np.zeros(n, dtype=np.float64)
+
+    current_capital = initial_capital
+    trade_idx = 0
+    n_trades = len(exit_keys)
+    for i in range(n):
+        # 每根K线最多结算一笔交易（与逐行实现一致）
+        if trade_idx < n_trades and bar_keys[i] >= exit_keys[trade_idx]:
+            current_capital += profit[trade_idx]
+            trade_idx += 1
+        equity[i] = current_capital
+        if i > 0 and equity[i - 1] != 0:
+            returns[i] = (current_capital / equity[i - 1] - 1) * 100
+    return equity, returns
+
+
+def _rolling_extreme_kernel(values, window, is_max):
+    n = len(values)
+    out = np.full(n, np.nan)
+    # 单调队列（保存下标）：队首为窗口内的最大（最小）值，相等时保留较新的下标
+    queue = np.empty(n, dtype=np.int64)
+    head = 0
+    tail = 0
+    nan_count = 0
+    for i in range(n):
+        value = values[i]
+        if np.isnan(value):
+            nan_count += 1
+        else:
+            while tail > head:
+                last = values[queue[tail - 1]]
+                if (last > value) if is_max else (last < value):
+                    break
+                tail -= 1
+            queue[tail] = i
+            tail += 1
+        start = i - window + 1
+        if start > 0 and np.isnan(values[start - 1]):
+            nan_count -= 1
+        while tail > head and queue[head] < start:
+            head += 1
+        # 与 pandas 的 rolling(window) 一致：窗口未满或窗口内有 NaN 时为 NaN
+        if start >= 0 and nan_count == 0 and tail > head:
+            out[i] = values[queue[head]]
+    return out
+
+
+def _atr_kernel(high, low, close, window):
+    n = len(close)
+    # 真实波幅：三者中忽略 NaN 的最大值，与 DataFrame.max(axis=1) 一致
+    true_range = np.empty(n)
+    for i in range(n):
+        result = high[i] - low[i]
+        if i > 0:
+            high_gap = abs(high[i] - close[i - 1])
+            low_gap = abs(low[i] - close[i - 1])
+            if not np.isnan(high_gap) and (np.isnan(result) or high_gap > result):
+                result = high_gap
+            if not np.isnan(low_gap) and (np.isnan(result) or low_gap > result):
+                result = low_gap
+        true_range[i] = result
+
+    # 滚动均值：逐步加入/移出窗口，按 pandas 的 rolling(window).mean() 做 Kahan 补偿求和，结果逐位一致
+    atr = np.empty(n)
+    nobs = 0
+    neg_count = 0
+    total = 0.0
+    add_compensation = 0.0
+    remove_compensation = 0.0
+    same_count = 0
+    prev_value = np.nan
+    for i in range(n):
+        start = max(0, i - window + 1)
+        if i == 0 or start >= i:
+            nobs = 0
+            neg_count = 0
+            total = 0.0
+            add_compensation = 0.0
+            remove_compensation = 0.0
+            same_count = 0
+            prev_value = true_range[start]
+            add_from = start
+        else:
+            for j in range(max(0, i - window), start):
+                value = true_range[j]
+                if not np.isnan(value):
+                    nobs -= 1
+                    y = -value - remove_compensation
+                    t = total + y
+                    remove_compensation = t - total - y
+                    total = t
+                    if math.copysign(1.0, value) < 0:
+                        neg_count -= 1
+            add_from = i
+        for j in range(add_from, i + 1):
+            value = true_range[j]
+            if not np.isnan(value):
+                nobs += 1
+                y = value - add_compensation
+                t = total + y
+                add_compensation = t - total - y
+                total = t
+                if math.copysign(1.0, value) < 0:
+                    neg_count += 1
+                if value == prev_value:
+                    same_count += 1
+                else:
+                    same_count = 1
+                prev_value = value
+
+        if nobs >= window and nobs > 0:
+            result = total / nobs
+            if same_count >= nobs:
+                result = prev_value
+            elif neg_count == 0 and result < 0:
+                result = 0.0
+            elif neg_count == nobs and result > 0:
+                result = 0.0
+            atr[i] = result
+        else:
+            atr[i] = np.nan
+    return atr
+
+
+def _as_float(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _check_window(window: int) -> int:
+    window = int(window)
+    if window < 0:
+        raise ValueError("window must be an integer 0 or greater")
+    return window
+
+
+def rolling_max(values, window: int) -> np.ndarray:
+    """
+    滚动最大值（与 pandas 的 Series.rolling(window).max() 逐位一致）
+    """
+    window = _check_window(window)
+    values = _as_float(values)
+    if window == 0:
+        return np.full(len(values), np.nan)
+    return _compiled(_rolling_extreme_kernel)(values, window, True)
+
+
+def rolling_min(values, window: int) -> np.ndarray:
+    """
+    滚动最小值（与 pandas 的 Series.rolling(window).min() 逐位一致）
+    """
+    window = _check_window(window)
+    values = _as_float(values)
+    if window == 0:
+        return np.full(len(values), np.nan)
+    return _compiled(_rolling_extreme_kernel)(values, window, False)
+
+
+def atr_array(high, low, close, window: int) -> np.ndarray:
+    """
+    ATR：真实波幅的滚动均值（与 TurtleTradingStrategy.calculate_atr 逐位一致）
+
+    Args:
+        high, low, close: 价格数组
+        window: ATR计算窗口
+
+    Returns:
+        ATR 数组
+    """
+    window = _check_window(window)
+    close = _as_float(close)
+    if window == 0 or len(close) == 0:
+        return np.full(len(close), np.nan)
+    return _compiled(_atr_kernel)(_as_float(high), _as_float(low), close, window)
+
+
+def signal_arrays(high, low, close, donchian_high, donchian_low, exit_high, exit_low, atr,
+                  atr_multiplier: float):
+    """
+    海龟信号状态机（与 TurtleTradingStrategy 的逐行实现逐K线一致）
+
+    Args:
+        high, low, close: 价格数组
+        donchian_high, donchian_low: 入场通道数组（内核内部取前一日的值）
+        exit_high, exit_low: 出场通道数组（内核内部取前一日的值）
+        atr: ATR 数组
+        atr_multiplier: ATR止损倍数
+
+    Returns:
+        (Signal, Position, Entry_Price, Stop_Loss, Signal_Type, Trigger_Price) 数组
+    """
+    return _compiled(_signal_kernel)(
+        _as_float(high), _as_float(low), _as_float(close),
+        _as_float(donchian_high), _as_float(donchian_low),
+        _as_float(exit_high), _as_float(exit_low), _as_float(atr),
+        float(atr_multiplier)
+    )
+
+
+def leg_arrays(signal, position_size):
+    """
+    从信号中提取交易
+
+    Args:
+        signal: 信号数组（1/-1/0）
+        position_size: 头寸规模数组
+
+    Returns:
+        (entry_idx, exit_idx, direction, size, forced_exit) 数组
+    """
+    return _compiled(_legs_kernel)(np.ascontiguousarray(signal, dtype=np.int64), _as_float(position_size))
+
+
+def equity_arrays(bar_keys, exit_keys, profit, initial_capital: float):
+    """
+    按平仓时间累加交易盈亏，计算权益和日收益率（%）
+
+    Args:
+        bar_keys: 每根K线的时间（int64，单调递增）
+        exit_keys: 每笔交易的平仓时间（int64，与 bar_keys 同一单位）
+        profit: 每笔交易的净利润
+        initial_capital: 初始资金
+
+    Returns:
+        (权益, 收益率) 数组
+    """
+    return _compiled(_equity_kernel)(np.ascontiguousarray(bar_keys, dtype=np.int64),
+                                     np.ascontiguousarray(exit_keys, dtype=np.int64),
+                                     _as_float(profit), float(initial_capital))
+
+
+def _lttb_kernel(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[n_out - 1] = n - 1
+    every = (n - 2) / (n_out - 2)
+    selected = 0
+    for bucket in range(n_out - 2):
+        # 下一个桶的平均点
+        next_start = int(np.floor((bucket + 1) * every)) + 1
+        next_end = min(int(np.floor((bucket + 2) * every)) + 1, n)
+        avg_x = 0.0
+        avg_y = 0.0
+        for j in range(next_start, next_end):
+            avg_x += x[j]
+            avg_y += y[j]
+        avg_x /= next_end - next_start
+        avg_y /= next_end - next_start
+
+        # 当前桶中与上一个选中点、下一个桶平均点组成的三角形面积最大的点
+        start = int(np.floor(bucket * every)) + 1
+        end = int(np.floor((bucket + 1) * every)) + 1
+        max_area = -1.0
+        chosen = start
+        for j in range(start, end):
+            area = abs((x[selected] - avg_x) * (y[j] - y[selected]) - (x[selected] - x[j]) * (avg_y - y[selected]))
+            if area > max_area:
+                max_area = area
+                chosen = j
+        indices[bucket + 1] = chosen
+        selected = chosen
+    return indices
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    LTTB（Largest-Triangle-Three-Buckets）降采样，保留曲线形状
+
+    Args:
+        x: 横坐标（单调递增）
+        y: 纵坐标
+        n_out: 输出点数（不小于3，大于等于输入点数时返回全部点）
+
+    Returns:
+        选中点的下标（包含首尾两点）
+    """
+    return _compiled(_lttb_kernel)(_as_float(x), _as_float(y), int(n_out))
@@ -0,0 +1,367 @@
+"""
+策略参数优化：随机搜索、逐次减半（Successive Halving）和 TPE 风格的贝叶斯搜索
+
+候选参数先在部分标的或部分年份（低保真度）上评估，表现好的再晋级到全部数据（保真度 1.0），
+以回测引擎的绩效指标（如 '卡玛比率'、'夏普比率'）为目标。所有随机性来自同一个种子，
+搜索日志（每次评估的参数、保真度和目标值）可导出为 JSON，相同种子可完全复现。
+"""
+
+import json
+import math
+import time
+import sys
+import os
+from itertools import product
+from typing import Callable, Dict, List
+
+import pandas as pd
+import numpy as np
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from turtle_backtest import TurtleBacktester
+
+# 默认搜索空间：二元组为闭区间（整数或浮点数），列表为离散候选值
+DEFAULT_SEARCH_SPACE = {
+    'entry_window': (10, 80),
+    'exit_window': (5, 40),
+    'atr_window': (10, 40),
+    'atr_multiplier': (1.0, 4.0),
+    'risk_percent': [0.005, 0.01, 0.015, 0.02],
+}
+
+
+class BacktestObjective:
+    def __init__(self,
+                 data: Dict[str, pd.DataFrame],
+                 metric: str = '卡玛比率',
+                 subset: str = 'symbols',
+                 seed: int = 0,
+                 backtester_kwargs: Dict = None):
+        """
+        以回测绩效指标为目标的评估函数，可在部分数据上评估
+
+        Args:
+            data: {标的代码: 价格数据}
+            metric: 目标指标（get_performance_metrics 返回的指标名，跨标的取平均，无交易的标的计为0，
+                    任一标的的指标为 NaN 时结果为 NaN）
+            subset: 低保真度评估时的数据子集，'symbols'（随机选取部分标的）或 'years'（最近一段时间）
+            seed: 选取标的子集的随机种子
+            backtester_kwargs: TurtleBacktester 的其他参数（如 initial_capital、cost_model）
+        """
+        if subset not in ('symbols', 'years'):
+            raise ValueError(f"subset 必须是 'symbols' 或 'years'，实际为 {subset!r}")
+        self.data = data
+        self.metric = metric
+        self.subset = subset
+        self.backtester_kwargs = dict(backtester_kwargs or {})
+        # 标的按固定随机顺序排列，保真度越高取得越多，低保真度的子集包含在高保真度的子集中
+        self._symbol_order = [list(data)[k] for k in np.random.default_rng(seed).permutation(len(data))]
+        self._position = {symbol: position for position, symbol in enumerate(data)}
+        self._calendar = _union_index(data.values())
+
+    def subset_data(self, fidelity: float) -> Dict[str, pd.DataFrame]:
+        """
+        按保真度（0~1]选取数据子集
+        """
+        if fidelity >= 1.0:
+            return self.data
+        if self.subset == 'symbols':
+            count = max(1, math.ceil(fidelity * len(self._symbol_order)))
+            return {symbol: self.data[symbol] for symbol in sorted(self._symbol_order[:count], key=self._position.__getitem__)}
+        cutoff = self._calendar[min(int((1.0 - fidelity) * len(self._calendar)), len(self._calendar) - 1)]
+        return {symbol: frame[frame.index >= cutoff] for symbol, frame in self.data.items()}
+
+    def __call__(self, params: Dict, fidelity: float = 1.0) -> float:
+        """
+        在保真度对应的数据子集上回测一组参数，返回目标指标
+        """
+        data = {symbol: frame for symbol, frame in self.subset_data(fidelity).items() if len(frame) > 0}
+        index = _union_index(data.values())
+        end = index[-1] if index[-1].date() > index[0].date() else index[-1] + pd.Timedelta(days=1)
+        backtester = TurtleBacktester(symbols=list(data), start_date=str(index[0].date()),
+                                      end_date=str(end.date()), **self.backtester_kwargs)
+        backtester.data = data
+        backtester.setup_strategy(**params)
+        # 资金为负时年化收益率等指标为 NaN，由 ParameterOptimizer 视为最差结果
+        with np.errstate(invalid='ignore'):
+            metrics = backtester.get_performance_metrics()
+        values = [metrics.get(symbol, {}).get(self.metric, 0.0) for symbol in data]
+        return float(np.mean(values))
+
+
+def _union_index(frames) -> pd.DatetimeIndex:
+    # 合并各标的的日期索引（去重并排序）
+    indexes = [frame.index for frame in frames]
+    if not indexes:
+        return pd.DatetimeIndex([])
+    return indexes[0].append(indexes[1:]).unique().sort_values()
+
+
+def _is_choice(spec) -> bool:
+    return isinstance(spec, list)
+
+
+def _is_int(spec) -> bool:
+    return not _is_choice(spec) and all(isinstance(bound, (int, np.integer)) for bound in spec)
+
+
+class ParameterOptimizer:
+    def __init__(self,
+                 objective: Callable[[Dict, float], float],
+                 search_space: Dict = None,
+                 seed: int = 0,
+                 maximize: bool = True):
+        """
+        初始化参数优化器
+
+        Args:
+            objective: 目标函数 objective(params, fidelity) -> float，如 BacktestObjective
+            search_space: 搜索空间 {参数名: (下限, 上限) 或 [候选值, ...]}，默认为 DEFAULT_SEARCH_SPACE
+            seed: 随机种子，相同种子和目标函数得到相同的搜索日志
+            maximize: 目标值越大越好（False 表示越小越好）
+        """
+        self.objective = objective
+        self.search_space = dict(search_space if search_space is not None else DEFAULT_SEARCH_SPACE)
+        self.seed = seed
+        self.maximize = maximize
+        self.rng = np.random.default_rng(seed)
+        self.log = []           # 搜索日志，每次评估（包括命中缓存的）一条记录
+        self._cache = {}        # (参数, 保真度) -> 目标值
+
+    # ---- 参数编码 ----
+
+    def sample(self) -> Dict:
+        """
+        从搜索空间中均匀采样一组参数
+        """
+        params = {}
+        for name, spec in self.search_space.items():
+            if _is_choice(spec):
+                params[name] = spec[int(self.rng.integers(len(spec)))]
+            elif _is_int(spec):
+                params[name] = int(self.rng.integers(spec[0], spec[1] + 1))
+            else:
+                params[name] = float(self.rng.uniform(spec[0], spec[1]))
+        return params
+
+    def _to_unit(self, name: str, value) -> float:
+        low, high = self.search_space[name]
+        return 0.5 if high == low else (value - low) / (high - low)
+
+    def _from_unit(self, name: str, unit: float):
+        spec = self.search_space[name]
+        value = spec[0] + float(np.clip(unit, 0.0, 1.0)) * (spec[1] - spec[0])
+        return int(round(value)) if _is_int(spec) else value
+
+    # ---- 评估与日志 ----
+
+    def evaluate(self, params: Dict, fidelity: float = 1.0, method: str = 'manual', rung: int = None) -> float:
+        """
+        评估一组参数并写入搜索日志（同一参数和保真度只计算一次）
+
+        NaN 视为最差；正负无穷保留原值参与比较（如没有亏损交易时盈亏比为 inf，最大化时为最优）
+        """
+        key = (tuple(sorted(params.items())), round(fidelity, 12))
+        cached = key in self._cache
+        start = time.perf_counter()
+        if not cached:
+            value = float(self.objective(params, fidelity))
+            if np.isnan(value):
+                value = -np.inf if self.maximize else np.inf
+            self._cache[key] = value
+        value = self._cache[key]
+        self.log.append({
+            'trial': len(self.log),
+            'method': method,
+            'rung': rung,
+            'params': dict(params),
+            'fidelity': fidelity,
+            'value': value,
+            'cached': cached,
+            'elapsed_seconds': 0.0 if cached else time.perf_counter() - start,
+        })
+        return value
+
+    def _score(self, value: float) -> float:
+        return value if self.maximize else -value
+
+    @property
+    def evaluations(self) -> int:
+        """
+        实际计算的评估次数（不含命中缓存的）
+        """
+        return len(self._cache)
+
+    @property
+    def cost(self) -> float:
+        """
+        评估成本：各次实际评估的保真度之和（1.0 相当于一次全数据回测）
+        """
+        return round(float(sum(fidelity for _, fidelity in self._cache)), 10)
+
+    def best(self, fidelity: float = 1.0) -> Dict:
+        """
+        给定保真度下目标值最优的日志记录，没有记录时返回 None
+        """
+        records = [record for record in self.log if record['fidelity'] == fidelity]
+        if not records:
+            return None
+        return max(records, key=lambda record: self._score(record['value']))
+
+    def to_json(self, path: str = None) -> str:
+        """
+        导出搜索日志（JSON），提供 path 时同时写入文件
+        """
+        text = json.dumps({
+            'seed': self.seed,
+            'maximize': self.maximize,
+            'search_space': {name: list(spec) for name, spec in self.search_space.items()},
+            'evaluations': self.evaluations,
+            'cost': self.cost,
+            'best': self.best(),
+            'log': self.log,
+        }, ensure_ascii=False, indent=2, default=lambda value: value.item() if isinstance(value, np.generic) else str(value))
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    # ---- 搜索方法 ----
+
+    def grid_search(self, grid: Dict[str, List], fidelity: float = 1.0) -> Dict:
+        """
+        穷举网格搜索（作为对照基准）
+
+        Args:
+            grid: {参数名: 候选值列表}
+            fidelity: 评估保真度
+
+        Returns:
+            最优记录
+        """
+        names = list(grid)
+        for values in product(*(grid[name] for name in names)):
+            self.evaluate(dict(zip(names, values)), fidelity, method='grid')
+        return self.best(fidelity)
+
+    def random_search(self, n_trials: int, fidelity: float = 1.0) -> Dict:
+        """
+        随机搜索
+
+        Args:
+            n_trials: 采样的参数组数
+            fidelity: 评估保真度
+
+        Returns:
+            最优记录
+        """
+        for _ in range(n_trials):
+            self.evaluate(self.sample(), fidelity, method='random')
+        return self.best(fidelity)
+
+    def successive_halving(self, n_candidates: int = 27, min_fidelity: float = 1 / 9, eta: int = 3) -> Dict:
+        """
+        逐次减半：随机采样 n_candidates 组参数，先在最低保真度上评估，
+        每一轮保留最好的 1/eta 并把保真度提高 eta 倍，最后一轮在全部数据上评估
+
+        Args:
+            n_candidates: 初始候选数量
+            min_fidelity: 第一轮的保真度
+            eta: 每轮的淘汰比例和保真度增长倍数
+
+        Returns:
+            最优记录（保真度 1.0）
+        """
+        if not 0 < min_fidelity <= 1:
+            raise ValueError(f"min_fidelity 必须在 (0, 1] 之间，实际为 {min_fidelity}")
+        n_rungs = max(1, int(round(math.log(1.0 / min_fidelity, eta))) + 1)
+        candidates = [self.sample() for _ in range(n_candidates)]
+        for rung in range(n_rungs):
+            fidelity = 1.0 if rung == n_rungs - 1 else min_fidelity * eta ** rung
+            scores = [self._score(self.evaluate(params, fidelity, method='successive_halving', rung=rung))
+                      for params in candidates]
+            if rung < n_rungs - 1:
+                keep = max(1, len(candidates) // eta)
+                # 稳定排序：得分相同时保留先采样的候选
+                order = sorted(range(len(candidates)), key=lambda k: -scores[k])
+                candidates = [candidates[k] for k in order[:keep]]
+        return self.best(1.0)
+
+    def tpe_search(self,
+                   n_trials: int,
+                   n_startup: int = 10,
+                   gamma: float = 0.25,
+                   n_samples: int = 24,
+                   fidelity: float = 1.0) -> Dict:
+        """
+        TPE 风格的贝叶斯搜索：把已评估的参数按目标值分为好（前 gamma）和差两组，
+        分别用 Parzen 核密度估计 l(x) 和 g(x)，从 l(x) 中采样 n_samples 个候选，
+        选 l(x)/g(x) 最大的一个评估；前 n_startup 次为随机采样
+
+        Args:
+            n_trials: 评估次数（含随机启动）
+            n_startup: 随机启动的评估次数
+            gamma: 好组的比例
+            n_samples: 每次从 l(x) 中采样的候选数量
+            fidelity: 评估保真度
+
+        Returns:
+            最优记录
+        """
+        observations = []
+        for trial in range(n_trials):
+            if trial < n_startup or len(observations) < 2:
+                params = self.sample()
+            else:
+                params = self._tpe_suggest(observations, gamma, n_samples)
+            observations.append((params, self._score(self.evaluate(params, fidelity, method='tpe'))))
+        return self.best(fidelity)
+
+    def _tpe_suggest(self, observations: List, gamma: float, n_samples: int) -> Dict:
+        ranked = sorted(observations, key=lambda item: -item[1])
+        n_good = max(1, int(math.ceil(gamma * len(ranked))))
+        good = [params for params, _ in ranked[:n_good]]
+        bad = [params for params, _ in ranked[n_good:]] or good
+
+        candidates = [{} for _ in range(n_samples)]
+        log_ratio = np.zeros(n_samples)
+        for name, spec in self.search_space.items():
+            if _is_choice(spec):
+                # 离散参数：带平滑的类别分布
+                def probabilities(group):
+                    counts = np.ones(len(spec))
+                    for params in group:
+                        counts[spec.index(params[name])] += 1
+                    return counts / counts.sum()
+                good_p = probabilities(good)
+                bad_p = probabilities(bad)
+                choices = self.rng.choice(len(spec), size=n_samples, p=good_p)
+                for k, choice in enumerate(choices):
+                    candidates[k][name] = spec[int(choice)]
+                log_ratio += np.log(good_p[choices]) - np.log(bad_p[choices])
+            else:
+                # 连续/整数参数：在 [0, 1] 上以好组的观测为中心的高斯核，混入均匀先验
+                good_u = np.array([self._to_unit(name, params[name]) for params in good])
+                bad_u = np.array([self._to_unit(name, params[name]) for params in bad])
+                good_bw = max(0.05, 0.5 * len(good_u) ** -0.2 / 2)
+                bad_bw = max(0.05, 0.5 * len(bad_u) ** -0.2 / 2)
+                centers = good_u[self.rng.integers(len(good_u), size=n_samples)]
+                samples = np.clip(centers + self.rng.normal(0.0, good_bw, size=n_samples), 0.0, 1.0)
+                for k in range(n_samples):
+                    candidates[k][name] = self._from_unit(name, samples[k])
+                # 按取整后的值计算密度，保证打分与实际评估的参数一致
+                snapped = np.array([self._to_unit(name, candidates[k][name]) for k in range(n_samples)])
+                log_ratio += (np.log(self._parzen(snapped, good_u, good_bw)) -
+                              np.log(self._parzen(snapped, bad_u, bad_bw)))
+        return candidates[int(np.argmax(log_ratio))]
+
+    @staticmethod
+    def _parzen(points: np.ndarray, centers: np.ndarray, bandwidth: float) -> np.ndarray:
+        """
+        以 centers 为中心的高斯核密度（混入一个均匀先验分量）
+        """
+        z = (points[:, None] - centers[None, :]) / bandwidth
+        kernel = np.exp(-0.5 * z ** 2) / (bandwidth * math.sqrt(2 * math.pi))
+        return (kernel.sum(axis=1) + 1.0) / (len(centers) + 1)
@@ -0,0 +1,416 @@
+"""
+参考引擎与快速引擎的对拍工具
+
+对同一份行情数据分别用 engine='reference'（逐行实现）和 engine='fast'（数组内核）运行回测，
+逐列比较策略结果、交易记录和权益曲线，报告每一列第一根不一致的K线。
+数据包括随机合成行情和边界情况（缺失K线、日期缺口、价格不变、ATR为0、最后一根K线出场等）。
+
+命令行用法：
+    python src/parity.py --random 2000 --seed 0 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+import numpy as np
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_data import generate_ohlcv
+from turtle_backtest import TurtleBacktester
+
+# 参与对拍的回测结果表
+PARITY_TABLES = ('strategy_results', 'trades', 'equity_curve')
+
+# 默认容差：数值列 |reference - fast| <= atol + rtol * |fast| 视为一致
+DEFAULT_RTOL = 1e-9
+DEFAULT_ATOL = 1e-9
+
+# 随机参数的取值范围（闭区间）
+RANDOM_PARAM_RANGES = {
+    'entry_window': (2, 60),
+    'exit_window': (2, 30),
+    'atr_window': (1, 30),
+    'atr_multiplier': (0.25, 4.0),
+}
+
+_PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+
+def _nan_bars(data: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    # 约 5% 的K线整行缺失
+    data.loc[rng.random(len(data)) < 0.05] = np.nan
+    return data
+
+
+def _nan_close(data: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    # 只有收盘价缺失（最高/最低价仍有效）
+    data.loc[rng.random(len(data)) < 0.05, 'Close'] = np.nan
+    return data
+
+
+def _gaps(data: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    # 随机删除 20% 的K线，再删除一段连续的K线（停牌）
+    keep = rng.random(len(data)) >= 0.2
+    start = int(rng.integers(0, max(1, len(data) - 30)))
+    keep[start:start + 30] = False
+    return data[keep]
+
+
+def _flat(data: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    # 价格全程不变：通道不突破，ATR 为 0
+    data[_PRICE_COLUMNS] = 100.0
+    return data
+
+
+def _zero_atr(data: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    # 中间一段价格不变（ATR 降为 0，头寸规模为 0），之后恢复波动
+    length = max(40, len(data) // 4)
+    start = int(rng.integers(0, max(1, len(data) - length)))
+    data.iloc[start:start + length, [data.columns.get_loc(column) for column in _PRICE_COLUMNS]] = \
+        data['Close'].iloc[start]
+    return data
+
+
+def _spikes(data: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    # 少数K线的最高/最低价大幅外扩，触发止损
+    spikes = rng.random(len(data)) < 0.03
+    data.loc[spikes, 'High'] *= 1.2
+    data.loc[spikes, 'Low'] *= 0.8
+    return data
+
+
+def _last_bar_shock(direction: int) -> Callable:
+    def shock(data: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+        # 最后一根K线跳涨/跳跌 30%：空仓时在最后一根K线入场，持仓时触发止损或出场
+        if len(data) > 1:
+            data.iloc[-1, [data.columns.get_loc(column) for column in _PRICE_COLUMNS]] = \
+                data['Close'].iloc[-2] * (1 + 0.3 * direction)
+        return data
+    return shock
+
+
+def _short(data: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    # K线数少于通道窗口
+    return data.iloc[:int(rng.integers(2, 10))]
+
+
+# 边界情况：名称 -> 对基础行情的变换
+EDGE_CASES = {
+    'nan_bars': _nan_bars,
+    'nan_close': _nan_close,
+    'gaps': _gaps,
+    'flat': _flat,
+    'zero_atr': _zero_atr,
+    'spikes': _spikes,
+    'last_bar_jump': _last_bar_shock(1),
+    'last_bar_crash': _last_bar_shock(-1),
+    'short': _short,
+    'single_bar': lambda data, rng: data.iloc[:1],
+    'empty': lambda data, rng: data.iloc[:0],
+}
+
+
+def edge_case_data(name: str, n_bars: int = 250, seed: int = None) -> pd.DataFrame:
+    """
+    生成一种边界情况的行情数据
+
+    Args:
+        name: EDGE_CASES 中的名称
+        n_bars: 基础行情的K线数量
+        seed: 随机种子
+
+    Returns:
+        价格数据
+    """
+    if name not in EDGE_CASES:
+        raise ValueError(f"未知的边界情况 {name!r}，可选: {sorted(EDGE_CASES)}")
+    rng = np.random.default_rng(seed)
+    data = generate_ohlcv(n_bars, seed=int(rng.integers(2 ** 31)))
+    return EDGE_CASES[name](data, rng)
+
+
+def random_case(seed: int, min_bars: int = 30, max_bars: int = 400,
+                edge_case_prob: float = 0.5) -> Tuple[str, pd.DataFrame, Dict]:
+    """
+    生成一个随机测试用例：随机长度的合成行情、随机策略参数，并以一定概率叠加一种边界情况
+
+    Args:
+        seed: 随机种子（相同种子得到相同的用例）
+        min_bars: 最少K线数量
+        max_bars: 最多K线数量
+        edge_case_prob: 叠加边界情况的概率
+
+    Returns:
+        (用例名称, 价格数据, 策略参数)
+    """
+    rng = np.random.default_rng(seed)
+    data = generate_ohlcv(int(rng.integers(min_bars, max_bars + 1)), seed=int(rng.integers(2 ** 31)))
+    params = {}
+    for name, (low, high) in RANDOM_PARAM_RANGES.items():
+        if isinstance(low, int):
+            params[name] = int(rng.integers(low, high + 1))
+        else:
+            params[name] = round(float(rng.uniform(low, high)), 4)
+
+    label = f"random-{seed}"
+    if rng.random() < edge_case_prob:
+        edge_case = sorted(EDGE_CASES)[int(rng.integers(len(EDGE_CASES)))]
+        data = EDGE_CASES[edge_case](data, rng)
+        label = f"{label}:{edge_case}"
+    return label, data, params
+
+
+def _first_difference(reference, fast, rtol: float, atol: float):
+    """
+    返回两个等长数组第一个不一致的位置，全部一致时返回 None（两边都是 NaN/NaT 视为一致）
+    """
+    reference = np.asarray(reference)
+    fast = np.asarray(fast)
+    if reference.dtype.kind in 'iufb' and fast.dtype.kind in 'iufb':
+        equal = np.isclose(reference.astype(np.float64), fast.astype(np.float64),
+                           rtol=rtol, atol=atol, equal_nan=True)
+    else:
+        equal = (pd.Series(reference) == pd.Series(fast)).to_numpy() | (pd.isna(reference) & pd.isna(fast))
+    if equal.all():
+        return None
+    return int(np.argmin(equal))
+
+
+def _mismatch(table: str, column: str, position, index, reference, fast) -> Dict:
+    return {'table': table, 'column': column, 'position': position, 'index': index,
+            'reference': reference, 'fast': fast}
+
+
+def compare_frames(reference: pd.DataFrame, fast: pd.DataFrame,
+                   rtol: float = DEFAULT_RTOL, atol: float = DEFAULT_ATOL,
+                   table: str = '', check_dtype: bool = True) -> List[Dict]:
+    """
+    逐列比较两个数据框，每一列只报告第一根不一致的K线
+
+    Args:
+        reference: 参考引擎的结果
+        fast: 快速引擎的结果
+        rtol: 数值列的相对容差
+        atol: 数值列的绝对容差
+        table: 表名（写入不一致记录）
+        check_dtype: 是否要求同名列的数据类型相同
+
+    Returns:
+        不一致记录列表，每项包含 table、column、position（行号）、index（索引标签）、reference、fast；
+        列集合、行数或数据类型不同时 column 为 '<columns>'、'<rows>' 或列名，position 为 None
+    """
+    mismatches = []
+    if list(reference.columns) != list(fast.columns):
+        mismatches.append(_mismatch(table, '<columns>', None, None, list(reference.columns), list(fast.columns)))
+    if len(reference) != len(fast):
+        mismatches.append(_mismatch(table, '<rows>', None, None, len(reference), len(fast)))
+        return mismatches
+
+    position = _first_difference(reference.index, fast.index, rtol, atol)
+    if position is not None:
+        mismatches.append(_mismatch(table, '<index>', position, reference.index[position],
+                                    reference.index[position], fast.index[position]))
+
+    for column in reference.columns:
+        if column not in fast.columns:
+            continue
+        reference_values = reference[column]
+        fast_values = fast[column]
+        if check_dtype and reference_values.dtype != fast_values.dtype:
+            mismatches.append(_mismatch(table, column, None, None,
+                                        str(reference_values.dtype), str(fast_values.dtype)))
+            continue
+        position = _first_difference(reference_values.to_numpy(), fast_values.to_numpy(), rtol, atol)
+        if position is not None:
+            mismatches.append(_mismatch(table, column, position, reference.index[position],
+                                        reference_values.iloc[position], fast_values.iloc[position]))
+    return mismatches
+
+
+def _run_engine(data: pd.DataFrame, engine: str, params: Dict, backtester_kwargs: Dict) -> Dict:
+    backtester = TurtleBacktester(symbol='PARITY', engine=engine, **backtester_kwargs)
+    backtester.data = data
+    backtester.setup_strategy(**params)
+    return backtester.run_backtest()
+
+
+def check_parity(data: pd.DataFrame, params: Dict = None, backtester_kwargs: Dict = None,
+                 rtol: float = DEFAULT_RTOL, atol: float = DEFAULT_ATOL) -> List[Dict]:
+    """
+    用两个引擎回测同一份数据并比较结果
+
+    Args:
+        data: 价格数据
+        params: 策略参数（传给 setup_strategy）
+        backtester_kwargs: 其他回测参数（如 fill_model、cost_model、initial_capital）
+        rtol: 数值列的相对容差
+        atol: 数值列的绝对容差
+
+    Returns:
+        不一致记录列表，为空表示两个引擎结果一致；只有一个引擎抛出异常时记录在 table='<error>' 中
+    """
+    params = params or {}
+    backtester_kwargs = backtester_kwargs or {}
+
+    results = {}
+    errors = {}
+    for engine in ('reference', 'fast'):
+        try:
+            results[engine] = _run_engine(data.copy(), engine, params, backtester_kwargs)
+        except Exception as e:
+            errors[engine] = e
+
+    if errors:
+        # 两个引擎抛出同类异常也视为一致
+        reference_error = errors.get('reference')
+        fast_error = errors.get('fast')
+        if type(reference_error) is type(fast_error):
+            return []
+        return [_mismatch('<error>', '<error>', None, None, repr(reference_error), repr(fast_error))]
+
+    mismatches = []
+    for table in PARITY_TABLES:
+        mismatches.extend(compare_frames(results['reference'][table], results['fast'][table],
+                                         rtol=rtol, atol=atol, table=table))
+    return mismatches
+
+
+class ParityReport:
+    def __init__(self):
+        """
+        对拍运行结果
+        """
+        self.cases = 0         # 已运行的用例数
+        self.failures = []     # 不一致的用例：{'case', 'params', 'mismatches'}
+        self.elapsed = 0.0     # 总耗时（秒）
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    def add(self, case: str, params: Dict, mismatches: List[Dict]):
+        self.cases += 1
+        if mismatches:
+            self.failures.append({'case': case, 'params': params, 'mismatches': mismatches})
+
+    def summary(self, max_failures: int = 10) -> str:
+        """
+        文字摘要：总体结果和前 max_failures 个不一致用例的逐列首个差异
+        """
+        lines = [f"对拍 {self.cases} 个用例，不一致 {len(self.failures)} 个，耗时 {self.elapsed:.1f} 秒"]
+        for failure in self.failures[:max_failures]:
+            lines.append(f"  {failure['case']} {failure['params']}")
+            for mismatch in failure['mismatches']:
+                lines.append(f"    {mismatch['table']}.{mismatch['column']} 第 {mismatch['position']} 行"
+                             f"（{mismatch['index']}）: reference={mismatch['reference']!r} "
+                             f"fast={mismatch['fast']!r}")
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return f"ParityReport(cases={self.cases}, failures={len(self.failures)})"
+
+
+def _case_specs(n_random: int, seed: int, edge_cases: bool) -> List[Tuple]:
+    specs = [('edge', name, seed) for name in EDGE_CASES] if edge_cases else []
+    specs.extend(('random', None, seed + k) for k in range(n_random))
+    return specs
+
+
+def _run_case(spec: Tuple, min_bars: int, max_bars: int, backtester_kwargs: Dict,
+              rtol: float, atol: float) -> Tuple[str, Dict, List[Dict]]:
+    """
+    按用例描述生成数据并对拍（模块级函数，可在进程池中执行）
+    """
+    kind, name, case_seed = spec
+    if kind == 'edge':
+        label, data, params = f"edge:{name}", edge_case_data(name, seed=case_seed), {}
+    else:
+        label, data, params = random_case(case_seed, min_bars, max_bars)
+    return label, params, check_parity(data, params, backtester_kwargs, rtol=rtol, atol=atol)
+
+
+def run_parity_suite(n_random: int = 1000,
+                     seed: int = 0,
+                     min_bars: int = 30,
+                     max_bars: int = 400,
+                     edge_cases: bool = True,
+                     backtester_kwargs: Dict = None,
+                     rtol: float = DEFAULT_RTOL,
+                     atol: float = DEFAULT_ATOL,
+                     max_failures: int = None,
+                     max_workers: int = 1,
+                     log: Callable[[str], None] = None) -> ParityReport:
+    """
+    运行对拍：每种边界情况各一个用例，再加 n_random 个随机用例
+
+    Args:
+        n_random: 随机用例数量
+        seed: 随机种子（第 k 个随机用例使用种子 seed + k，可用 random_case 单独复现）
+        min_bars: 随机用例的最少K线数量
+        max_bars: 随机用例的最多K线数量
+        edge_cases: 是否运行固定的边界情况用例
+        backtester_kwargs: 其他回测参数（使用进程池时必须可以 pickle）
+        rtol: 数值列的相对容差
+        atol: 数值列的绝对容差
+        max_failures: 不一致用例达到该数量后提前停止，None 表示全部运行
+        max_workers: 进程数，1 表示在当前进程中串行运行
+        log: 进度输出函数，默认不输出
+
+    Returns:
+        ParityReport（用例按生成顺序记录）
+    """
+    log = log or (lambda message: None)
+    report = ParityReport()
+    start = time.perf_counter()
+
+    specs = _case_specs(n_random, seed, edge_cases)
+    run_case = partial(_run_case, min_bars=min_bars, max_bars=max_bars,
+                       backtester_kwargs=backtester_kwargs, rtol=rtol, atol=atol)
+    executor = ProcessPoolExecutor(max_workers=max_workers) if max_workers != 1 else None
+    try:
+        outcomes = executor.map(run_case, specs, chunksize=16) if executor is not None else map(run_case, specs)
+        for k, (label, params, mismatches) in enumerate(outcomes):
+            report.add(label, params, mismatches)
+            if (k + 1) % 100 == 0:
+                log(f"已对拍 {k + 1}/{len(specs)} 个用例，不一致 {len(report.failures)} 个")
+            if max_failures is not None and len(report.failures) >= max_failures:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="参考引擎与快速引擎的对拍")
+    parser.add_argument('--random', type=int, default=1000, help="随机用例数量")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--min-bars', type=int, default=30, help="随机用例的最少K线数量")
+    parser.add_argument('--max-bars', type=int, default=400, help="随机用例的最多K线数量")
+    parser.add_argument('--no-edge-cases', action='store_true', help="不运行固定的边界情况用例")
+    parser.add_argument('--rtol', type=float, default=DEFAULT_RTOL, help="相对容差")
+    parser.add_argument('--atol', type=float, default=DEFAULT_ATOL, help="绝对容差")
+    parser.add_argument('--max-failures', type=int, default=None, help="不一致用例达到该数量后停止")
+    parser.add_argument('--workers', type=int, default=1, help="进程数（默认串行）")
+    args = parser.parse_args(argv)
+
+    report = run_parity_suite(n_random=args.random, seed=args.seed, min_bars=args.min_bars,
+                              max_bars=args.max_bars, edge_cases=not args.no_edge_cases,
+                              rtol=args.rtol, atol=args.atol, max_failures=args.max_failures,
+                              max_workers=args.workers, log=print)
+    print(report.summary())
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+基于相关性的组合风险限制（海龟法则的单位上限）
+
+海龟法则按相关性限制持仓单位数：单个市场、高度相关的市场组、松散相关的市场组以及单一方向各有上限。
+本模块以增量方式维护滚动收益率的相关矩阵（每根K线只写入环形缓冲区，每次再平衡 O(标的数²)，无需全量重算），
+定期据此划分相关性簇，并对会突破上限的开仓进行拦截或削减。
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List
+
+
+class RollingCorrelation:
+    def __init__(self, n_symbols: int, window: int = 60, resync_every: int = 2000):
+        """
+        增量计算的滚动相关矩阵
+
+        维护窗口内收益率的和与交叉乘积和。每根K线只写入环形缓冲区（O(标的数)），
+        新进入和移出窗口的K线在计算相关矩阵时以一次矩阵乘法批量并入交叉乘积和（O(标的数²)），
+        不会每根K线重算整个窗口；每 resync_every 次更新从缓冲区全量重算一次以消除浮点误差累积。
+
+        Args:
+            n_symbols: 标的数量
+            window: 滚动窗口长度
+            resync_every: 全量重算的间隔（更新次数）
+        """
+        self.n_symbols = n_symbols
+        self.window = window
+        self.resync_every = resync_every
+        self._buffer = np.zeros((window, n_symbols))
+        self._sum = np.zeros(n_symbols)
+        self._cross = np.zeros((n_symbols, n_symbols))
+        self._count = 0
+        self._position = 0
+        self._added = []        # 上次合并后进入窗口的K线
+        self._removed = []      # 上次合并后移出窗口的K线
+        self._since_resync = 0
+
+    @property
+    def count(self) -> int:
+        """
+        窗口内的K线数量
+        """
+        return self._count
+
+    def update(self, returns: np.ndarray):
+        """
+        加入一根K线的收益率（缺失值按0处理）
+        """
+        returns = np.nan_to_num(np.asarray(returns, dtype=np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+        if self._count == self.window:
+            self._removed.append(self._buffer[self._position].copy())
+        else:
+            self._count += 1
+        self._buffer[self._position] = returns
+        self._added.append(returns)
+        self._position = (self._position + 1) % self.window
+
+    def _flush(self):
+        """
+        把尚未合并的K线并入和与交叉乘积和
+        """
+        if not self._added:
+            return
+        self._since_resync += len(self._added)
+        if len(self._added) >= self.window or self._since_resync >= self.resync_every:
+            # 待合并的K线覆盖了整个窗口（移出的K线可能从未并入），或到达重算间隔：从缓冲区全量重算
+            rows = self._buffer[:self._count]
+            self._sum = rows.sum(axis=0)
+            self._cross = rows.T @ rows
+            self._since_resync = 0
+        else:
+            added = np.asarray(self._added)
+            self._sum += added.sum(axis=0)
+            self._cross += added.T @ added
+            if self._removed:
+                removed = np.asarray(self._removed)
+                self._sum -= removed.sum(axis=0)
+                self._cross -= removed.T @ removed
+        self._added = []
+        self._removed = []
+
+    def correlation(self) -> np.ndarray:
+        """
+        当前窗口的相关矩阵；方差为0的标的与其他标的相关系数为0
+        """
+        self._flush()
+        n = max(self._count, 1)
+        mean = self._sum / n
+        # 原地运算，避免在大矩阵上产生多余的临时数组
+        corr = self._cross / n
+        corr -= np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(corr), 0.0, None))
+        inverse = np.zeros_like(std)
+        np.divide(1.0, std, out=inverse, where=std > 0)
+        corr *= inverse[:, None]
+        corr *= inverse[None, :]
+        np.clip(corr, -1.0, 1.0, out=corr)
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+
+def correlation_clusters(corr: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    按相关系数阈值划分簇（领头者聚类）：依次检查每个标的，
+    与某个已有簇的领头标的相关系数超过阈值时加入该簇，否则成为新簇的领头标的
+
+    Args:
+        corr: 相关矩阵
+        threshold: 相关系数阈值
+
+    Returns:
+        每个标的的簇编号
+    """
+    n = len(corr)
+    labels = np.empty(n, dtype=np.int64)
+    leaders = np.empty(n, dtype=np.int64)
+    n_clusters = 0
+    for i in range(n):
+        if n_clusters:
+            scores = corr[i, leaders[:n_clusters]]
+            best = int(np.argmax(scores))
+            if scores[best] >= threshold:
+                labels[i] = best
+                continue
+        leaders[n_clusters] = i
+        labels[i] = n_clusters
+        n_clusters += 1
+    return labels
+
+
+class CorrelationRiskLimiter:
+    def __init__(self,
+                 symbols: List[str],
+                 window: int = 60,
+                 closely_correlated: float = 0.7,
+                 loosely_correlated: float = 0.4,
+                 max_units_per_symbol: float = 4,
+                 max_units_closely_correlated: float = 6,
+                 max_units_loosely_correlated: float = 10,
+                 max_units_per_direction: float = 12,
+                 max_units_total: float = None,
+                 rebalance_every: int = 20,
+                 min_periods: int = 20):
+        """
+        初始化相关性风险限制器（默认上限取自海龟法则）
+
+        Args:
+            symbols: 标的列表
+            window: 计算相关性的滚动窗口
+            closely_correlated: 高度相关的相关系数阈值
+            loosely_correlated: 松散相关的相关系数阈值
+            max_units_per_symbol: 单个标的的单位上限
+            max_units_closely_correlated: 高度相关簇内同方向的单位上限
+            max_units_loosely_correlated: 松散相关簇内同方向的单位上限
+            max_units_per_direction: 单一方向（多头或空头）的单位上限
+            max_units_total: 多空合计的单位上限，None 表示不限制
+            rebalance_every: 重新划分相关性簇的间隔（K线数）
+            min_periods: 划分相关性簇前至少需要的K线数量，之前每个标的自成一簇
+        """
+        self.symbols = list(symbols)
+        self.symbol_index = {symbol: k for k, symbol in enumerate(self.symbols)}
+        self.closely_correlated = closely_correlated
+        self.loosely_correlated = loosely_correlated
+        self.max_units_per_symbol = max_units_per_symbol
+        self.max_units_closely_correlated = max_units_closely_correlated
+        self.max_units_loosely_correlated = max_units_loosely_correlated
+        self.max_units_per_direction = max_units_per_direction
+        self.max_units_total = max_units_total
+        self.rebalance_every = rebalance_every
+        self.min_periods = min_periods
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        """
+        清空持仓、相关性窗口、相关性簇和计数，回到初始状态（每次组合回测开始时调用）
+        """
+        n = len(self.symbols)
+        self.correlation = RollingCorrelation(n, self.window)
+        self.units = np.zeros(n)               # 每个标的的持仓单位（多头为正，空头为负）
+        self.close_cluster = np.arange(n)
+        self.loose_cluster = np.arange(n)
+        self._bars = 0
+        self.blocked = 0                       # 被完全拦截的开仓次数
+        self.trimmed = 0                       # 被削减的开仓次数
+
+    def update(self, returns: np.ndarray):
+        """
+        加入一根K线的收益率，并按 rebalance_every 重新划分相关性簇
+        """
+        self.correlation.update(returns)
+        self._bars += 1
+        if self._bars % self.rebalance_every == 0 and self.correlation.count >= self.min_periods:
+            self.rebalance()
+
+    def rebalance(self):
+        """
+        根据当前相关矩阵重新划分高度相关簇和松散相关簇
+        """
+        corr = self.correlation.correlation()
+        self.close_cluster = correlation_clusters(corr, self.closely_correlated)
+        self.loose_cluster = correlation_clusters(corr, self.loosely_correlated)
+
+    def _directional_units(self, direction: int) -> np.ndarray:
+        return np.clip(self.units * direction, 0.0, None)
+
+    def allowed_units(self, symbol, direction: int, requested: float = 1.0) -> float:
+        """
+        在不突破任何上限的前提下，可以新增的单位数
+
+        Args:
+            symbol: 标的代码或编号
+            direction: 开仓方向（1 多头，-1 空头）
+            requested: 申请的单位数
+
+        Returns:
+            允许的单位数（0 ~ requested）
+        """
+        k = self.symbol_index[symbol] if not isinstance(symbol, (int, np.integer)) else int(symbol)
+        same_direction = self._directional_units(direction)
+        remaining = [
+            requested,
+            self.max_units_per_symbol - same_direction[k],
+            self.max_units_closely_correlated - same_direction[self.close_cluster == self.close_cluster[k]].sum(),
+            self.max_units_loosely_correlated - same_direction[self.loose_cluster == self.loose_cluster[k]].sum(),
+            self.max_units_per_direction - same_direction.sum(),
+        ]
+        if self.max_units_total is not None:
+            remaining.append(self.max_units_total - np.abs(self.units).sum())
+        return float(max(min(remaining), 0.0))
+
+    def request_units(self, symbol, direction: int, requested: float = 1.0) -> float:
+        """
+        申请开仓：计算允许的单位数并计入持仓
+
+        Returns:
+            实际获准的单位数
+        """
+        allowed = self.allowed_units(symbol, direction, requested)
+        if allowed <= 0:
+            self.blocked += 1
+        elif allowed < requested:
+            self.trimmed += 1
+        if allowed > 0:
+            self.add_units(symbol, direction, allowed)
+        return allowed
+
+    def add_units(self, symbol, direction: int, units: float):
+        """
+        计入新增的持仓单位
+        """
+        k = self.symbol_index[symbol] if not isinstance(symbol, (int, np.integer)) else int(symbol)
+        self.units[k] += direction * units
+
+    def remove_units(self, symbol, units: float = None):
+        """
+        减少持仓单位（units 为 None 时平掉该标的的全部持仓）
+        """
+        k = self.symbol_index[symbol] if not isinstance(symbol, (int, np.integer)) else int(symbol)
+        if units is None or units >= abs(self.units[k]):
+            self.units[k] = 0.0
+        else:
+            self.units[k] -= np.sign(self.units[k]) * units
+
+    def apply_to_legs(self,
+                      legs: Dict[str, Dict[str, np.ndarray]],
+                      indexes: Dict[str, pd.DatetimeIndex],
+                      closes: Dict[str, pd.Series],
+                      units_per_leg: float = 1.0) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        按日模拟组合，对各标的的交易（TurtleBacktester._extract_legs 的输出）施加单位上限
+
+        每根K线先用当日收益率更新相关性，再处理平仓，最后按标的顺序处理开仓；
+        被削减的开仓按比例缩小头寸规模，被拦截的开仓从交易中移除。
+        开始前先调用 reset()，同一个限制器重复回测时结果不受上一次的影响。
+
+        Args:
+            legs: {标的代码: 交易数组}
+            indexes: {标的代码: 该标的的K线时间索引}
+            closes: {标的代码: 收盘价序列}
+            units_per_leg: 每笔开仓申请的单位数
+
+        Returns:
+            施加上限后的 {标的代码: 交易数组}
+        """
+        self.reset()
+        indexes_list = [pd.DatetimeIndex(index) for index in indexes.values()]
+        calendar = (indexes_list[0].append(indexes_list[1:]).unique().sort_values()
+                    if indexes_list else pd.DatetimeIndex([]))
+        panel = pd.DataFrame({symbol: closes[symbol] for symbol in self.symbols if symbol in closes})
+        panel = panel.reindex(columns=self.symbols).reindex(calendar)
+        returns = panel.pct_change(fill_method=None).to_numpy()
+
+        # 按K线归集平仓和开仓事件（K线编号换算到共同日历）
+        entries = {}
+        exits = {}
+        for symbol, symbol_legs in legs.items():
+            positions = calendar.get_indexer(indexes[symbol])
+            for leg, (entry, exit_) in enumerate(zip(symbol_legs['entry_idx'], symbol_legs['exit_idx'])):
+                entries.setdefault(positions[entry], []).append((self.symbol_index[symbol], symbol, leg))
+                exits.setdefault(positions[exit_], []).append((self.symbol_index[symbol], symbol, leg))
+
+        scale = {symbol: np.ones(len(symbol_legs['entry_idx'])) for symbol, symbol_legs in legs.items()}
+        granted = {}
+        for bar in range(len(calendar)):
+            self.update(returns[bar])
+            for k, symbol, leg in exits.get(bar, ()):
+                units = granted.pop((symbol, leg), None)
+                if units:
+                    self.remove_units(k, units)
+            for k, symbol, leg in sorted(entries.get(bar, ())):
+                direction = int(legs[symbol]['direction'][leg])
+                units = self.request_units(k, direction, units_per_leg)
+                granted[(symbol, leg)] = units
+                scale[symbol][leg] = units / units_per_leg
+            # 开仓与平仓在同一根K线的交易（如最后一根K线上反手）
+            for k, symbol, leg in exits.get(bar, ()):
+                units = granted.pop((symbol, leg), None)
+                if units:
+                    self.remove_units(k, units)
+
+        limited = {}
+        for symbol, symbol_legs in legs.items():
+            keep = scale[symbol] > 0
+            limited[symbol] = {name: values[keep] for name, values in symbol_legs.items()}
+            limited[symbol]['size'] = symbol_legs['size'][keep] * scale[symbol][keep]
+        return limited
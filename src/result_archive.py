@@ -0,0 +1,384 @@
+"""
+大规模参数扫描的结果归档（内存映射）
+
+目录结构:
+    meta.json           归档元信息（运行数、K线数、指标列、交易列）
+    equity.npy          权益曲线矩阵 (运行 × K线)，float64，内存映射
+    metrics.npy         绩效指标矩阵 (运行 × 指标)，float64，内存映射
+    bar_index.npy       共同的K线时间索引（int64 纳秒，可选）
+    params.jsonl        参数索引：每个已完成的运行一行（含交易记录所在的分片和行偏移）
+    trades/<分片>/<列>.bin  按列追加的交易记录，每个写入进程一个分片
+
+权益和指标按运行编号写入固定位置，多个进程可以并行写入不同的运行；
+交易记录写入各进程自己的分片，参数索引追加时加文件锁。
+同一运行写入多次时以参数索引中的最后一条为准，交易记录只按该条记录的偏移读取，
+先前写入的交易和写入中断（未写入参数索引）的交易都不会被读到。
+读取时所有数组都以内存映射方式打开，可以只读取某个运行或某个指标而不加载整个归档。
+"""
+
+import json
+import os
+import uuid
+import sys
+from typing import Dict, Iterable
+
+import pandas as pd
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，参数索引追加不加锁
+    fcntl = None
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from turtle_backtest import METRIC_LABELS
+
+ARCHIVE_VERSION = 2
+
+# 交易记录的列及存储类型（日期以 int64 纳秒存储）
+TRADE_COLUMNS = (
+    ('run_id', 'int64'),
+    ('Entry_Date', 'int64'),
+    ('Exit_Date', 'int64'),
+    ('Entry_Price', 'float64'),
+    ('Exit_Price', 'float64'),
+    ('Position', 'float64'),
+    ('Profit', 'float64'),
+    ('Return', 'float64'),
+    ('Commission', 'float64'),
+)
+_DATE_COLUMNS = ('Entry_Date', 'Exit_Date')
+
+
+def create_archive(path: str,
+                   n_runs: int,
+                   n_bars: int = None,
+                   bar_index: pd.DatetimeIndex = None,
+                   metric_names: Iterable[str] = METRIC_LABELS) -> 'ResultArchive':
+    """
+    创建新的结果归档
+
+    Args:
+        path: 归档目录
+        n_runs: 运行数量（运行编号为 0 ~ n_runs-1）
+        n_bars: 每条权益曲线的K线数量（提供 bar_index 时可省略）
+        bar_index: 共同的K线时间索引；提供时权益曲线按日期对齐写入
+        metric_names: 需要归档的绩效指标名称
+
+    Returns:
+        打开的归档
+    """
+    if bar_index is not None:
+        bar_index = pd.DatetimeIndex(bar_index)
+        n_bars = len(bar_index)
+    if n_bars is None:
+        raise ValueError("必须提供 n_bars 或 bar_index")
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        raise FileExistsError(f"归档已存在: {path}")
+
+    os.makedirs(os.path.join(path, 'trades'), exist_ok=True)
+    metric_names = list(metric_names)
+    # 文件按固定形状预先分配，未写入的区域不占用磁盘空间（稀疏文件）
+    np.lib.format.open_memmap(os.path.join(path, 'equity.npy'), mode='w+',
+                              dtype=np.float64, shape=(n_runs, n_bars)).flush()
+    np.lib.format.open_memmap(os.path.join(path, 'metrics.npy'), mode='w+',
+                              dtype=np.float64, shape=(n_runs, len(metric_names))).flush()
+    if bar_index is not None:
+        np.save(os.path.join(path, 'bar_index.npy'), bar_index.as_unit('ns').asi8)
+    open(os.path.join(path, 'params.jsonl'), 'a').close()
+
+    meta = {
+        'version': ARCHIVE_VERSION,
+        'n_runs': n_runs,
+        'n_bars': n_bars,
+        'metric_names': metric_names,
+        'trade_columns': [list(column) for column in TRADE_COLUMNS],
+        'aligned': bar_index is not None,
+    }
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return ResultArchive(path)
+
+
+class ResultArchiveWriter:
+    def __init__(self, path: str):
+        """
+        归档写入器：每个进程（或线程）使用自己的写入器
+
+        Args:
+            path: 归档目录
+        """
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.metric_names = self.meta['metric_names']
+        self.trade_columns = [tuple(column) for column in self.meta['trade_columns']]
+        self._equity = np.load(os.path.join(path, 'equity.npy'), mmap_mode='r+')
+        self._metrics = np.load(os.path.join(path, 'metrics.npy'), mmap_mode='r+')
+        bar_index_path = os.path.join(path, 'bar_index.npy')
+        self._bar_index = (pd.DatetimeIndex(np.load(bar_index_path).view('datetime64[ns]'))
+                           if self.meta['aligned'] else None)
+
+        # 本写入器的交易分片
+        self._shard = os.path.join(path, 'trades', f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        self._trade_files = None
+        self._trade_rows = 0
+
+    def _open_trade_files(self):
+        os.makedirs(self._shard, exist_ok=True)
+        self._trade_files = {name: open(os.path.join(self._shard, f"{name}.bin"), 'ab')
+                             for name, _ in self.trade_columns}
+
+    def write_run(self,
+                  run_id: int,
+                  equity_curve,
+                  trades: pd.DataFrame = None,
+                  metrics: Dict = None,
+                  params: Dict = None,
+                  symbol: str = None):
+        """
+        写入一个运行的结果
+
+        Args:
+            run_id: 运行编号
+            equity_curve: 权益曲线（包含 Equity 列的数据框、Series 或数组）
+            trades: 交易记录
+            metrics: 绩效指标字典
+            params: 参数字典（写入参数索引，需可序列化为 JSON）
+            symbol: 标的代码
+        """
+        if not 0 <= run_id < self.meta['n_runs']:
+            raise IndexError(f"run_id {run_id} 超出归档范围 0 ~ {self.meta['n_runs'] - 1}")
+
+        # 权益曲线
+        if isinstance(equity_curve, pd.DataFrame):
+            equity_curve = equity_curve['Equity']
+        row = np.full(self.meta['n_bars'], np.nan)
+        if self._bar_index is not None and isinstance(equity_curve, pd.Series):
+            positions = self._bar_index.get_indexer(pd.DatetimeIndex(equity_curve.index))
+            found = positions >= 0
+            row[positions[found]] = equity_curve.to_numpy(dtype=np.float64)[found]
+        else:
+            values = np.asarray(equity_curve, dtype=np.float64)[:self.meta['n_bars']]
+            row[:len(values)] = values
+        self._equity[run_id] = row
+
+        # 绩效指标
+        metrics = metrics or {}
+        self._metrics[run_id] = [float(metrics.get(name, np.nan)) for name in self.metric_names]
+
+        # 交易记录：先转换好所有列再写入，转换出错时不会只写入部分列
+        n_trades = 0
+        trade_offset = self._trade_rows
+        if trades is not None and not trades.empty:
+            n_trades = len(trades)
+            columns = {}
+            for name, dtype in self.trade_columns:
+                if name == 'run_id':
+                    column = np.full(n_trades, run_id, dtype=np.int64)
+                elif name in _DATE_COLUMNS:
+                    column = pd.DatetimeIndex(trades[name]).as_unit('ns').asi8
+                elif name in trades.columns:
+                    column = trades[name].to_numpy(dtype=dtype)
+                else:
+                    column = np.full(n_trades, np.nan, dtype=dtype)
+                columns[name] = np.ascontiguousarray(column, dtype=dtype)
+            if self._trade_files is None:
+                self._open_trade_files()
+            for name, column in columns.items():
+                self._trade_files[name].write(column.tobytes())
+            for f in self._trade_files.values():
+                f.flush()
+            self._trade_rows += n_trades
+
+        # 参数索引最后写入：出现在索引中的运行即为已完成
+        self._equity.flush()
+        self._metrics.flush()
+        entry = {'run_id': int(run_id), 'symbol': symbol, 'params': params or {}, 'n_trades': n_trades,
+                 'trade_shard': os.path.basename(self._shard), 'trade_offset': trade_offset}
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with open(os.path.join(self.path, 'params.jsonl'), 'a', encoding='utf-8') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(line)
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def write_result(self, run_id: int, result: Dict, metrics: Dict = None, params: Dict = None):
+        """
+        写入 TurtleBacktester 单个标的的回测结果（run_backtest 返回的字典）
+        """
+        self.write_run(run_id, result['equity_curve'], result['trades'], metrics, params, result.get('symbol'))
+
+    def close(self):
+        """
+        刷新并关闭所有文件
+        """
+        self._equity.flush()
+        self._metrics.flush()
+        if self._trade_files is not None:
+            for f in self._trade_files.values():
+                f.close()
+            self._trade_files = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ResultArchive:
+    def __init__(self, path: str):
+        """
+        以只读内存映射方式打开结果归档
+
+        Args:
+            path: 归档目录
+        """
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"归档版本 {self.meta.get('version')} 与当前版本 {ARCHIVE_VERSION} 不兼容: {path}")
+        self.metric_names = self.meta['metric_names']
+        self.trade_columns = [tuple(column) for column in self.meta['trade_columns']]
+        # 参数索引只追加，已解析的部分缓存下来，之后只解析新追加的行
+        self._entries = {}
+        self._index_position = 0
+
+    def writer(self) -> ResultArchiveWriter:
+        """
+        创建写入器（在每个写入进程中调用）
+        """
+        return ResultArchiveWriter(self.path)
+
+    @property
+    def equity(self) -> np.memmap:
+        """
+        权益曲线矩阵 (运行 × K线) 的只读内存映射
+        """
+        return np.load(os.path.join(self.path, 'equity.npy'), mmap_mode='r')
+
+    @property
+    def bar_index(self) -> pd.DatetimeIndex:
+        """
+        共同的K线时间索引，未对齐的归档返回 None
+        """
+        if not self.meta['aligned']:
+            return None
+        return pd.DatetimeIndex(np.load(os.path.join(self.path, 'bar_index.npy')).view('datetime64[ns]'))
+
+    def equity_curve(self, run_id: int) -> pd.Series:
+        """
+        读取单个运行的权益曲线
+        """
+        values = np.array(self.equity[run_id])
+        return pd.Series(values, index=self.bar_index, name='Equity')
+
+    def metric(self, name: str) -> np.ndarray:
+        """
+        读取所有运行的某个绩效指标（未完成的运行为 0，可用 completed_runs 过滤）
+        """
+        column = self.metric_names.index(name)
+        return np.load(os.path.join(self.path, 'metrics.npy'), mmap_mode='r')[:, column]
+
+    def metrics_frame(self, run_ids: Iterable[int] = None) -> pd.DataFrame:
+        """
+        读取指定运行（默认为全部已完成运行）的绩效指标
+        """
+        run_ids = self.completed_runs() if run_ids is None else np.asarray(list(run_ids), dtype=np.int64)
+        metrics = np.load(os.path.join(self.path, 'metrics.npy'), mmap_mode='r')
+        return pd.DataFrame(metrics[run_ids], index=pd.Index(run_ids, name='run_id'), columns=self.metric_names)
+
+    def _index(self) -> Dict[int, Dict]:
+        """
+        参数索引 {运行编号: 最后一次完整写入的记录}，只解析上次读取之后新追加的完整行
+        """
+        with open(os.path.join(self.path, 'params.jsonl'), 'rb') as f:
+            f.seek(self._index_position)
+            chunk = f.read()
+        end = chunk.rfind(b'\n') + 1
+        for line in chunk[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # 空行或写入中断留下的不完整行
+                continue
+            # 重复写入同一运行时以最后一次为准
+            self._entries[entry['run_id']] = entry
+        self._index_position += end
+        return self._entries
+
+    def params(self) -> pd.DataFrame:
+        """
+        读取参数索引（每个已完成的运行一行，参数展开为列）
+        """
+        entries = self._index()
+        if not entries:
+            return pd.DataFrame(columns=['symbol', 'n_trades']).rename_axis('run_id')
+        frame = pd.DataFrame([
+            {'run_id': entry['run_id'], 'symbol': entry['symbol'], 'n_trades': entry['n_trades'], **entry['params']}
+            for entry in entries.values()
+        ])
+        return frame.set_index('run_id').sort_index()
+
+    def completed_runs(self) -> np.ndarray:
+        """
+        已完成运行的编号（升序）
+        """
+        return np.sort(np.fromiter(self._index(), dtype=np.int64))
+
+    def _shard_column(self, shard: str, name: str, dtype: str) -> np.ndarray:
+        file_path = os.path.join(self.path, 'trades', shard, f"{name}.bin")
+        size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        return np.memmap(file_path, dtype=dtype, mode='r') if size else np.empty(0, dtype=dtype)
+
+    def trades(self, run_id: int = None, columns: Iterable[str] = None) -> pd.DataFrame:
+        """
+        读取交易记录
+
+        Args:
+            run_id: 运行编号，None 表示所有已完成运行
+            columns: 需要读取的列（默认全部）
+
+        Returns:
+            交易记录（包含 run_id 列）
+        """
+        dtypes = dict(self.trade_columns)
+        selected = list(columns) if columns is not None else list(dtypes)
+        if 'run_id' not in selected:
+            selected = ['run_id'] + selected
+        entries = self._index()
+        if run_id is not None:
+            entries = [entries[run_id]] if run_id in entries else []
+        else:
+            entries = entries.values()
+
+        # 按参数索引中记录的分片和偏移读取，不扫描分片中的 run_id 列
+        by_shard = {}
+        for entry in entries:
+            if entry['n_trades']:
+                by_shard.setdefault(entry['trade_shard'], []).append(entry)
+        parts = []
+        for shard, shard_entries in by_shard.items():
+            offsets = np.array([entry['trade_offset'] for entry in shard_entries], dtype=np.int64)
+            counts = np.array([entry['n_trades'] for entry in shard_entries], dtype=np.int64)
+            starts = np.cumsum(counts) - counts
+            rows = np.repeat(offsets - starts, counts) + np.arange(counts.sum())
+            parts.append({name: np.asarray(self._shard_column(shard, name, dtypes[name])[rows])
+                          for name in selected})
+
+        if not parts:
+            return pd.DataFrame(columns=selected)
+        frame = pd.DataFrame({name: np.concatenate([part[name] for part in parts]) for name in selected})
+        for name in _DATE_COLUMNS:
+            if name in frame.columns:
+                frame[name] = pd.to_datetime(frame[name].to_numpy().view('datetime64[ns]'))
+        return frame.sort_values(['run_id'] + [name for name in ('Entry_Date',) if name in frame.columns],
+                                 kind='stable').reset_index(drop=True)
@@ -0,0 +1,139 @@
+"""
+合成行情数据生成工具（离线基准测试与随机测试使用）
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict
+
+# 市场状态：(每根K线漂移, 每根K线波动率)，依次为上涨趋势、下跌趋势、震荡
+DEFAULT_REGIMES = (
+    (0.0008, 0.012),
+    (-0.0008, 0.018),
+    (0.0, 0.006),
+)
+
+# 超过该长度时默认改用分钟频率，避免日期超出 pandas 时间戳范围
+MAX_DAILY_BARS = 50_000
+
+
+def _default_freq(n_bars: int) -> str:
+    return 'B' if n_bars <= MAX_DAILY_BARS else 'min'
+
+
+def _simulate_panel(rng: np.random.Generator,
+                    n_symbols: int,
+                    n_bars: int,
+                    start_price: float,
+                    regimes,
+                    switch_prob: float) -> Dict[str, np.ndarray]:
+    """
+    以几何随机游走生成 (标的 × K线) 的 OHLCV 数组，漂移和波动率随市场状态切换
+    """
+    regime_params = np.asarray(regimes, dtype=np.float64)
+    n_regimes = len(regime_params)
+
+    # 市场状态切换：每根K线以 switch_prob 概率跳到随机状态，其余时间保持不变
+    switches = rng.random((n_symbols, n_bars)) < switch_prob
+    switches[:, 0] = True
+    proposed = rng.integers(0, n_regimes, size=(n_symbols, n_bars))
+    last_switch = np.where(switches, np.arange(n_bars), 0)
+    np.maximum.accumulate(last_switch, axis=1, out=last_switch)
+    regime = np.take_along_axis(proposed, last_switch, axis=1)
+    del switches, proposed, last_switch
+
+    mu = regime_params[regime, 0]
+    sigma = regime_params[regime, 1]
+    del regime
+
+    log_returns = mu - 0.5 * sigma ** 2 + sigma * rng.standard_normal((n_symbols, n_bars))
+    log_returns[:, 0] = 0.0
+    close = start_price * np.exp(np.cumsum(log_returns, axis=1))
+    del log_returns, mu
+
+    # 开盘价在前收盘价基础上加入跳空
+    prev_close = np.empty_like(close)
+    prev_close[:, 0] = start_price
+    prev_close[:, 1:] = close[:, :-1]
+    open_ = prev_close * np.exp(0.25 * sigma * rng.standard_normal((n_symbols, n_bars)))
+    del prev_close
+
+    # 最高价/最低价在开盘、收盘的范围外扩展，保证 High >= max(Open, Close)、Low <= min(Open, Close)
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.standard_normal((n_symbols, n_bars))) * sigma * 0.5)
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.standard_normal((n_symbols, n_bars))) * sigma * 0.5)
+    del sigma
+
+    volume = np.round(rng.lognormal(mean=14.0, sigma=0.4, size=(n_symbols, n_bars)))
+
+    return {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}
+
+
+def generate_ohlcv(n_bars: int,
+                   seed: int = None,
+                   start_price: float = 100.0,
+                   start_date: str = '2000-01-03',
+                   freq: str = None,
+                   regimes=DEFAULT_REGIMES,
+                   switch_prob: float = 0.01) -> pd.DataFrame:
+    """
+    生成单个标的的合成 OHLCV 数据
+
+    Args:
+        n_bars: K线数量
+        seed: 随机种子
+        start_price: 初始价格
+        start_date: 起始日期
+        freq: 日期频率，默认日线（超过 MAX_DAILY_BARS 时为分钟线）
+        regimes: 市场状态列表，每项为 (漂移, 波动率)
+        switch_prob: 每根K线切换市场状态的概率
+
+    Returns:
+        与 get_stock_data 返回格式一致的价格数据
+    """
+    rng = np.random.default_rng(seed)
+    panel = _simulate_panel(rng, 1, n_bars, start_price, regimes, switch_prob)
+    index = pd.date_range(start_date, periods=n_bars, freq=freq or _default_freq(n_bars))
+    return pd.DataFrame({column: values[0] for column, values in panel.items()}, index=index)
+
+
+def generate_universe(n_symbols: int,
+                      n_bars: int,
+                      seed: int = None,
+                      start_price: float = 100.0,
+                      start_date: str = '2000-01-03',
+                      freq: str = None,
+                      regimes=DEFAULT_REGIMES,
+                      switch_prob: float = 0.01,
+                      chunk_size: int = 256) -> Dict[str, pd.DataFrame]:
+    """
+    生成多个标的的合成 OHLCV 数据
+
+    Args:
+        n_symbols: 标的数量
+        n_bars: 每个标的的K线数量
+        seed: 随机种子（相同种子得到相同的数据）
+        start_price: 初始价格
+        start_date: 起始日期
+        freq: 日期频率，默认日线（超过 MAX_DAILY_BARS 时为分钟线）
+        regimes: 市场状态列表，每项为 (漂移, 波动率)
+        switch_prob: 每根K线切换市场状态的概率
+        chunk_size: 每批同时生成的标的数量，用于限制峰值内存
+
+    Returns:
+        {标的代码: 价格数据} 字典，标的代码形如 SYM0000
+    """
+    index = pd.date_range(start_date, periods=n_bars, freq=freq or _default_freq(n_bars))
+    width = max(4, len(str(n_symbols - 1)))
+    seeds = np.random.SeedSequence(seed).spawn((n_symbols + chunk_size - 1) // chunk_size)
+
+    universe = {}
+    for chunk, chunk_seed in enumerate(seeds):
+        first = chunk * chunk_size
+        count = min(chunk_size, n_symbols - first)
+        panel = _simulate_panel(np.random.default_rng(chunk_seed), count, n_bars,
+                                start_price, regimes, switch_prob)
+        for k in range(count):
+            symbol = f"SYM{first + k:0{width}d}"
+            universe[symbol] = pd.DataFrame({column: values[k] for column, values in panel.items()},
+                                            index=index)
+    return universe
@@ -4,15 +4,56 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+import copy
 import sys
 import os
 
 # 添加当前目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from turtle_trading_strategy import TurtleTradingStrategy
-from data_utils import get_stock_data
+from turtle_trading_strategy import ENGINES, TurtleTradingStrategy
+import kernels
+from instrumentation import NullProfiler
+from fill_models import FillModel
+from cost_models import CostModel, PercentageCommission, ProportionalSlippage
+
+# get_performance_metrics 返回的绩效指标（按输出顺序）
+METRIC_LABELS = (
+    '初始资金', '最终资金', '总收益率(%)', '年化收益率(%)', '最大回撤(%)',
+    '夏普比率', '索提诺比率', '卡玛比率', '总交易次数', '胜率(%)',
+    '盈利次数', '亏损次数', '平均盈利', '平均亏损', '盈亏比',
+)
+
+# 绩效指标的机器可读名称（导出到其他工具时使用，保持稳定）
+METRIC_KEYS = {
+    '初始资金': 'initial_capital',
+    '最终资金': 'final_capital',
+    '总收益率(%)': 'total_return_pct',
+    '年化收益率(%)': 'annual_return_pct',
+    '最大回撤(%)': 'max_drawdown_pct',
+    '夏普比率': 'sharpe_ratio',
+    '索提诺比率': 'sortino_ratio',
+    '卡玛比率': 'calmar_ratio',
+    '总交易次数': 'total_trades',
+    '胜率(%)': 'win_rate_pct',
+    '盈利次数': 'winning_trades',
+    '亏损次数': 'losing_trades',
+    '平均盈利': 'avg_win',
+    '平均亏损': 'avg_loss',
+    '盈亏比': 'profit_factor',
+}
+
+EXECUTORS = ('serial', 'thread', 'process')
+
+
+def _backtest_symbol_task(backtester, symbol: str, data: pd.DataFrame) -> Dict:
+    """
+    进程池模式下在工作进程中回测单个标的（模块级函数，可被 pickle）
+    """
+    result, _ = backtester._backtest_symbol(symbol, data)
+    return result
 
 
 class TurtleBacktester:
@@ -24,7 +65,16 @@ class TurtleBacktester:
                  initial_capital: float = 100000.0,
                  commission_rate: float = 0.001,
                  slippage: float = 0.001,
-                 contract_size: float = 1.0):
+                 contract_size: float = 1.0,
+                 profiler=None,
+                 fill_model: FillModel = None,
+                 cost_model: CostModel = None,
+                 risk_limiter=None,
+                 engine: str = 'fast',
+                 executor: str = 'serial',
+                 max_workers: int = None,
+                 normalize: bool = False,
+                 cache_dir: str = None):
         """
         初始化回测引擎（支持多股票）
         
@@ -37,7 +87,27 @@ class TurtleBacktester:
             commission_rate: 手续费率
             slippage: 滑点
             contract_size: 合约乘数
+            profiler: 分阶段性能分析器（如 instrumentation.PipelineProfiler），默认不记录
+            fill_model: 成交价格模型，默认按信号K线的收盘价成交
+            cost_model: 交易成本模型，默认由 commission_rate 和 slippage 构造按比例收取的手续费和滑点
+            risk_limiter: 组合风险限制器（如 portfolio_risk.CorrelationRiskLimiter），仅多股票模式使用，
+                          在共同日历上按相关性簇和总单位上限拦截或削减开仓；需要在同一进程内看到所有标的的
+                          交易，不能与 executor='process' 同时使用（executor='thread' 时各标的的信号和结算
+                          仍在线程池中执行）
+            engine: 指标、信号、交易提取和权益曲线的计算引擎，'fast'（数组内核，未安装 numba 时使用 pandas/逐行实现）
+                    或 'reference'（逐行实现）
+            executor: 多股票模式下各标的的执行方式，'serial'、'thread'（线程池，共享内存中的数据，
+                      内核编译后释放 GIL）或 'process'（进程池，数据需复制到各进程）
+            max_workers: 线程池或进程池的大小，默认为 CPU 核数
+            normalize: 加载数据后是否规范化（去时区、去重、复权、填充缺失K线并对齐到共同日历）
+            cache_dir: 原始数据缓存目录，指定时下载结果和规范化结果都缓存在该目录下
         """
+        if engine not in ENGINES:
+            raise ValueError(f"engine 必须是 {ENGINES} 之一，实际为 {engine!r}")
+        if executor not in EXECUTORS:
+            raise ValueError(f"executor 必须是 {EXECUTORS} 之一，实际为 {executor!r}")
+        if risk_limiter is not None and executor == 'process':
+            raise ValueError("risk_limiter 不能与 executor='process' 同时使用，请使用 'serial' 或 'thread'")
         # 处理单股票或多股票参数
         if symbols:
             self.symbols = symbols
@@ -55,6 +125,17 @@ class TurtleBacktester:
         self.commission_rate = commission_rate
         self.slippage = slippage
         self.contract_size = contract_size
+        self.profiler = profiler if profiler is not None else NullProfiler()
+        self.fill_model = fill_model if fill_model is not None else FillModel()
+        if cost_model is None:
+            cost_model = CostModel(PercentageCommission(commission_rate), ProportionalSlippage(slippage))
+        self.cost_model = cost_model
+        self.risk_limiter = risk_limiter
+        self.engine = engine
+        self.executor = executor
+        self.max_workers = max_workers
+        self.normalize = normalize
+        self.cache_dir = cache_dir
         self.data = None
         self.strategy = None
         self.results = None
@@ -66,14 +147,33 @@ class TurtleBacktester:
         Returns:
             是否成功加载数据
         """
+        # 数据源在首次使用时才导入，仅使用已有数据回测时无需加载数据供应商的依赖
+        symbols = self.symbols if self.symbols else [self.symbol]
+        if self.cache_dir:
+            from data_normalization import load_normalized, load_raw_data
+            if self.normalize:
+                # 规范化结果命中缓存时不读取原始数据
+                data = load_normalized(symbols, self.start_date, self.end_date, self.cache_dir)
+            else:
+                data = load_raw_data(symbols, self.start_date, self.end_date, self.cache_dir)
+        else:
+            if self.symbols:
+                from data_utils import get_multiple_stocks_data
+                data = get_multiple_stocks_data(self.symbols, self.start_date, self.end_date)
+            else:
+                from data_utils import get_stock_data
+                data = {self.symbol: get_stock_data(self.symbol, self.start_date, self.end_date)}
+            if self.normalize:
+                from data_normalization import normalize_universe
+                data = normalize_universe(data)
+
         if self.symbols:
             # 多股票模式
-            from data_utils import get_multiple_stocks_data
-            self.data = get_multiple_stocks_data(self.symbols, self.start_date, self.end_date)
+            self.data = data
             return len(self.data) > 0
         else:
             # 单股票模式
-            self.data = get_stock_data(self.symbol, self.start_date, self.end_date)
+            self.data = data.get(self.symbol, pd.DataFrame())
             return not self.data.empty
     
     def setup_strategy(self, **kwargs):
@@ -81,8 +181,9 @@ class TurtleBacktester:
         设置策略参数
         
         Args:
-            **kwargs: 策略参数
+            **kwargs: 策略参数（未指定 engine 时使用回测引擎的 engine）
         """
+        kwargs.setdefault('engine', self.engine)
         self.strategy = TurtleTradingStrategy(**kwargs)
     
     def run_backtest(self) -> Dict:
@@ -93,7 +194,10 @@ class TurtleBacktester:
             回测结果
         """
         if self.data is None:
-            if not self.load_data():
+            with self.profiler.stage('load_data') as record:
+                loaded = self.load_data()
+                record['rows'] = self._count_rows()
+            if not loaded:
                 return {}
         
         if self.strategy is None:
@@ -101,155 +205,282 @@ class TurtleBacktester:
         
         # 多股票模式
         if self.symbols:
-            results = {}
-            for symbol, data in self.data.items():
-                # 运行策略
-                strategy_results = self.strategy.run_strategy(
-                    data, 
-                    self.initial_capital, 
-                    self.contract_size
-                )
-                
-                # 计算交易记录
-                trades = self._calculate_trades(strategy_results)
-                
-                # 计算账户权益
-                equity_curve = self._calculate_equity_curve(trades, strategy_results)
-                
-                # 合并结果
-                result_data = pd.concat([strategy_results, equity_curve], axis=1)
-                
-                results[symbol] = {
-                    'symbol': symbol,
-                    'initial_capital': self.initial_capital,
-                    'final_capital': equity_curve['Equity'].iloc[-1] if not equity_curve.empty else self.initial_capital,
-                    'total_return': (equity_curve['Equity'].iloc[-1] / self.initial_capital - 1) * 100 if not equity_curve.empty else 0,
-                    'trades': trades,
-                    'equity_curve': equity_curve,
-                    'strategy_results': strategy_results
-                }
-            return results
+            if self.risk_limiter is not None:
+                return self._run_portfolio_backtest()
+            if self.executor == 'process':
+                return self._run_process_pool()
+            symbols = list(self.data)
+            results = self._map_symbols(lambda symbol: self._backtest_symbol(symbol, self.data[symbol])[0], symbols)
+            return dict(zip(symbols, results))
         else:
             # 单股票模式
-            strategy_results = self.strategy.run_strategy(
-                self.data, 
+            result, self.results = self._backtest_symbol(self.symbol, self.data)
+            return result
+    
+    def _count_rows(self) -> int:
+        """
+        统计已加载数据的总行数
+        """
+        if isinstance(self.data, dict):
+            return sum(len(data) for data in self.data.values())
+        return len(self.data) if self.data is not None else 0
+    
+    def _backtest_symbol(self, symbol: str, data: pd.DataFrame) -> Tuple[Dict, pd.DataFrame]:
+        """
+        对单个标的运行策略并计算交易记录和权益曲线
+        
+        Args:
+            symbol: 标的代码
+            data: 价格数据
+            
+        Returns:
+            (回测结果字典, 策略结果与权益曲线合并后的数据框)
+        """
+        strategy_results = self._run_strategy(symbol, data)
+        return self._finish_symbol(symbol, strategy_results, self._extract_legs(strategy_results))
+    
+    def _run_portfolio_backtest(self) -> Dict:
+        """
+        多股票组合回测：先得到各标的的交易，再由风险限制器在共同日历上统一拦截或削减开仓
+        
+        Returns:
+            {标的代码: 回测结果字典}
+        """
+        symbols = list(self.data)
+        strategy_results = dict(zip(symbols, self._map_symbols(
+            lambda symbol: self._run_strategy(symbol, self.data[symbol]), symbols)))
+        legs = {symbol: self._extract_legs(frame) for symbol, frame in strategy_results.items()}
+        
+        with self.profiler.stage('risk_limits', None, self._count_rows()):
+            legs = self.risk_limiter.apply_to_legs(
+                legs,
+                {symbol: frame.index for symbol, frame in strategy_results.items()},
+                {symbol: frame['Close'] for symbol, frame in strategy_results.items()}
+            )
+        
+        results = self._map_symbols(
+            lambda symbol: self._finish_symbol(symbol, strategy_results[symbol], legs[symbol])[0], symbols)
+        return dict(zip(symbols, results))
+    
+    def _map_symbols(self, func: Callable, symbols: List[str]) -> List:
+        """
+        对每个标的执行 func，线程池模式下并行执行，结果按 symbols 的顺序返回
+        """
+        if self.executor == 'thread' and len(symbols) > 1:
+            # 峰值内存是进程级的，并行的阶段会互相重置峰值，线程池中不记录各阶段的峰值内存
+            with self.profiler.memory_paused(), ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                return list(executor.map(func, symbols))
+        return [func(symbol) for symbol in symbols]
+    
+    def _run_process_pool(self) -> Dict:
+        """
+        在进程池中回测各标的（价格数据和回测引擎被复制到工作进程，分析器记录不会传回）
+        """
+        worker = copy.copy(self)
+        worker.data = None
+        worker.profiler = NullProfiler()
+        worker.executor = 'serial'
+        symbols = list(self.data)
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(_backtest_symbol_task, worker, symbol, self.data[symbol]) for symbol in symbols]
+            return {symbol: future.result() for symbol, future in zip(symbols, futures)}
+    
+    def _run_strategy(self, symbol: str, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        生成交易信号并计算头寸规模
+        """
+        profiler = self.profiler
+        rows = len(data)
+        
+        # 运行策略
+        with profiler.stage('generate_signals', symbol, rows):
+            signals = self.strategy.generate_signals(data)
+        with profiler.stage('position_sizing', symbol, rows):
+            return self.strategy.calculate_position_size(
+                signals, 
                 self.initial_capital, 
                 self.contract_size
             )
-            
-            # 计算交易记录
-            trades = self._calculate_trades(strategy_results)
-            
-            # 计算账户权益
+    
+    def _finish_symbol(self, symbol: str, strategy_results: pd.DataFrame,
+                       legs: Dict[str, np.ndarray]) -> Tuple[Dict, pd.DataFrame]:
+        """
+        由交易数组计算交易记录和权益曲线，并组装回测结果
+        """
+        profiler = self.profiler
+        rows = len(strategy_results)
+        
+        # 计算交易记录
+        with profiler.stage('calculate_trades', symbol, rows):
+            trades = self._price_legs(legs, strategy_results)
+        
+        # 计算账户权益
+        with profiler.stage('equity_curve', symbol, rows):
             equity_curve = self._calculate_equity_curve(trades, strategy_results)
-            
-            # 合并结果
-            self.results = pd.concat([strategy_results, equity_curve], axis=1)
-            
-            return {
-                'symbol': self.symbol,
-                'initial_capital': self.initial_capital,
-                'final_capital': equity_curve['Equity'].iloc[-1] if not equity_curve.empty else self.initial_capital,
-                'total_return': (equity_curve['Equity'].iloc[-1] / self.initial_capital - 1) * 100 if not equity_curve.empty else 0,
-                'trades': trades,
-                'equity_curve': equity_curve,
-                'strategy_results': strategy_results
-            }
+        
+        # 合并结果
+        result_data = pd.concat([strategy_results, equity_curve], axis=1)
+        
+        result = {
+            'symbol': symbol,
+            'initial_capital': self.initial_capital,
+            'final_capital': equity_curve['Equity'].iloc[-1] if not equity_curve.empty else self.initial_capital,
+            'total_return': (equity_curve['Equity'].iloc[-1] / self.initial_capital - 1) * 100 if not equity_curve.empty else 0,
+            'trades': trades,
+            'equity_curve': equity_curve,
+            'strategy_results': strategy_results
+        }
+        return result, result_data
     
     def _calculate_trades(self, strategy_results: pd.DataFrame) -> pd.DataFrame:
         """
         根据策略信号计算交易记录
         
+        先从信号中提取每笔交易的开仓/平仓K线，再由成交模型和成本模型对全部交易一次性计算价格与成本。
+        
         Args:
             strategy_results: 策略结果
             
         Returns:
             交易记录
         """
-        trades = []
-        position = 0
-        entry_price = 0.0
-        entry_date = None
+        legs = self._extract_legs(strategy_results)
+        return self._price_legs(legs, strategy_results)
+    
+    def _extract_legs(self, strategy_results: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        从策略信号中提取交易（开仓K线、平仓K线、方向、头寸规模）
         
-        for i, (date, row) in enumerate(strategy_results.iterrows()):
-            signal = row['Signal']
-            close_price = row['Close']
-            position_size = row['Position_Size']
+        与信号方向相反的信号平掉当前持仓，并在同一根K线按该信号方向开新仓；
+        头寸规模为0的开仓信号不产生持仓；回测结束时仍未平仓的持仓在最后一根K线平仓。
+        
+        Args:
+            strategy_results: 策略结果
+            
+        Returns:
+            交易数组字典：entry_idx、exit_idx、direction、size、forced_exit
+        """
+        signal = strategy_results['Signal'].to_numpy()
+        position_size = strategy_results['Position_Size'].to_numpy(dtype=np.float64)
+        
+        if kernels.use_kernels(self.engine):
+            entry_idx, exit_idx, direction, size, forced_exit = kernels.leg_arrays(signal, position_size)
+            return {
+                'entry_idx': entry_idx,
+                'exit_idx': exit_idx,
+                'direction': direction,
+                'size': size,
+                'forced_exit': forced_exit
+            }
+        
+        entry_idx = []
+        exit_idx = []
+        direction = []
+        size = []
+        
+        position = 0.0
+        entry = -1
+        # 只需遍历有信号的K线
+        for i in np.flatnonzero(signal).tolist():
+            current_signal = signal[i]
             
             # 如果有信号且与当前持仓方向相反，则平仓
-            if position != 0 and (
-                (position > 0 and signal == -1) or  # 多头持仓，收到平仓/反向信号
-                (position < 0 and signal == 1)      # 空头持仓，收到平仓/反向信号
-            ):
-                # 计算滑点后的退出价格
-                exit_price = close_price * (1 - self.slippage) if position > 0 else close_price * (1 + self.slippage)
-                
-                # 计算毛利润
-                profit = (exit_price - entry_price) * position * self.contract_size
-                
-                # 计算手续费
-                commission = (entry_price * abs(position) * self.contract_size + 
-                              exit_price * abs(position) * self.contract_size) * self.commission_rate
-                
-                # 计算净利润
-                net_profit = profit - commission
-                
-                trades.append({
-                    'Entry_Date': entry_date,
-                    'Exit_Date': date,
-                    'Entry_Price': entry_price,
-                    'Exit_Price': exit_price,
-                    'Position': position,
-                    'Profit': net_profit,
-                    'Return': (exit_price / entry_price - 1) * 100 if position > 0 else (entry_price / exit_price - 1) * 100
-                })
-                
-                # 重置持仓
-                position = 0
-                entry_price = 0.0
-                entry_date = None
+            if (position > 0 and current_signal == -1) or (position < 0 and current_signal == 1):
+                entry_idx.append(entry)
+                exit_idx.append(i)
+                direction.append(1 if position > 0 else -1)
+                size.append(abs(position))
+                position = 0.0
             
             # 如果无持仓且有入场信号，则开仓
-            if position == 0 and signal != 0:
-                # 确定新持仓方向和带滑点的入场价格
-                if signal == 1:
-                    position = position_size
-                    entry_price = close_price * (1 + self.slippage)
-                else:
-                    position = -position_size
-                    entry_price = close_price * (1 - self.slippage)
-                
-                entry_date = date
+            if position == 0:
+                position = position_size[i] if current_signal == 1 else -position_size[i]
+                entry = i
         
         # 如果还有未平仓的仓位，在最后一天平仓
-        if position != 0 and entry_date is not None:
-            last_date = strategy_results.index[-1]
-            last_price = strategy_results['Close'].iloc[-1]
-            
-            # 计算滑点后的退出价格
-            exit_price = last_price * (1 - self.slippage) if position > 0 else last_price * (1 + self.slippage)
-            
-            # 计算毛利润
-            profit = (exit_price - entry_price) * position * self.contract_size
-            
-            # 计算手续费
-            commission = (entry_price * abs(position) * self.contract_size + 
-                          exit_price * abs(position) * self.contract_size) * self.commission_rate
-            
-            # 计算净利润
-            net_profit = profit - commission
+        forced_exit = np.zeros(len(entry_idx) + (position != 0), dtype=bool)
+        if position != 0:
+            entry_idx.append(entry)
+            exit_idx.append(len(signal) - 1)
+            direction.append(1 if position > 0 else -1)
+            size.append(abs(position))
+            forced_exit[-1] = True
+        
+        return {
+            'entry_idx': np.asarray(entry_idx, dtype=np.int64),
+            'exit_idx': np.asarray(exit_idx, dtype=np.int64),
+            'direction': np.asarray(direction, dtype=np.int64),
+            'size': np.asarray(size, dtype=np.float64),
+            'forced_exit': forced_exit
+        }
+    
+    def _price_legs(self, legs: Dict[str, np.ndarray], strategy_results: pd.DataFrame) -> pd.DataFrame:
+        """
+        使用成交模型和成本模型对全部交易一次性计算成交价、手续费和盈亏
+        
+        Args:
+            legs: _extract_legs 返回的交易数组
+            strategy_results: 策略结果
             
-            trades.append({
-                'Entry_Date': entry_date,
-                'Exit_Date': last_date,
-                'Entry_Price': entry_price,
-                'Exit_Price': exit_price,
-                'Position': position,
-                'Profit': net_profit,
-                'Return': (exit_price / entry_price - 1) * 100 if position > 0 else (entry_price / exit_price - 1) * 100
-            })
-        
-        return pd.DataFrame(trades)
+        Returns:
+            交易记录
+        """
+        if len(legs['entry_idx']) == 0:
+            return pd.DataFrame()
+        
+        entry_idx = legs['entry_idx']
+        exit_idx = legs['exit_idx']
+        direction = legs['direction']
+        cost_model = self.cost_model
+        
+        # 由成交模型一次性计算所有K线的成交价格（未计滑点）
+        fill_prices = self.fill_model.fill_prices(strategy_results)
+        close = strategy_results['Close'].to_numpy(dtype=np.float64)
+        atr = strategy_results['ATR'].to_numpy(dtype=np.float64) if 'ATR' in strategy_results.columns else np.full(len(close), np.nan)
+        volume = strategy_results['Volume'].to_numpy(dtype=np.float64) if 'Volume' in strategy_results.columns else None
+        
+        # 按平均日成交量限制头寸规模
+        size = legs['size']
+        if cost_model.max_volume_participation is not None:
+            if volume is None:
+                raise ValueError("max_volume_participation 需要数据包含 Volume 列")
+            adv = cost_model.average_daily_volume(volume)
+            size = cost_model.cap_quantity(size * self.contract_size, adv[entry_idx]) / self.contract_size
+        quantity = size * self.contract_size
+        
+        # 强制平仓按最后一根K线的收盘价成交
+        raw_entry = fill_prices[entry_idx]
+        raw_exit = np.where(legs['forced_exit'], close[exit_idx], fill_prices[exit_idx])
+        
+        # 计算滑点后的入场/退出价格：开仓方向与持仓方向相同，平仓方向相反
+        entry_price = cost_model.slippage.apply(raw_entry, direction, quantity, atr[entry_idx],
+                                                None if volume is None else volume[entry_idx])
+        exit_price = cost_model.slippage.apply(raw_exit, -direction, quantity, atr[exit_idx],
+                                               None if volume is None else volume[exit_idx])
+        
+        # 计算毛利润、手续费和净利润
+        position = direction * size
+        profit = (exit_price - entry_price) * position * self.contract_size
+        commission = (cost_model.commission.compute(entry_price * quantity, quantity) +
+                      cost_model.commission.compute(exit_price * quantity, quantity))
+        net_profit = profit - commission
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            trade_return = np.where(direction > 0,
+                                    (exit_price / entry_price - 1) * 100,
+                                    (entry_price / exit_price - 1) * 100)
+        
+        index = strategy_results.index
+        return pd.DataFrame({
+            'Entry_Date': index[entry_idx],
+            'Exit_Date': index[exit_idx],
+            'Entry_Price': entry_price,
+            'Exit_Price': exit_price,
+            'Position': position,
+            'Profit': net_profit,
+            'Return': trade_return,
+            'Commission': commission
+        })
     
     def _calculate_equity_curve(self, trades: pd.DataFrame, strategy_results: pd.DataFrame) -> pd.DataFrame:
         """
@@ -269,22 +500,38 @@ class TurtleBacktester:
         if trades.empty:
             return equity_curve
         
-        # 计算每日权益变化
+        if kernels.use_kernels(self.engine) and isinstance(strategy_results.index, pd.DatetimeIndex):
+            # 时间统一换算为纳秒整数后交给内核
+            bar_keys = strategy_results.index.as_unit('ns').asi8
+            exit_keys = pd.DatetimeIndex(trades['Exit_Date']).as_unit('ns').asi8
+            equity, returns = kernels.equity_arrays(bar_keys, exit_keys, trades['Profit'].to_numpy(),
+                                                    self.initial_capital)
+            equity_curve['Equity'] = equity
+            equity_curve['Returns'] = returns
+            return equity_curve
+        
+        # 计算每日权益变化（逐行参考实现，先写入列表再一次性赋值）
+        exit_dates = trades['Exit_Date'].tolist()
+        profits = trades['Profit'].tolist()
+        equity = []
+        returns = [0.0] * len(strategy_results)
         current_capital = self.initial_capital
         trade_idx = 0
         
-        for i, (date, row) in enumerate(strategy_results.iterrows()):
+        for i, date in enumerate(strategy_results.index):
             # 检查是否有交易在当天平仓
-            if trade_idx < len(trades) and date >= trades.iloc[trade_idx]['Exit_Date']:
-                current_capital += trades.iloc[trade_idx]['Profit']
+            if trade_idx < len(exit_dates) and date >= exit_dates[trade_idx]:
+                current_capital += profits[trade_idx]
                 trade_idx += 1
             
-            equity_curve.loc[date, 'Equity'] = current_capital
+            equity.append(current_capital)
             if i > 0:
-                prev_equity = equity_curve.iloc[i-1]['Equity']
+                prev_equity = equity[i-1]
                 if prev_equity != 0:
-                    equity_curve.loc[date, 'Returns'] = (current_capital / prev_equity - 1) * 100
+                    returns[i] = (current_capital / prev_equity - 1) * 100
         
+        equity_curve['Equity'] = np.array(equity, dtype=np.float64)
+        equity_curve['Returns'] = np.array(returns, dtype=np.float64)
         return equity_curve
     
     def get_performance_metrics(self) -> Dict:
@@ -301,134 +548,90 @@ class TurtleBacktester:
         if self.symbols:
             metrics = {}
             for symbol, result in backtest_result.items():
-                trades = result['trades']
-                equity_curve = result['equity_curve']
-                
-                if trades.empty or equity_curve.empty:
-                    continue
-                
-                # 计算绩效指标
-                total_return = result['total_return']
-                final_capital = result['final_capital']
-                
-                # 计算年化收益率
-                days = (pd.to_datetime(self.end_date) - pd.to_datetime(self.start_date)).days
-                annual_return = (final_capital / self.initial_capital) ** (365.25 / days) - 1
-                annual_return_percent = annual_return * 100
-                
-                # 计算最大回撤
-                equity = equity_curve['Equity']
-                rolling_max = equity.expanding().max()
-                drawdown = (equity - rolling_max) / rolling_max * 100
-                max_drawdown = drawdown.min()
-                
-                # 计算夏普比率（简化计算，无风险收益率设为0）
-                returns = equity_curve['Returns']
-                sharpe_ratio = (returns.mean() / returns.std()) * np.sqrt(252) if returns.std() != 0 else 0
-
-                # 计算索提诺比率
-                downside_returns = returns[returns < 0]
-                downside_std = downside_returns.std()
-                sortino_ratio = (returns.mean() / downside_std) * np.sqrt(252) if downside_std != 0 else 0
-
-                # 计算卡玛比率
-                calmar_ratio = annual_return_percent / abs(max_drawdown) if max_drawdown != 0 else 0
-                
-                # 交易统计
-                total_trades = len(trades)
-                winning_trades = len(trades[trades['Profit'] > 0])
-                losing_trades = len(trades[trades['Profit'] < 0])
-                win_rate = winning_trades / total_trades * 100 if total_trades > 0 else 0
-                
-                # 平均盈亏
-                avg_win = trades[trades['Profit'] > 0]['Profit'].mean() if winning_trades > 0 else 0
-                avg_loss = trades[trades['Profit'] < 0]['Profit'].mean() if losing_trades > 0 else 0
-                profit_factor = abs(avg_win / avg_loss) if avg_loss != 0 else float('inf')
-                
-                metrics[symbol] = {
-                    '初始资金': self.initial_capital,
-                    '最终资金': final_capital,
-                    '总收益率(%)': total_return,
-                    '年化收益率(%)': annual_return_percent,
-                    '最大回撤(%)': max_drawdown,
-                    '夏普比率': sharpe_ratio,
-                    '索提诺比率': sortino_ratio,
-                    '卡玛比率': calmar_ratio,
-                    '总交易次数': total_trades,
-                    '胜率(%)': win_rate,
-                    '盈利次数': winning_trades,
-                    '亏损次数': losing_trades,
-                    '平均盈利': avg_win,
-                    '平均亏损': avg_loss,
-                    '盈亏比': profit_factor
-                }
+                with self.profiler.stage('performance_metrics', symbol, len(result['equity_curve'])):
+                    symbol_metrics = self._calculate_metrics(result)
+                if symbol_metrics:
+                    metrics[symbol] = symbol_metrics
             return metrics
         else:
             # 单股票模式
             if self.results is None:
                 return {}
             
-            trades = backtest_result['trades']
-            equity_curve = backtest_result['equity_curve']
-            
-            if trades.empty or equity_curve.empty:
-                return {}
-            
-            # 计算绩效指标
-            total_return = backtest_result['total_return']
-            final_capital = backtest_result['final_capital']
-            
-            # 计算年化收益率
-            days = (pd.to_datetime(self.end_date) - pd.to_datetime(self.start_date)).days
-            annual_return = (final_capital / self.initial_capital) ** (365.25 / days) - 1
-            annual_return_percent = annual_return * 100
-            
-            # 计算最大回撤
-            equity = equity_curve['Equity']
-            rolling_max = equity.expanding().max()
-            drawdown = (equity - rolling_max) / rolling_max * 100
-            max_drawdown = drawdown.min()
+            with self.profiler.stage('performance_metrics', self.symbol, len(backtest_result['equity_curve'])):
+                return self._calculate_metrics(backtest_result)
+    
+    def _calculate_metrics(self, result: Dict) -> Dict:
+        """
+        根据单个标的的回测结果计算绩效指标
+        
+        Args:
+            result: 单个标的的回测结果（run_backtest 返回的字典）
             
-            # 计算夏普比率（简化计算，无风险收益率设为0）
-            returns = equity_curve['Returns']
-            sharpe_ratio = (returns.mean() / returns.std()) * np.sqrt(252) if returns.std() != 0 else 0
+        Returns:
+            绩效指标字典，无交易时返回空字典
+        """
+        trades = result['trades']
+        equity_curve = result['equity_curve']
+        
+        if trades.empty or equity_curve.empty:
+            return {}
+        
+        # 计算绩效指标
+        total_return = result['total_return']
+        final_capital = result['final_capital']
+        
+        # 计算年化收益率
+        days = (pd.to_datetime(self.end_date) - pd.to_datetime(self.start_date)).days
+        annual_return = (final_capital / self.initial_capital) ** (365.25 / days) - 1
+        annual_return_percent = annual_return * 100
+        
+        # 计算最大回撤
+        equity = equity_curve['Equity']
+        rolling_max = equity.expanding().max()
+        drawdown = (equity - rolling_max) / rolling_max * 100
+        max_drawdown = drawdown.min()
+        
+        # 计算夏普比率（简化计算，无风险收益率设为0）
+        returns = equity_curve['Returns']
+        sharpe_ratio = (returns.mean() / returns.std()) * np.sqrt(252) if returns.std() != 0 else 0
 
-            # 计算索提诺比率
-            downside_returns = returns[returns < 0]
-            downside_std = downside_returns.std()
-            sortino_ratio = (returns.mean() / downside_std) * np.sqrt(252) if downside_std != 0 else 0
+        # 计算索提诺比率
+        downside_returns = returns[returns < 0]
+        downside_std = downside_returns.std()
+        sortino_ratio = (returns.mean() / downside_std) * np.sqrt(252) if downside_std != 0 else 0
 
-            # 计算卡玛比率
-            calmar_ratio = annual_return_percent / abs(max_drawdown) if max_drawdown != 0 else 0
-            
-            # 交易统计
-            total_trades = len(trades)
-            winning_trades = len(trades[trades['Profit'] > 0])
-            losing_trades = len(trades[trades['Profit'] < 0])
-            win_rate = winning_trades / total_trades * 100 if total_trades > 0 else 0
-            
-            # 平均盈亏
-            avg_win = trades[trades['Profit'] > 0]['Profit'].mean() if winning_trades > 0 else 0
-            avg_loss = trades[trades['Profit'] < 0]['Profit'].mean() if losing_trades > 0 else 0
-            profit_factor = abs(avg_win / avg_loss) if avg_loss != 0 else float('inf')
-            
-            return {
-                '初始资金': self.initial_capital,
-                '最终资金': final_capital,
-                '总收益率(%)': total_return,
-                '年化收益率(%)': annual_return_percent,
-                '最大回撤(%)': max_drawdown,
-                '夏普比率': sharpe_ratio,
-                '索提诺比率': sortino_ratio,
-                '卡玛比率': calmar_ratio,
-                '总交易次数': total_trades,
-                '胜率(%)': win_rate,
-                '盈利次数': winning_trades,
-                '亏损次数': losing_trades,
-                '平均盈利': avg_win,
-                '平均亏损': avg_loss,
-                '盈亏比': profit_factor
-            }
+        # 计算卡玛比率
+        calmar_ratio = annual_return_percent / abs(max_drawdown) if max_drawdown != 0 else 0
+        
+        # 交易统计
+        total_trades = len(trades)
+        winning_trades = len(trades[trades['Profit'] > 0])
+        losing_trades = len(trades[trades['Profit'] < 0])
+        win_rate = winning_trades / total_trades * 100 if total_trades > 0 else 0
+        
+        # 平均盈亏
+        avg_win = trades[trades['Profit'] > 0]['Profit'].mean() if winning_trades > 0 else 0
+        avg_loss = trades[trades['Profit'] < 0]['Profit'].mean() if losing_trades > 0 else 0
+        profit_factor = abs(avg_win / avg_loss) if avg_loss != 0 else float('inf')
+        
+        return {
+            '初始资金': self.initial_capital,
+            '最终资金': final_capital,
+            '总收益率(%)': total_return,
+            '年化收益率(%)': annual_return_percent,
+            '最大回撤(%)': max_drawdown,
+            '夏普比率': sharpe_ratio,
+            '索提诺比率': sortino_ratio,
+            '卡玛比率': calmar_ratio,
+            '总交易次数': total_trades,
+            '胜率(%)': win_rate,
+            '盈利次数': winning_trades,
+            '亏损次数': losing_trades,
+            '平均盈利': avg_win,
+            '平均亏损': avg_loss,
+            '盈亏比': profit_factor
+        }
 
 
 if __name__ == "__main__":
@@ -5,7 +5,23 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple
-import yfinance as yf
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import kernels
+
+# 信号类型（Signal_Type 列）：用于成交模型区分突破入场、通道出场和止损
+SIGNAL_TYPE_NONE = 0
+SIGNAL_TYPE_ENTRY = 1
+SIGNAL_TYPE_EXIT = 2
+SIGNAL_TYPE_STOP = 3
+
+# 计算引擎：'fast' 使用 kernels 模块的数组内核（可释放 GIL），'reference' 使用逐行的 pandas 实现；
+# 未安装 numba 时 'fast' 也使用 pandas 实现（见 kernels.use_kernels）
+ENGINES = ('fast', 'reference')
 
 
 class TurtleTradingStrategy:
@@ -14,7 +30,8 @@ class TurtleTradingStrategy:
                  exit_window: int = 10,       # 出场窗口（唐奇安通道周期）
                  atr_window: int = 20,        # ATR计算窗口
                  atr_multiplier: float = 2.0, # ATR止损倍数
-                 risk_percent: float = 0.01): # 账户风险百分比
+                 risk_percent: float = 0.01,  # 账户风险百分比
+                 engine: str = 'fast'):       # 计算引擎
         """
         初始化海龟交易策略
         
@@ -24,12 +41,16 @@ class TurtleTradingStrategy:
             atr_window: ATR计算窗口
             atr_multiplier: ATR止损倍数
             risk_percent: 账户风险百分比
+            engine: 指标和信号状态机的计算引擎，'fast'（数组内核，未安装 numba 时使用 pandas 实现）或 'reference'（逐行实现），结果一致
         """
+        if engine not in ENGINES:
+            raise ValueError(f"engine 必须是 {ENGINES} 之一，实际为 {engine!r}")
         self.entry_window = entry_window
         self.exit_window = exit_window
         self.atr_window = atr_window
         self.atr_multiplier = atr_multiplier
         self.risk_percent = risk_percent
+        self.engine = engine
         
     def calculate_donchian_channels(self, data: pd.DataFrame, window: int) -> pd.DataFrame:
         """
@@ -69,17 +90,41 @@ class TurtleTradingStrategy:
         atr = data_copy['TR'].rolling(window=window).mean()
         return atr
     
-    def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
+    def _channel_arrays(self, data: pd.DataFrame, window: int) -> Tuple[np.ndarray, np.ndarray]:
         """
-        生成海龟交易信号
+        唐奇安通道的上轨和下轨数组（使用内核时计算期间释放 GIL）
+        """
+        if kernels.use_kernels(self.engine):
+            return (kernels.rolling_max(data['High'].to_numpy(), window),
+                    kernels.rolling_min(data['Low'].to_numpy(), window))
+        return (data['High'].rolling(window=window).max().to_numpy(),
+                data['Low'].rolling(window=window).min().to_numpy())
+    
+    def _atr_array(self, data: pd.DataFrame, window: int) -> np.ndarray:
+        """
+        ATR 数组（使用内核时计算期间释放 GIL）
+        """
+        if kernels.use_kernels(self.engine):
+            return kernels.atr_array(data['High'].to_numpy(), data['Low'].to_numpy(), data['Close'].to_numpy(), window)
+        return self.calculate_atr(data, window).to_numpy()
+    
+    def calculate_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        计算信号所需的指标：入场通道、出场通道和ATR
         
         Args:
             data: 价格数据
             
         Returns:
-            包含信号的数据框
+            增加 Donchian_High、Donchian_Low、Exit_High、Exit_Low、ATR 列的数据框（副本）
         """
         data_copy = data.copy()
+        if kernels.use_kernels(self.engine):
+            # 滚动窗口在内核中计算，结果与下面的 pandas 实现逐位一致
+            data_copy['Donchian_High'], data_copy['Donchian_Low'] = self._channel_arrays(data, self.entry_window)
+            data_copy['Exit_High'], data_copy['Exit_Low'] = self._channel_arrays(data, self.exit_window)
+            data_copy['ATR'] = self._atr_array(data, self.atr_window)
+            return data_copy
         
         # 计算唐奇安通道（入场信号）
         data_copy = self.calculate_donchian_channels(data_copy, self.entry_window)
@@ -92,30 +137,72 @@ class TurtleTradingStrategy:
         
         # 计算ATR
         data_copy['ATR'] = self.calculate_atr(data_copy, self.atr_window)
+        return data_copy
+    
+    def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        生成海龟交易信号
+        
+        Args:
+            data: 价格数据
+            
+        Returns:
+            包含信号的数据框
+        """
+        data_copy = self.calculate_indicators(data)
+        
+        if kernels.use_kernels(self.engine):
+            return self._apply_signal_kernel(data_copy)
+        
+        return self._apply_signal_loop(data_copy)
+    
+    def _apply_signal_loop(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        逐行运行信号状态机（参考实现，用于与数组内核对拍）
+        
+        逐K线的判断逻辑保持原样；价格和通道先取出为 Python 列表，信号先写入列表、
+        最后一次性赋给数据框，避免逐元素的 pandas 索引开销。
+        
+        Args:
+            data: 已计算通道和ATR的数据
+            
+        Returns:
+            包含信号的数据框
+        """
+        n = len(data)
+        close = data['Close'].tolist()
+        high = data['High'].tolist()
+        low = data['Low'].tolist()
+        donchian_high_values = data['Donchian_High'].tolist()
+        donchian_low_values = data['Donchian_Low'].tolist()
+        exit_high_values = data['Exit_High'].tolist()
+        exit_low_values = data['Exit_Low'].tolist()
+        atr_values = data['ATR'].tolist()
         
         # 初始化信号列
-        data_copy['Signal'] = 0
-        data_copy['Position'] = 0
-        data_copy['Entry_Price'] = 0.0  # 记录入场价格
-        data_copy['Stop_Loss'] = 0.0    # 记录止损价格
+        signal_col = [0] * n
+        position_col = [0] * n
+        entry_price_col = [0.0] * n             # 记录入场价格
+        stop_loss_col = [0.0] * n               # 记录止损价格
+        signal_type_col = [SIGNAL_TYPE_NONE] * n  # 记录信号类型
+        trigger_price_col = [np.nan] * n        # 记录触发信号的价位（通道或止损价）
         
         # 初始化持仓状态
         position = 0
         entry_price = 0.0
         
         # 逐日生成信号
-        for i in range(1, len(data_copy)):
-            current_close = data_copy['Close'].iloc[i]
-            current_high = data_copy['High'].iloc[i]
-            current_low = data_copy['Low'].iloc[i]
-            prev_close = data_copy['Close'].iloc[i-1]
+        for i in range(1, n):
+            current_close = close[i]
+            current_high = high[i]
+            current_low = low[i]
             
             # 获取唐奇安通道值
-            donchian_high = data_copy['Donchian_High'].iloc[i-1]  # 前一日的值
-            donchian_low = data_copy['Donchian_Low'].iloc[i-1]    # 前一日的值
-            exit_high = data_copy['Exit_High'].iloc[i-1]          # 前一日的值
-            exit_low = data_copy['Exit_Low'].iloc[i-1]            # 前一日的值
-            atr = data_copy['ATR'].iloc[i]
+            donchian_high = donchian_high_values[i-1]  # 前一日的值
+            donchian_low = donchian_low_values[i-1]    # 前一日的值
+            exit_high = exit_high_values[i-1]          # 前一日的值
+            exit_low = exit_low_values[i-1]            # 前一日的值
+            atr = atr_values[i]
             
             # ATR止损价格
             long_stop_loss = entry_price - atr * self.atr_multiplier if position > 0 else 0
@@ -124,12 +211,16 @@ class TurtleTradingStrategy:
             # 检查止损条件
             stop_loss_triggered = False
             if position > 0 and current_low <= long_stop_loss:  # 多头止损
-                data_copy.loc[data_copy.index[i], 'Signal'] = -1
+                signal_col[i] = -1
+                signal_type_col[i] = SIGNAL_TYPE_STOP
+                trigger_price_col[i] = long_stop_loss
                 position = 0
                 entry_price = 0.0
                 stop_loss_triggered = True
             elif position < 0 and current_high >= short_stop_loss:  # 空头止损
-                data_copy.loc[data_copy.index[i], 'Signal'] = 1
+                signal_col[i] = 1
+                signal_type_col[i] = SIGNAL_TYPE_STOP
+                trigger_price_col[i] = short_stop_loss
                 position = 0
                 entry_price = 0.0
                 stop_loss_triggered = True
@@ -139,30 +230,76 @@ class TurtleTradingStrategy:
                 # 生成入场信号
                 if position == 0:  # 当前无持仓
                     if current_close > donchian_high:  # 多头入场
-                        data_copy.loc[data_copy.index[i], 'Signal'] = 1
+                        signal_col[i] = 1
+                        signal_type_col[i] = SIGNAL_TYPE_ENTRY
+                        trigger_price_col[i] = donchian_high
                         position = 1
                         entry_price = current_close
                     elif current_close < donchian_low:  # 空头入场
-                        data_copy.loc[data_copy.index[i], 'Signal'] = -1
+                        signal_col[i] = -1
+                        signal_type_col[i] = SIGNAL_TYPE_ENTRY
+                        trigger_price_col[i] = donchian_low
                         position = -1
                         entry_price = current_close
                 else:  # 当前有持仓
                     # 生成出场信号
                     if position > 0 and (current_close < exit_low or current_close < long_stop_loss):  # 多头出场
-                        data_copy.loc[data_copy.index[i], 'Signal'] = -1
+                        signal_col[i] = -1
+                        if current_close < exit_low:
+                            signal_type_col[i] = SIGNAL_TYPE_EXIT
+                            trigger_price_col[i] = exit_low
+                        else:
+                            signal_type_col[i] = SIGNAL_TYPE_STOP
+                            trigger_price_col[i] = long_stop_loss
                         position = 0
                         entry_price = 0.0
                     elif position < 0 and (current_close > exit_high or current_close > short_stop_loss):  # 空头出场
-                        data_copy.loc[data_copy.index[i], 'Signal'] = 1
+                        signal_col[i] = 1
+                        if current_close > exit_high:
+                            signal_type_col[i] = SIGNAL_TYPE_EXIT
+                            trigger_price_col[i] = exit_high
+                        else:
+                            signal_type_col[i] = SIGNAL_TYPE_STOP
+                            trigger_price_col[i] = short_stop_loss
                         position = 0
                         entry_price = 0.0
             
             # 记录持仓和止损信息
-            data_copy.loc[data_copy.index[i], 'Position'] = position
-            data_copy.loc[data_copy.index[i], 'Entry_Price'] = entry_price
-            data_copy.loc[data_copy.index[i], 'Stop_Loss'] = long_stop_loss if position > 0 else short_stop_loss if position < 0 else 0
+            position_col[i] = position
+            entry_price_col[i] = entry_price
+            stop_loss_col[i] = long_stop_loss if position > 0 else short_stop_loss if position < 0 else 0
         
-        return data_copy
+        data['Signal'] = np.array(signal_col, dtype=np.int64)
+        data['Position'] = np.array(position_col, dtype=np.int64)
+        data['Entry_Price'] = np.array(entry_price_col, dtype=np.float64)
+        data['Stop_Loss'] = np.array(stop_loss_col, dtype=np.float64)
+        data['Signal_Type'] = np.array(signal_type_col, dtype=np.int64)
+        data['Trigger_Price'] = np.array(trigger_price_col, dtype=np.float64)
+        return data
+    
+    def _apply_signal_kernel(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        使用数组内核运行信号状态机，输出列与逐行实现相同
+        
+        Args:
+            data: 已计算通道和ATR的数据
+            
+        Returns:
+            包含信号的数据框
+        """
+        signal, position, entry_price, stop_loss, signal_type, trigger_price = kernels.signal_arrays(
+            data['High'].to_numpy(), data['Low'].to_numpy(), data['Close'].to_numpy(),
+            data['Donchian_High'].to_numpy(), data['Donchian_Low'].to_numpy(),
+            data['Exit_High'].to_numpy(), data['Exit_Low'].to_numpy(), data['ATR'].to_numpy(),
+            self.atr_multiplier
+        )
+        data['Signal'] = signal
+        data['Position'] = position
+        data['Entry_Price'] = entry_price
+        data['Stop_Loss'] = stop_loss
+        data['Signal_Type'] = signal_type
+        data['Trigger_Price'] = trigger_price
+        return data
     
     def calculate_position_size(self, 
                               data: pd.DataFrame, 
@@ -0,0 +1,202 @@
+"""
+全市场海龟突破扫描
+
+只使用每个标的最近 max(entry_window, exit_window, atr_window) + 1 根K线，
+把所有标的排成 (标的 × K线) 矩阵，一次性横截面计算突破、出场和止损条件，
+返回按突破强度排序的候选表（包含 N 值和单位头寸规模）。
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+from typing import Dict, List, Tuple
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from turtle_trading_strategy import TurtleTradingStrategy
+
+PANEL_COLUMNS = ('High', 'Low', 'Close')
+
+
+class UniverseScanner:
+    def __init__(self,
+                 strategy: TurtleTradingStrategy = None,
+                 account_value: float = 100000.0,
+                 contract_size: float = 1.0):
+        """
+        初始化全市场扫描器
+
+        Args:
+            strategy: 策略参数（入场/出场/ATR窗口、止损倍数、风险比例），默认使用海龟默认参数
+            account_value: 账户价值（用于计算单位头寸规模）
+            contract_size: 合约乘数
+        """
+        self.strategy = strategy if strategy is not None else TurtleTradingStrategy()
+        self.account_value = account_value
+        self.contract_size = contract_size
+
+    @property
+    def lookback(self) -> int:
+        """
+        扫描所需的K线数量
+        """
+        strategy = self.strategy
+        return max(strategy.entry_window, strategy.exit_window, strategy.atr_window) + 1
+
+    def build_panel(self, data: Dict[str, pd.DataFrame]) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        从各标的的价格数据中截取最近 lookback 根K线，组成 (标的 × K线) 矩阵
+
+        K线数量不足的标的会被跳过。
+
+        Args:
+            data: {标的代码: 价格数据}
+
+        Returns:
+            (标的列表, {'High'/'Low'/'Close': 矩阵})
+        """
+        lookback = self.lookback
+        symbols = []
+        blocks = []
+        # 按列名组合缓存列位置；整表 to_numpy 再按位置取列比按列名选取快一个数量级
+        column_positions = {}
+        for symbol, frame in data.items():
+            if len(frame) < lookback:
+                continue
+            columns = tuple(frame.columns)
+            positions = column_positions.get(columns)
+            if positions is None:
+                positions = column_positions[columns] = [columns.index(column) for column in PANEL_COLUMNS]
+            symbols.append(symbol)
+            blocks.append(frame.to_numpy()[-lookback:, positions].astype(np.float64, copy=False))
+        if not blocks:
+            empty = np.empty((0, lookback))
+            return symbols, {column: empty for column in PANEL_COLUMNS}
+        stacked = np.stack(blocks)
+        return symbols, {column: stacked[:, :, k] for k, column in enumerate(PANEL_COLUMNS)}
+
+    def scan(self,
+             data: Dict[str, pd.DataFrame],
+             positions: Dict[str, Tuple[int, float]] = None,
+             include_all: bool = False) -> pd.DataFrame:
+        """
+        扫描全市场
+
+        Args:
+            data: {标的代码: 价格数据}，只使用最后 lookback 根K线
+            positions: 当前持仓 {标的代码: (方向 1/-1, 入场价格)}，用于判断出场和止损
+            include_all: 是否返回没有任何信号的标的
+
+        Returns:
+            候选表，按信号强度（突破幅度 / N）降序排列
+        """
+        symbols, panel = self.build_panel(data)
+        return self.scan_panel(symbols, panel['High'], panel['Low'], panel['Close'], positions, include_all)
+
+    def scan_panel(self,
+                   symbols: List[str],
+                   high: np.ndarray,
+                   low: np.ndarray,
+                   close: np.ndarray,
+                   positions: Dict[str, Tuple[int, float]] = None,
+                   include_all: bool = False) -> pd.DataFrame:
+        """
+        在 (标的 × K线) 矩阵上计算最后一根K线的信号，最后一列为当前K线
+
+        Args:
+            symbols: 标的列表（与矩阵的行对应）
+            high: 最高价矩阵
+            low: 最低价矩阵
+            close: 收盘价矩阵
+            positions: 当前持仓 {标的代码: (方向 1/-1, 入场价格)}
+            include_all: 是否返回没有任何信号的标的
+
+        Returns:
+            候选表
+        """
+        strategy = self.strategy
+        n_bars = close.shape[1]
+        if n_bars < self.lookback:
+            raise ValueError(f"扫描至少需要 {self.lookback} 根K线，实际为 {n_bars}")
+        t = n_bars - 1
+
+        # 前一日的唐奇安通道（与 generate_signals 一致）
+        donchian_high = high[:, t - strategy.entry_window:t].max(axis=1)
+        donchian_low = low[:, t - strategy.entry_window:t].min(axis=1)
+        exit_high = high[:, t - strategy.exit_window:t].max(axis=1)
+        exit_low = low[:, t - strategy.exit_window:t].min(axis=1)
+
+        # 当日的 ATR（N 值）
+        window = slice(t - strategy.atr_window + 1, t + 1)
+        prev_close = close[:, t - strategy.atr_window:t]
+        window_high = high[:, window]
+        window_low = low[:, window]
+        true_range = np.maximum(window_high - window_low,
+                                np.maximum(np.abs(window_high - prev_close), np.abs(window_low - prev_close)))
+        atr = true_range.mean(axis=1)
+
+        last_close = close[:, t]
+        last_high = high[:, t]
+        last_low = low[:, t]
+
+        # 当前持仓
+        direction = np.zeros(len(symbols), dtype=np.int64)
+        entry_price = np.full(len(symbols), np.nan)
+        if positions:
+            row = {symbol: k for k, symbol in enumerate(symbols)}
+            for symbol, (held_direction, held_price) in positions.items():
+                k = row.get(symbol)
+                if k is not None:
+                    direction[k] = np.sign(held_direction)
+                    entry_price[k] = held_price
+
+        flat = direction == 0
+        long_held = direction > 0
+        short_held = direction < 0
+
+        # 入场：无持仓时收盘价突破前一日的入场通道
+        long_entry = flat & (last_close > donchian_high)
+        short_entry = flat & (last_close < donchian_low)
+
+        # 止损：以当日 ATR 计算止损价，用当日最低价/最高价判断
+        stop_price = np.where(long_held, entry_price - atr * strategy.atr_multiplier,
+                              np.where(short_held, entry_price + atr * strategy.atr_multiplier, np.nan))
+        with np.errstate(invalid='ignore'):
+            long_stop = long_held & (last_low <= stop_price)
+            short_stop = short_held & (last_high >= stop_price)
+            # 出场：未止损时收盘价跌破/突破出场通道
+            long_exit = long_held & ~long_stop & (last_close < exit_low)
+            short_exit = short_held & ~short_stop & (last_close > exit_high)
+
+        signal = np.select([long_entry | short_exit | short_stop, short_entry | long_exit | long_stop],
+                           [1, -1], default=0)
+        action = np.select([long_entry, short_entry, long_stop | short_stop, long_exit | short_exit],
+                           ['long_entry', 'short_entry', 'stop', 'exit'], default='')
+
+        # 信号强度：收盘价越过相应价位的幅度，以 N 为单位
+        level = np.select([long_entry, short_entry, long_exit, short_exit, long_stop | short_stop],
+                          [donchian_high, donchian_low, exit_low, exit_high, stop_price], default=np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            strength = np.abs(last_close - level) / atr
+            unit_size = self.account_value * strategy.risk_percent / (atr * self.contract_size)
+        unit_size = np.where(np.isfinite(unit_size), unit_size, 0.0)
+
+        table = pd.DataFrame({
+            'Symbol': symbols,
+            'Action': action,
+            'Signal': signal,
+            'Strength': strength,
+            'Close': last_close,
+            'N': atr,
+            'Unit_Size': unit_size,
+            'Donchian_High': donchian_high,
+            'Donchian_Low': donchian_low,
+            'Exit_High': exit_high,
+            'Exit_Low': exit_low,
+            'Stop_Price': stop_price,
+        })
+        if not include_all:
+            table = table[table['Action'] != '']
+        return table.sort_values('Strength', ascending=False, na_position='last', kind='stable').reset_index(drop=True)
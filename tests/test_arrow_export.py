@@ -0,0 +1,93 @@
+"""
+Unit tests for the Arrow export layer
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+from src.arrow_export import equity_table, export_backtest, metrics_table, signals_table, trades_table, write_ipc
+from src.synthetic_data import generate_universe
+from src.turtle_backtest import METRIC_KEYS, METRIC_LABELS, TurtleBacktester
+
+def _run(universe):
+    index = next(iter(universe.values())).index
+    backtester = TurtleBacktester(symbols=list(universe), start_date=str(index[0].date()),
+                                  end_date=str(index[-1].date()))
+    backtester.data = universe
+    results = backtester.run_backtest()
+    return results, backtester._calculate_metrics
+
+def test_tables_share_symbol_dictionary_and_do_not_copy():
+    """Test dictionary-encoded symbols and zero-copy numeric columns"""
+    universe = generate_universe(3, 300, seed=2)
+    results, _ = _run(universe)
+
+    equity = equity_table(results)
+    assert pa.types.is_dictionary(equity.schema.field('symbol').type)
+    assert equity.num_rows == 900
+    for k, symbol in enumerate(universe):
+        chunk = equity.column('symbol').chunk(k)
+        assert chunk.dictionary.to_pylist() == list(universe)
+        assert set(chunk.indices.to_pylist()) == {k}
+        source = results[symbol]['equity_curve']['Equity'].to_numpy()
+        assert equity.column('Equity').chunk(k).buffers()[1].address == source.ctypes.data
+
+    trades = trades_table(results)
+    assert trades.num_rows == sum(len(result['trades']) for result in results.values())
+    assert pa.types.is_timestamp(trades.schema.field('Exit_Date').type)
+
+    signals = signals_table(results).to_pandas()
+    expected = results['SYM0001']['strategy_results']
+    got = signals[signals['symbol'] == 'SYM0001']
+    np.testing.assert_array_equal(got['Signal'].to_numpy(), expected['Signal'].to_numpy())
+    np.testing.assert_array_equal(got['Date'].to_numpy(), expected.index.to_numpy())
+
+def test_timezone_preserved(sample_stock_data):
+    """Test that timezone-aware indexes export as timezone-aware timestamps"""
+    data = sample_stock_data.tz_localize('America/New_York')
+    backtester = TurtleBacktester(symbol='TEST', start_date='2020-01-01', end_date='2020-04-09')
+    backtester.data = data
+    backtester.setup_strategy(entry_window=10, exit_window=5, atr_window=10)
+    table = equity_table(backtester.run_backtest())
+
+    assert table.schema.field('Date').type == pa.timestamp(data.index.unit, tz='America/New_York')
+    assert table.column('Date').to_pandas().iloc[0] == data.index[0]
+
+def test_metrics_use_machine_readable_names():
+    """Test metric column names, labels in field metadata and integer counts"""
+    metrics = {
+        'AAA': {label: float(k) for k, label in enumerate(METRIC_LABELS)},
+        'BBB': {'初始资金': 1.0, '总交易次数': 3},
+    }
+    table = metrics_table(metrics)
+
+    assert table.column_names == ['symbol'] + [METRIC_KEYS[label] for label in METRIC_LABELS]
+    field = table.schema.field('calmar_ratio')
+    assert field.metadata[b'label'].decode('utf-8') == '卡玛比率'
+    assert table.schema.field('total_trades').type == pa.int64()
+    assert table.column('total_trades').to_pylist() == [8, 3]
+    assert table.column('sharpe_ratio').to_pylist() == [5.0, None]
+
+    single = metrics_table(metrics['AAA'], symbol='AAA')
+    assert single.column('symbol').to_pylist() == ['AAA']
+
+def test_export_round_trip(tmp_path):
+    """Test Feather and IPC files read back identical tables"""
+    feather = pytest.importorskip('pyarrow.feather')
+    universe = generate_universe(2, 250, seed=6)
+    results, calculate_metrics = _run(universe)
+    metrics = {symbol: calculate_metrics(result) for symbol, result in results.items()}
+
+    paths = export_backtest(results, str(tmp_path / 'export'), metrics=metrics)
+    assert sorted(paths) == ['equity', 'metrics', 'signals', 'trades']
+    assert feather.read_table(paths['equity']).equals(equity_table(results))
+    assert feather.read_table(paths['metrics']).schema.field('sharpe_ratio').metadata[b'label'] == '夏普比率'.encode('utf-8')
+
+    path = write_ipc(trades_table(results), os.path.join(str(tmp_path), 'trades.arrow'))
+    assert pa.ipc.open_file(path).read_all().equals(trades_table(results))
+    stream = write_ipc(trades_table(results), os.path.join(str(tmp_path), 'trades.arrows'), stream=True)
+    assert pa.ipc.open_stream(stream).read_all().equals(trades_table(results))
@@ -0,0 +1,131 @@
+"""
+Unit tests for the resident backtest server
+"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.backtest_server import BacktestServer, BacktestService
+from src.synthetic_data import generate_universe
+from src.turtle_backtest import METRIC_KEYS, TurtleBacktester
+from src.turtle_trading_strategy import TurtleTradingStrategy
+from src.universe_scanner import UniverseScanner
+
+@pytest.fixture
+def universe():
+    return generate_universe(4, 400, seed=5)
+
+@pytest.fixture
+def server(universe):
+    server = BacktestServer(BacktestService(data=universe, max_workers=2)).start()
+    yield server
+    server.stop()
+
+def _post(server, path, body):
+    request = urllib.request.Request(server.url + path, data=json.dumps(body).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read()), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read()), e.headers
+
+def test_backtest_matches_direct_run_and_reuses_indicators(server, universe):
+    """Test results equal a direct backtest and repeated queries hit the indicator cache"""
+    params = {'entry_window': 15, 'exit_window': 15, 'atr_window': 10}
+    status, body, headers = _post(server, '/backtest', {'symbol': 'SYM0001', 'params': params,
+                                                        'include': ['trades', 'equity']})
+    assert status == 200
+    assert set(body['latency_ms']) == {'queue', 'compute', 'total'}
+    assert 'compute;dur=' in headers['Server-Timing']
+
+    data = universe['SYM0001']
+    backtester = TurtleBacktester(symbol='SYM0001', start_date=str(data.index[0].date()),
+                                  end_date=str(data.index[-1].date()))
+    backtester.data = data
+    backtester.setup_strategy(**params)
+    expected = backtester._calculate_metrics(backtester.run_backtest())
+    result = body['results']['SYM0001']
+    assert result['metrics'] == pytest.approx({METRIC_KEYS[label]: value for label, value in expected.items()})
+    assert result['num_trades'] == len(result['trades']) == expected['总交易次数']
+    assert len(result['equity']['values']) == len(data)
+
+    # 入场和出场窗口相同，共用一组通道：2 个指标、1 次命中
+    indicators = server.service.indicators.stats()
+    assert (indicators['misses'], indicators['hits']) == (2, 1)
+    _post(server, '/backtest', {'symbol': 'SYM0001', 'params': params})
+    assert server.service.indicators.stats()['misses'] == 2
+
+def test_concurrent_requests_are_all_answered(server):
+    """Test concurrent requests through the bounded pool and per-endpoint latency stats"""
+    statuses = []
+
+    def query(k):
+        status, _, _ = _post(server, '/backtest', {'symbols': ['SYM0000', 'SYM0002'],
+                                                   'params': {'entry_window': 10 + k}})
+        statuses.append(status)
+
+    threads = [threading.Thread(target=query, args=(k,)) for k in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert statuses == [200] * 8
+
+    with urllib.request.urlopen(server.url + '/stats') as response:
+        stats = json.loads(response.read())
+    assert stats['requests']['backtest']['count'] == 8
+    assert stats['requests']['backtest']['p95_ms'] >= stats['requests']['backtest']['p50_ms'] > 0
+    assert stats['price_cache']['resident_symbols'] == 4
+
+def test_sweep_and_scan(server, universe):
+    """Test grid sweeps are ranked and scans match the universe scanner"""
+    status, body, _ = _post(server, '/sweep', {'symbols': ['SYM0000', 'SYM0001'], 'metric': '夏普比率',
+                                               'grid': {'entry_window': [10, 20], 'atr_multiplier': [1.5, 3.0]}})
+    assert status == 200 and body['metric'] == 'sharpe_ratio' and body['evaluated'] == 4
+    values = [run['value'] for run in body['runs']]
+    assert values == sorted(values, reverse=True)
+
+    status, body, _ = _post(server, '/scan', {'params': {'entry_window': 10}, 'include_all': True})
+    expected = UniverseScanner(TurtleTradingStrategy(entry_window=10)).scan(universe, include_all=True)
+    assert status == 200 and body['scanned'] == 4
+    assert [row['Symbol'] for row in body['candidates']] == expected['Symbol'].tolist()
+
+def test_errors_and_backpressure(universe):
+    """Test error statuses, single-flight loading and rejection when the queue is full"""
+    release = threading.Event()
+    calls = []
+
+    def slow_loader(symbol, start_date, end_date):
+        calls.append(symbol)
+        release.wait(5)
+        return universe['SYM0000']
+
+    service = BacktestService(data={'SYM0003': universe['SYM0003']}, loader=slow_loader,
+                              max_workers=2, max_pending=2, warmup=False)
+    server = BacktestServer(service).start()
+    try:
+        assert _post(server, '/backtest', {'symbol': 'SYM0003', 'params': {'bogus': 1}})[0] == 400
+        assert _post(server, '/backtest', {'symbol': 'SYM0003', 'backtester': {'fill_model': 'x'}})[0] == 400
+        assert _post(server, '/nothing', {})[0] == 404
+
+        loads = [threading.Thread(target=_post, args=(server, '/load', {'symbol': 'SLOW'})) for _ in range(2)]
+        for thread in loads:
+            thread.start()
+        while service.pending < 2:
+            time.sleep(0.001)
+        status, body, _ = _post(server, '/backtest', {'symbol': 'SYM0003'})
+        assert status == 503
+        release.set()
+        for thread in loads:
+            thread.join()
+        assert calls == ['SLOW']
+        assert _post(server, '/backtest', {'symbol': 'SLOW'})[0] == 200
+    finally:
+        release.set()
+        server.stop()
@@ -0,0 +1,77 @@
+"""
+Unit tests for the transaction cost models
+"""
+
+import numpy as np
+import pytest
+
+from src.cost_models import (ATRSlippage, CommissionModel, CostModel, PercentageCommission, PerShareCommission,
+                             ProportionalSlippage, SlippageModel, TieredCommission, VolumeParticipationSlippage)
+from src.turtle_backtest import TurtleBacktester
+
+def test_commission_models():
+    """Test percentage, per-share and tiered commissions with minimum fees"""
+    notional = np.array([500.0, 20_000.0, 2_000_000.0])
+    quantity = np.array([5.0, 200.0, 20_000.0])
+
+    np.testing.assert_allclose(PercentageCommission(0.001, min_fee=1.0).compute(notional, quantity),
+                               [1.0, 20.0, 2_000.0])
+    np.testing.assert_allclose(PerShareCommission(0.01, min_fee=1.0, max_rate=0.0005).compute(notional, quantity),
+                               [0.25, 2.0, 200.0])
+
+    tiered = TieredCommission([(10_000, 0.003), (1_000_000, 0.002), (np.inf, 0.001)], min_fee=2.0)
+    np.testing.assert_allclose(tiered.compute(notional, quantity), [2.0, 40.0, 2_000.0])
+
+    with pytest.raises(ValueError):
+        TieredCommission([(1_000, 0.01), (500, 0.02)])
+
+def test_slippage_models():
+    """Test that slippage always moves the fill against the trader"""
+    prices = np.array([100.0, 100.0])
+    side = np.array([1, -1])
+    quantity = np.array([10_000.0, 10_000.0])
+    atr = np.array([2.0, 2.0])
+    volume = np.array([1_000_000.0, 0.0])
+
+    np.testing.assert_allclose(ProportionalSlippage(0.01).apply(prices, side, quantity, atr, volume), [101.0, 99.0])
+    np.testing.assert_allclose(ATRSlippage(0.5).apply(prices, side, quantity, atr, volume), [101.0, 99.0])
+
+    impact = VolumeParticipationSlippage(impact=0.1, exponent=0.5, max_rate=0.05)
+    # 1% participation -> 0.1 * sqrt(0.01) = 1%; zero volume falls back to the cap
+    np.testing.assert_allclose(impact.apply(prices, side, quantity, atr, volume), [101.0, 95.0])
+    with pytest.raises(ValueError):
+        impact.apply(prices, side, quantity, atr, None)
+
+def test_default_cost_model_matches_legacy_parameters(sample_stock_data):
+    """Test that an explicit cost model reproduces commission_rate/slippage"""
+    def run(**kwargs):
+        backtester = TurtleBacktester(symbol="TEST", start_date="2020-01-01", end_date="2020-04-10", **kwargs)
+        backtester.data = sample_stock_data
+        return backtester.run_backtest()['trades']
+
+    legacy = run(commission_rate=0.002, slippage=0.001)
+    explicit = run(cost_model=CostModel(PercentageCommission(0.002), ProportionalSlippage(0.001)))
+    np.testing.assert_allclose(legacy['Profit'].values, explicit['Profit'].values)
+    assert (legacy['Commission'] > 0).all()
+
+def test_volume_cap_limits_position_size(sample_stock_data):
+    """Test that positions are capped at a fraction of average daily volume"""
+    backtester = TurtleBacktester(symbol="TEST", start_date="2020-01-01", end_date="2020-04-10",
+                                  cost_model=CostModel(max_volume_participation=0.0001))
+    backtester.data = sample_stock_data
+    result = backtester.run_backtest()
+    trades = result['trades']
+    volume = sample_stock_data['Volume']
+
+    assert not trades.empty
+    for _, trade in trades.iterrows():
+        entry = volume.index.get_loc(trade['Entry_Date'])
+        adv = volume.iloc[max(entry - 20, 0):entry].mean()
+        assert abs(trade['Position']) <= adv * 0.0001 + 1e-9
+
+def test_base_models_require_implementation():
+    """Test that commission and slippage base classes cannot be used without implementing them"""
+    with pytest.raises(TypeError):
+        CommissionModel()
+    with pytest.raises(TypeError):
+        type('IncompleteSlippage', (SlippageModel,), {})()
@@ -0,0 +1,154 @@
+"""
+Unit tests for data normalization and calendar alignment
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import src.data_normalization as data_normalization
+from src.data_normalization import (load_normalized, load_raw_data, normalize_cached, normalize_data,
+                                    normalize_universe, raw_cache_path)
+from src.synthetic_data import generate_universe
+from src.turtle_backtest import TurtleBacktester
+
+def _bars(dates, close, **columns):
+    close = np.asarray(close, dtype=float)
+    frame = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                          'Volume': np.full(len(close), 100.0)}, index=pd.DatetimeIndex(dates))
+    for name, values in columns.items():
+        frame[name] = values
+    return frame
+
+def test_clean_data_passes_through_and_messy_index_is_fixed():
+    """Test that clean data is unchanged and tz-aware, unsorted, duplicated indexes are cleaned"""
+    universe = generate_universe(2, 200, seed=3)
+    normalized = normalize_universe(universe)
+    for symbol, frame in universe.items():
+        pd.testing.assert_frame_equal(normalized[symbol], frame.astype(float), check_freq=False)
+
+    frame = _bars(['2021-01-06', '2021-01-04', '2021-01-05', '2021-01-05'], [12, 10, 11, 11.5])
+    frame.index = frame.index.tz_localize('America/New_York')
+    frame['Ticker'] = 'X'
+    result = normalize_data(frame)
+    assert result.index.tz is None
+    assert list(result.index) == list(pd.to_datetime(['2021-01-04', '2021-01-05', '2021-01-06']))
+    assert result['Close'].tolist() == [10.0, 11.5, 12.0]
+    assert list(result.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def test_missing_bars_are_filled_and_price_envelope_enforced():
+    """Test halted-bar filling, non-positive prices, missing opens, OHLC envelope and max_fill"""
+    dates = pd.date_range('2021-01-04', periods=6)
+    frame = _bars(dates, [10, np.nan, -1, 13, np.nan, np.nan])
+    frame.loc[dates[3], ['Open', 'High', 'Low']] = [np.nan, 12.0, 14.0]
+    result = normalize_data(frame)
+    assert result.loc[dates[1], ['Open', 'High', 'Low', 'Close', 'Volume']].tolist() == [10, 10, 10, 10, 0]
+    assert result.loc[dates[2], 'Close'] == 10.0
+    # 开盘价缺失时取前一根收盘价，最高/最低价修正为包含开盘和收盘价
+    assert result.loc[dates[3], ['Open', 'High', 'Low', 'Close']].tolist() == [10, 14, 10, 13]
+    assert not result.isna().any().any()
+
+    limited = normalize_data(frame, max_fill=1)
+    assert limited.loc[dates[4], 'Close'] == 13.0
+    assert limited.loc[dates[5]].isna().all()
+    assert limited.loc[dates[2]].isna().all()
+
+def test_calendar_alignment_modes():
+    """Test union, intersection and explicit calendars, and trimming leading bars"""
+    a = _bars(pd.date_range('2021-01-04', periods=4), [10, 11, 12, 13])
+    b = _bars(pd.date_range('2021-01-06', periods=4), [20, 21, 22, 23])
+
+    union = normalize_universe({'A': a, 'B': b})
+    assert len(union['A']) == len(union['B']) == 6
+    assert union['B'].iloc[:2].isna().all().all()
+    assert union['A']['Close'].iloc[-2:].tolist() == [13.0, 13.0]
+    assert union['A']['Volume'].iloc[-2:].tolist() == [0.0, 0.0]
+
+    trimmed = normalize_universe({'A': a, 'B': b}, trim_leading=True)
+    assert trimmed['B'].index[0] == pd.Timestamp('2021-01-06')
+
+    intersection = normalize_universe({'A': a, 'B': b}, calendar='intersection')
+    assert list(intersection['A'].index) == list(pd.date_range('2021-01-06', periods=2))
+
+    # 指定日历之前的K线仍用于填充
+    calendar = pd.DatetimeIndex(['2021-01-10', '2021-01-05'])
+    explicit = normalize_universe({'A': a}, calendar=calendar)
+    assert list(explicit['A'].index) == list(pd.to_datetime(['2021-01-05', '2021-01-10']))
+    assert explicit['A']['Close'].tolist() == [11.0, 13.0]
+
+def test_adj_close_adjusts_prices():
+    """Test that prices are scaled by Adj Close / Close and the column is dropped"""
+    frame = _bars(pd.date_range('2021-01-04', periods=3), [10, 10, 20], **{'Adj Close': [5.0, 5.0, 20.0]})
+    result = normalize_data(frame)
+    assert 'Adj Close' not in result.columns
+    assert result['Close'].tolist() == [5.0, 5.0, 20.0]
+    assert result['High'].tolist() == [5.5, 5.5, 21.0]
+    assert normalize_data(frame, adjust=False)['Close'].tolist() == [10.0, 10.0, 20.0]
+
+def test_adj_close_does_not_modify_single_block_input():
+    """Test adjusting an all-float frame built in one constructor call leaves the input unchanged"""
+    frame = pd.DataFrame({'Open': [10.0, 20.0], 'High': [11.0, 21.0], 'Low': [9.0, 19.0], 'Close': [10.0, 20.0],
+                          'Adj Close': [5.0, 20.0], 'Volume': [100.0, 100.0]},
+                         index=pd.date_range('2021-01-04', periods=2))
+    original = frame.copy()
+    result = normalize_data(frame)
+    assert result['Close'].tolist() == [5.0, 20.0]
+    assert result['High'].tolist() == [5.5, 21.0]
+    pd.testing.assert_frame_equal(frame, original)
+
+def test_normalized_data_is_cached_next_to_raw_data(tmp_path, monkeypatch):
+    """Test raw and normalized caches are reused and TurtleBacktester loads through them"""
+    universe = generate_universe(2, 120, seed=9)
+    calls = []
+
+    def fetch(symbol, start_date, end_date):
+        calls.append(symbol)
+        return universe.get(symbol, pd.DataFrame())
+
+    cache_dir = str(tmp_path)
+    raw = load_raw_data(list(universe) + ['MISSING'], '2020-01-01', '2021-01-01', cache_dir, fetch=fetch)
+    assert sorted(raw) == sorted(universe)
+    first = normalize_cached(raw, cache_dir)
+    assert len([name for name in os.listdir(cache_dir) if name.startswith('normalized_')]) == 1
+
+    calls.clear()
+    raw = load_raw_data(list(universe), '2020-01-01', '2021-01-01', cache_dir, fetch=fetch)
+    assert calls == []
+    second = normalize_cached(raw, cache_dir)
+    for symbol in universe:
+        pd.testing.assert_frame_equal(first[symbol], second[symbol])
+
+    # 回测引擎从缓存读取原始数据并规范化
+    monkeypatch.setattr('data_utils.get_stock_data', fetch)
+    symbol = list(universe)[0]
+    backtester = TurtleBacktester(symbol=symbol, start_date='2020-01-01', end_date='2021-01-01',
+                                  cache_dir=cache_dir, normalize=True)
+    assert backtester.load_data()
+    assert calls == []
+    pd.testing.assert_frame_equal(backtester.data, normalize_data(universe[symbol]))
+
+def test_load_normalized_hit_does_not_read_raw_data(tmp_path, monkeypatch):
+    """Test that a normalized cache hit skips the raw files and a replaced raw file invalidates it"""
+    universe = generate_universe(3, 120, seed=4)
+    cache_dir = str(tmp_path)
+    fetch = lambda symbol, start_date, end_date: universe[symbol]
+    first = load_normalized(list(universe), '2020-01-01', '2021-01-01', cache_dir, fetch=fetch)
+
+    reads = []
+    read_pickle = data_normalization._read_pickle
+    monkeypatch.setattr(data_normalization, '_read_pickle', lambda path: reads.append(path) or read_pickle(path))
+    second = load_normalized(list(universe), '2020-01-01', '2021-01-01', cache_dir, fetch=fetch)
+    assert [os.path.basename(path)[:11] for path in reads] == ['normalized_']
+    for symbol in universe:
+        pd.testing.assert_frame_equal(first[symbol], second[symbol])
+
+    # 替换原始数据文件后重新计算
+    symbol = list(universe)[0]
+    raw_path = raw_cache_path(cache_dir, symbol, '2020-01-01', '2021-01-01')
+    pd.to_pickle(universe[symbol] * 2, raw_path)
+    os.utime(raw_path, ns=(0, 0))
+    reads.clear()
+    third = load_normalized(list(universe), '2020-01-01', '2021-01-01', cache_dir, fetch=fetch)
+    assert len(reads) == len(universe)
+    np.testing.assert_allclose(third[symbol]['Close'].values, 2 * first[symbol]['Close'].values)
@@ -0,0 +1,100 @@
+"""
+Unit tests for the distributed sweep coordinator
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.distributed import SweepCoordinator, main, pack_price_data, spawn_local_workers, unpack_price_data
+from src.job_scheduler import BatchScheduler, WorkUnit, backtest_unit, make_backtest_units
+
+def _die_once(payload):
+    """Kills the worker process the first time it runs"""
+    if not os.path.exists(payload['marker']):
+        open(payload['marker'], 'w').close()
+        os._exit(1)
+    return payload['value']
+
+def _always_crash(payload):
+    """Kills the worker process for the 'crash' unit every time"""
+    if payload['value'] == 'crash':
+        os._exit(1)
+    return payload['value']
+
+def test_pack_round_trip(sample_stock_data):
+    """Test that price data survives the compact array encoding"""
+    data = sample_stock_data.tz_localize('America/New_York')
+    restored = unpack_price_data(pack_price_data(data))
+    pd.testing.assert_frame_equal(restored, data.astype(np.float64), check_freq=False)
+
+def test_distributed_sweep_matches_serial(tmp_path, sample_stock_data):
+    """Test that results from two localhost workers match a serial run, in input order"""
+    units = make_backtest_units({'AAA': sample_stock_data, 'BBB': sample_stock_data * 1.5},
+                                [{'entry_window': w} for w in (10, 15, 20)],
+                                start_date='2020-01-01', end_date='2020-04-10')
+    serial = BatchScheduler(None).run(units, backtest_unit)
+
+    with SweepCoordinator() as coordinator:
+        # 缓存只保留一份数据，两个标的交替出现，每个单元都要重新传输数据
+        workers = spawn_local_workers(coordinator.address, 2, coordinator.authkey, cache_size=1)
+        report = coordinator.run(units, timeout=120)
+        assert coordinator.workers == 2
+    for worker in workers:
+        worker.join(timeout=10)
+
+    assert report.ok
+    assert list(report.results) == [unit.key for unit in units]
+    for key, metrics in serial.results.items():
+        assert report.results[key]['夏普比率'] == pytest.approx(metrics['夏普比率'])
+        assert report.results[key]['总交易次数'] == metrics['总交易次数']
+
+def test_lost_worker_unit_is_retried(tmp_path):
+    """Test that a unit whose worker disconnects is requeued on another worker"""
+    units = [WorkUnit('die', {'marker': str(tmp_path / 'marker'), 'value': 7})]
+    units += [WorkUnit(f'unit{i}', {'marker': str(tmp_path / 'marker'), 'value': i}) for i in range(3)]
+    with SweepCoordinator(journal_path=str(tmp_path / 'journal.jsonl')) as coordinator:
+        spawn_local_workers(coordinator.address, 2, coordinator.authkey)
+        report = coordinator.run(units, func=_die_once, timeout=60)
+
+    assert report.ok
+    assert report.results == {'die': 7, 'unit0': 0, 'unit1': 1, 'unit2': 2}
+    assert report.attempts['die'] == 2
+
+def test_crashing_unit_is_quarantined():
+    """Test that a unit that always kills its worker fails alone, and run() returns once no workers remain"""
+    units = [WorkUnit('crash', {'value': 'crash'})] + [WorkUnit(f'unit{i}', {'value': i}) for i in range(4)]
+    with SweepCoordinator() as coordinator:
+        spawn_local_workers(coordinator.address, 2, coordinator.authkey)
+        report = coordinator.run(units, func=_always_crash, timeout=60)
+    assert report.results == {'unit0': 0, 'unit1': 1, 'unit2': 2, 'unit3': 3}
+    assert set(report.failed) == {'crash'}
+    assert report.attempts['crash'] == 2
+
+    # 唯一的工作进程崩溃后，队列中剩余的单元记为失败
+    with SweepCoordinator() as coordinator:
+        spawn_local_workers(coordinator.address, 1, coordinator.authkey)
+        report = coordinator.run(units, func=_always_crash, timeout=60)
+    assert set(report.failed) == {unit.key for unit in units}
+    assert report.attempts['crash'] == 2
+    assert report.failed['unit0'] == 'ConnectionError: 没有可用的工作进程'
+
+def test_unpicklable_task_fails_only_its_unit(monkeypatch):
+    """Test that a task that cannot be pickled is recorded as failed, and workers require an authkey"""
+    units = [WorkUnit(f'unit{i}', {'value': i}) for i in range(3)]
+    logs = []
+    with SweepCoordinator(max_retries=1, log=logs.append) as coordinator:
+        assert len(coordinator.authkey) == 64
+        spawn_local_workers(coordinator.address, 1, coordinator.authkey)
+        report = coordinator.run(units, func=lambda payload: payload['value'], timeout=60)
+
+    assert report.results == {}
+    assert set(report.failed) == {'unit0', 'unit1', 'unit2'}
+    assert report.attempts == {'unit0': 2, 'unit1': 2, 'unit2': 2}
+    assert not any(coordinator.authkey.decode() in line for line in logs)
+
+    monkeypatch.delenv('TURTLE_AUTHKEY', raising=False)
+    with pytest.raises(SystemExit):
+        main(['worker', '--port', '6000'])
@@ -0,0 +1,75 @@
+"""
+Unit tests for the fill models
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.fill_models import FillModel
+from src.turtle_backtest import TurtleBacktester
+from src.turtle_trading_strategy import SIGNAL_TYPE_ENTRY, SIGNAL_TYPE_EXIT, SIGNAL_TYPE_STOP
+
+@pytest.fixture
+def signal_bars() -> pd.DataFrame:
+    """Five bars: long breakout, stop hit intrabar, gap through a stop, short exit, last-bar entry"""
+    return pd.DataFrame(
+        {
+            'Open':          [100.0, 104.0,  90.0,  95.0, 99.0],
+            'High':          [103.0, 105.0,  92.0,  99.0, 101.0],
+            'Low':           [ 99.0,  96.0,  88.0,  94.0, 98.0],
+            'Close':         [102.0,  97.0,  91.0,  98.0, 100.0],
+            'Signal':        [1, -1, -1, 1, 1],
+            'Signal_Type':   [SIGNAL_TYPE_ENTRY, SIGNAL_TYPE_STOP, SIGNAL_TYPE_STOP,
+                              SIGNAL_TYPE_EXIT, SIGNAL_TYPE_ENTRY],
+            'Trigger_Price': [101.0, 98.0, 93.0, 96.0, 100.5],
+        },
+        index=pd.date_range('2021-01-01', periods=5, freq='D')
+    )
+
+def test_default_fill_model_uses_close(signal_bars):
+    """Test that the default model reproduces close fills"""
+    fills = FillModel().fill_prices(signal_bars)
+    np.testing.assert_array_equal(fills, signal_bars['Close'].values)
+
+def test_trigger_fills_with_gaps(signal_bars):
+    """Test stop and channel fills, including a gap through the stop"""
+    fills = FillModel(entry_fill='channel', exit_fill='channel', stop_fill='stop').fill_prices(signal_bars)
+
+    assert fills[0] == 101.0  # breakout fills at the channel level
+    assert fills[1] == 98.0   # stop hit intrabar fills at the stop price
+    assert fills[2] == 90.0   # gap below the stop fills at the open
+    assert fills[3] == 96.0   # short exit buys back at the channel level
+    assert fills[4] == 100.5
+
+def test_next_open_fills(signal_bars):
+    """Test next-open fills fall back to the close on the last bar"""
+    fills = FillModel(entry_fill='next_open', exit_fill='next_open', stop_fill='next_open').fill_prices(signal_bars)
+    np.testing.assert_array_equal(fills, [104.0, 90.0, 95.0, 99.0, 100.0])
+
+def test_invalid_fill_option():
+    """Test that unknown fill options are rejected"""
+    with pytest.raises(ValueError):
+        FillModel(stop_fill='channel')
+
+def test_stop_fills_change_backtest_exit_prices(sample_stock_data):
+    """Test that the backtester prices stop exits with the configured fill model"""
+    def run(fill_model):
+        backtester = TurtleBacktester(symbol="TEST", start_date="2020-01-01", end_date="2020-04-10",
+                                      slippage=0.0, fill_model=fill_model)
+        backtester.data = sample_stock_data
+        return backtester.run_backtest()
+
+    close_trades = run(None)['trades']
+    stop_result = run(FillModel(stop_fill='stop'))
+    stop_trades = stop_result['trades']
+    signals = stop_result['strategy_results']
+
+    assert len(close_trades) == len(stop_trades)
+    stop_dates = signals.index[signals['Signal_Type'] == SIGNAL_TYPE_STOP]
+    for _, trade in stop_trades[stop_trades['Exit_Date'].isin(stop_dates)].iterrows():
+        bar = signals.loc[trade['Exit_Date']]
+        assert bar['Low'] <= trade['Exit_Price'] <= bar['High']
+        assert trade['Exit_Price'] == pytest.approx(
+            min(bar['Open'], bar['Trigger_Price']) if trade['Position'] > 0 else max(bar['Open'], bar['Trigger_Price'])
+        )
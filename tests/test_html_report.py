@@ -0,0 +1,89 @@
+"""
+Unit tests for the HTML report and LTTB downsampling
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src import kernels
+from src.html_report import downsample, drawdown_percent, generate_html_report
+from src.synthetic_data import generate_universe
+from src.turtle_backtest import TurtleBacktester
+
+def _run(n_symbols, n_bars, seed=1):
+    universe = generate_universe(n_symbols, n_bars, seed=seed)
+    index = next(iter(universe.values())).index
+    backtester = TurtleBacktester(symbols=list(universe), start_date=str(index[0].date()),
+                                  end_date=str(index[-1].date()))
+    backtester.data = universe
+    results = backtester.run_backtest()
+    metrics = {symbol: backtester._calculate_metrics(result) for symbol, result in results.items()}
+    return results, metrics
+
+def test_lttb_keeps_endpoints_and_extremes():
+    """Test that LTTB returns a fixed number of ordered points including the spikes"""
+    x = np.arange(5000, dtype=np.float64)
+    y = np.sin(x / 300)
+    y[1234] = 10.0
+    y[4321] = -10.0
+
+    selected = kernels.lttb_indices(x, y, 200)
+    assert len(selected) == 200
+    assert selected[0] == 0 and selected[-1] == 4999
+    assert np.all(np.diff(selected) > 0)
+    assert {1234, 4321} <= set(selected.tolist())
+    np.testing.assert_array_equal(kernels._lttb_kernel(x, y, 200), selected)
+    np.testing.assert_array_equal(kernels.lttb_indices(x[:50], y[:50], 200), np.arange(50))
+
+def test_downsample_and_drawdown():
+    """Test downsampling a dated series and the drawdown helper"""
+    index = pd.date_range('2020-01-01', periods=1000, freq='D')
+    values = np.linspace(100, 200, 1000)
+    sampled_index, sampled = downsample(index, values, 50)
+    assert len(sampled_index) == len(sampled) == 50
+    assert sampled_index[0] == index[0] and sampled_index[-1] == index[-1]
+
+    np.testing.assert_allclose(drawdown_percent([100, 120, 90, 130]), [0, 0, -25, 0])
+
+def test_report_size_does_not_grow_with_bars(tmp_path):
+    """Test that the report is self-contained and bounded by the point budget, not the bar count"""
+    sizes = []
+    for n_bars in (400, 1600):
+        results, metrics = _run(5, n_bars)
+        path = tmp_path / f"report_{n_bars}.html"
+        report = generate_html_report(results, metrics, path=str(path), points=100, max_detail_symbols=2,
+                                      max_trades=3)
+        assert path.read_text(encoding='utf-8') == report
+        sizes.append(len(report))
+
+        assert '<script' not in report and 'http://' not in report.replace('http://www.w3.org/2000/svg', '')
+        assert report.count('<h3>') == 2
+        assert '卡玛比率' in report
+        point_counts = [len(points.split()) for points in re.findall(r'<polyline points="([^"]*)"', report)]
+        assert max(point_counts) <= 100
+    assert sizes[1] < sizes[0] * 1.1
+
+def test_report_single_symbol_without_metrics(sample_stock_data):
+    """Test single-symbol results, missing metrics and escaping"""
+    backtester = TurtleBacktester(symbol='<A&B>', start_date='2020-01-01', end_date='2020-04-09')
+    backtester.data = sample_stock_data
+    backtester.setup_strategy(entry_window=10, exit_window=5, atr_window=10)
+    report = generate_html_report(backtester.run_backtest(), title='Test')
+    assert '&lt;A&amp;B&gt;' in report
+    assert '<A&B>' not in report
+    assert '总交易次数' in report
+
+def test_report_benchmark_runs_after_tests_compiled_kernels(tmp_path):
+    """Test that bench_report.py, which imports plain kernels, builds a report after src.kernels was compiled"""
+    kernels.lttb_indices(np.arange(50.0), np.arange(50.0), 10)
+    script = os.path.join(os.path.dirname(kernels.__file__), '..', 'benchmarks', 'bench_report.py')
+    output = tmp_path / 'report.html'
+    result = subprocess.run([sys.executable, script, '--symbols', '2', '--bars', '300', '--output', str(output)],
+                            cwd=str(tmp_path), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert output.stat().st_size > 0
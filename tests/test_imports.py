@@ -0,0 +1,19 @@
+"""
+Tests that the core modules import without any data-vendor package
+"""
+
+import subprocess
+import sys
+
+def test_core_modules_do_not_import_vendor_packages():
+    """Test that importing the strategy and backtester leaves yfinance unloaded"""
+    code = (
+        "import sys\n"
+        "from src.turtle_backtest import TurtleBacktester\n"
+        "from src.turtle_trading_strategy import TurtleTradingStrategy\n"
+        "import src.data_utils\n"
+        "print('yfinance' in sys.modules)\n"
+    )
+    output = subprocess.run([sys.executable, '-c', code], check=True,
+                            capture_output=True, text=True).stdout
+    assert output.strip() == 'False'
@@ -0,0 +1,76 @@
+"""
+Unit tests for the pipeline profiler
+"""
+
+import json
+
+from src.instrumentation import PipelineProfiler
+from src.turtle_backtest import TurtleBacktester
+
+def test_profiler_records_backtest_stages(sample_stock_data):
+    """Test that each pipeline stage is recorded per symbol"""
+    profiler = PipelineProfiler()
+    backtester = TurtleBacktester(
+        symbols=["AAA", "BBB"],
+        start_date="2020-01-01",
+        end_date="2020-04-10",
+        profiler=profiler
+    )
+    backtester.data = {"AAA": sample_stock_data, "BBB": sample_stock_data}
+    backtester.get_performance_metrics()
+
+    stages = {(record['stage'], record['symbol']) for record in profiler.records}
+    for stage in ('generate_signals', 'position_sizing', 'calculate_trades',
+                  'equity_curve', 'performance_metrics'):
+        assert (stage, "AAA") in stages
+        assert (stage, "BBB") in stages
+
+    summary = profiler.summary()
+    assert summary['generate_signals']['rows'] == 2 * len(sample_stock_data)
+    assert all(record['wall_seconds'] >= 0 for record in profiler.records)
+
+    lines = profiler.to_json_lines().splitlines()
+    assert len(lines) == len(profiler.records)
+    assert json.loads(lines[0])['stage'] == profiler.records[0]['stage']
+
+def test_profiler_tracks_nested_peak_memory():
+    """Test that an outer stage's peak covers allocations in nested stages"""
+    profiler = PipelineProfiler(track_memory=True)
+    calls = []
+    profiler.callbacks.append(calls.append)
+    try:
+        with profiler.stage('outer'):
+            with profiler.stage('inner'):
+                block = bytearray(5_000_000)
+                del block
+            small = bytearray(1_000)
+            del small
+    finally:
+        profiler.stop()
+
+    inner, outer = profiler.records
+    assert inner['stage'] == 'inner'
+    assert inner['peak_memory_bytes'] >= 5_000_000
+    assert outer['peak_memory_bytes'] >= inner['peak_memory_bytes']
+    assert [record['stage'] for record in calls] == ['inner', 'outer']
+
+def test_thread_executor_skips_per_stage_memory(sample_stock_data):
+    """Test that stages run in the thread pool record no peak memory while serial stages still do"""
+    profiler = PipelineProfiler(track_memory=True)
+    backtester = TurtleBacktester(symbols=["AAA", "BBB"], start_date="2020-01-01", end_date="2020-04-10",
+                                  profiler=profiler, executor='thread', max_workers=2)
+    backtester.data = {"AAA": sample_stock_data, "BBB": sample_stock_data}
+    try:
+        backtester.get_performance_metrics()
+        with profiler.stage('outer'):
+            with profiler.memory_paused(), profiler.stage('paused'):
+                block = bytearray(5_000_000)
+                del block
+    finally:
+        profiler.stop()
+
+    records = {record['stage']: record for record in profiler.records}
+    for stage in ('generate_signals', 'position_sizing', 'calculate_trades', 'equity_curve', 'paused'):
+        assert 'peak_memory_bytes' not in records[stage]
+    assert 'peak_memory_bytes' in records['performance_metrics']
+    assert records['outer']['peak_memory_bytes'] >= 5_000_000
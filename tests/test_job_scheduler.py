@@ -0,0 +1,94 @@
+"""
+Unit tests for the checkpointing batch scheduler
+"""
+
+import os
+
+import pytest
+
+from src.job_scheduler import BatchScheduler, JobJournal, WorkUnit, backtest_unit, make_backtest_units
+
+def _flaky_task(payload):
+    """Fails until its marker file has been created `failures` times"""
+    if payload.get('always_fail'):
+        raise RuntimeError("broken unit")
+    if payload.get('always_crash'):
+        os._exit(1)
+    if payload.get('unserializable'):
+        return {'value': object()}
+    marker = payload.get('marker')
+    if marker is not None:
+        count = int(open(marker).read()) if os.path.exists(marker) else 0
+        if count < payload['failures']:
+            with open(marker, 'w') as f:
+                f.write(str(count + 1))
+            if payload.get('crash'):
+                os._exit(1)
+            raise ValueError("transient failure")
+    return {'value': payload['value'] * 2}
+
+def test_serial_retries_and_resumes(tmp_path):
+    """Test that failures are isolated, retried and finished units are skipped on restart"""
+    journal_path = str(tmp_path / 'journal.jsonl')
+    units = [
+        WorkUnit('ok', {'value': 1}),
+        WorkUnit('flaky', {'value': 2, 'marker': str(tmp_path / 'flaky'), 'failures': 1}),
+        WorkUnit('bad', {'value': 3, 'always_fail': True}),
+    ]
+    report = BatchScheduler(journal_path, max_retries=2).run(units, _flaky_task)
+
+    assert report.results == {'ok': {'value': 2}, 'flaky': {'value': 4}}
+    assert report.failed == {'bad': 'RuntimeError: broken unit'}
+    assert report.attempts == {'ok': 1, 'flaky': 2, 'bad': 3}
+    assert set(JobJournal(journal_path).completed()) == {'ok', 'flaky'}
+
+    # Restart: completed units come from the journal, only the failed one runs again
+    units[2] = WorkUnit('bad', {'value': 3})
+    resumed = BatchScheduler(journal_path).run(units, _flaky_task)
+    assert sorted(resumed.skipped) == ['flaky', 'ok']
+    assert resumed.attempts == {'bad': 1}
+    assert list(resumed.results) == ['ok', 'flaky', 'bad']
+    assert resumed.ok
+
+def test_process_pool_survives_worker_crash(tmp_path):
+    """Test that a worker process dying is retried in a fresh pool"""
+    units = [WorkUnit(f'unit{i}', {'value': i}) for i in range(4)]
+    units.append(WorkUnit('crash', {'value': 10, 'marker': str(tmp_path / 'crash'), 'failures': 1, 'crash': True}))
+    report = BatchScheduler(str(tmp_path / 'journal.jsonl'), executor='process', max_workers=2).run(units, _flaky_task)
+
+    assert report.ok
+    assert report.results['crash'] == {'value': 20}
+    assert len(report.results) == 5
+
+def test_crashing_unit_does_not_fail_the_batch(tmp_path):
+    """Test that only the unit killing its worker is charged, and unserializable results fail only their unit"""
+    units = [WorkUnit(f'unit{i}', {'value': i}) for i in range(30)]
+    units.insert(3, WorkUnit('crash', {'value': 0, 'always_crash': True}))
+    units.append(WorkUnit('opaque', {'value': 0, 'unserializable': True}))
+    report = BatchScheduler(str(tmp_path / 'journal.jsonl'), executor='process', max_workers=2,
+                            max_retries=2).run(units, _flaky_task)
+
+    assert len(report.results) == 30
+    assert set(report.failed) == {'crash', 'opaque'}
+    assert report.attempts['crash'] == 3
+    assert report.attempts['opaque'] == 1
+    assert all(report.attempts[f'unit{i}'] == 1 for i in range(30))
+
+def test_backtest_units_match_between_executors(tmp_path, sample_stock_data):
+    """Test that backtest units give the same metrics in serial and process-pool mode"""
+    units = make_backtest_units({'AAA': sample_stock_data, 'BBB': sample_stock_data},
+                                [{'entry_window': 15}, {'entry_window': 20}],
+                                start_date='2020-01-01', end_date='2020-04-10')
+    assert [unit.key for unit in units][:2] == ['AAA|entry_window=15', 'BBB|entry_window=15']
+
+    serial = BatchScheduler(str(tmp_path / 'serial.jsonl')).run(units, backtest_unit)
+    pooled = BatchScheduler(str(tmp_path / 'pool.jsonl'), executor='process', max_workers=2).run(units, backtest_unit)
+
+    assert serial.ok and pooled.ok
+    for key, metrics in serial.results.items():
+        assert pooled.results[key]['夏普比率'] == pytest.approx(metrics['夏普比率'])
+
+    # Journaled results are plain JSON and can be reloaded
+    resumed = BatchScheduler(str(tmp_path / 'serial.jsonl')).run(units, backtest_unit)
+    assert len(resumed.skipped) == len(units)
+    assert resumed.results['AAA|entry_window=20']['总交易次数'] == serial.results['AAA|entry_window=20']['总交易次数']
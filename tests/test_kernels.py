@@ -0,0 +1,123 @@
+"""
+Unit tests for the array kernels and the thread/process execution modes
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import kernels
+from src.synthetic_data import generate_universe
+from src.turtle_backtest import TurtleBacktester
+from src.turtle_trading_strategy import TurtleTradingStrategy
+
+def _universe():
+    universe = generate_universe(3, 300, seed=21)
+    # Missing bars and a flat stretch exercise NaN comparisons and zero ATR
+    universe['SYM0001'].iloc[100:110] = np.nan
+    universe['SYM0002'].iloc[150:200, :4] = universe['SYM0002'].iloc[150, 3]
+    return universe
+
+def _backtester(universe, **kwargs):
+    index = next(iter(universe.values())).index
+    backtester = TurtleBacktester(symbols=list(universe), start_date=str(index[0].date()),
+                                  end_date=str(index[-1].date()), **kwargs)
+    backtester.data = universe
+    return backtester
+
+def test_fast_engine_matches_reference():
+    """Test that the kernels reproduce the row-by-row signals, trades and equity exactly"""
+    universe = _universe()
+    reference = _backtester(universe, engine='reference').run_backtest()
+    fast = _backtester(universe, engine='fast').run_backtest()
+
+    for symbol in universe:
+        for key in ('strategy_results', 'trades', 'equity_curve'):
+            pd.testing.assert_frame_equal(fast[symbol][key], reference[symbol][key])
+
+def test_python_fallback_matches_compiled_kernels(sample_stock_data):
+    """Test that the pure-Python kernels give the same arrays as the compiled ones"""
+    strategy = TurtleTradingStrategy(entry_window=10, exit_window=5, atr_window=10)
+    data = strategy.calculate_position_size(strategy.generate_signals(sample_stock_data), 100000.0)
+    arrays = [data[column].to_numpy(dtype=np.float64) for column in
+              ('High', 'Low', 'Close', 'Donchian_High', 'Donchian_Low', 'Exit_High', 'Exit_Low', 'ATR')]
+
+    compiled = kernels.signal_arrays(*arrays, strategy.atr_multiplier)
+    python = kernels._signal_kernel(*arrays, strategy.atr_multiplier)
+    for left, right in zip(compiled, python):
+        np.testing.assert_array_equal(left, right)
+
+    signal = data['Signal'].to_numpy()
+    size = data['Position_Size'].to_numpy()
+    for left, right in zip(kernels.leg_arrays(signal, size), kernels._legs_kernel(signal, size)):
+        np.testing.assert_array_equal(left, right)
+
+def test_indicator_kernels_match_pandas_bitwise():
+    """Test that rolling max/min and ATR kernels reproduce the pandas indicators bit for bit"""
+    strategy = TurtleTradingStrategy()
+    for data in _universe().values():
+        high, low, close = (data[column].to_numpy() for column in ('High', 'Low', 'Close'))
+        for window in (0, 1, 2, 20, 55, len(data) + 1):
+            np.testing.assert_array_equal(kernels.rolling_max(high, window),
+                                          data['High'].rolling(window).max().to_numpy())
+            np.testing.assert_array_equal(kernels.rolling_min(low, window),
+                                          data['Low'].rolling(window).min().to_numpy())
+            expected = strategy.calculate_atr(data, window).to_numpy()
+            assert kernels.atr_array(high, low, close, window).tobytes() == expected.tobytes()
+            if window:
+                python = kernels._atr_kernel(high, low, close, window)
+                assert python.tobytes() == expected.tobytes()
+    with pytest.raises(ValueError):
+        kernels.rolling_max(high, -1)
+
+def test_fast_engine_uses_pandas_without_numba(monkeypatch):
+    """Test that engine='fast' falls back to the pandas/row-by-row path when numba is missing"""
+    universe = _universe()
+    fast = _backtester(universe, engine='fast').run_backtest()
+
+    module = sys.modules['kernels']
+    monkeypatch.setattr(module, 'numba_available', lambda: False)
+    monkeypatch.setattr(module, '_compiled', lambda func: pytest.fail(f"kernel {func.__name__} used"))
+    fallback = _backtester(universe, engine='fast').run_backtest()
+    for symbol in universe:
+        for key in ('strategy_results', 'trades', 'equity_curve'):
+            pd.testing.assert_frame_equal(fallback[symbol][key], fast[symbol][key])
+
+def test_kernel_cache_is_readable_under_plain_module_name(tmp_path):
+    """Test that kernels compiled through src.kernels can be loaded by a process that imports plain kernels"""
+    kernels.rolling_max(np.arange(10.0), 3)
+    script = (f"import sys; sys.path.insert(0, {os.path.dirname(kernels.__file__)!r}); "
+              "import numpy as np, kernels; print(kernels.rolling_max(np.arange(10.0), 3)[-1])")
+    result = subprocess.run([sys.executable, '-c', script], cwd=str(tmp_path), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '9.0'
+
+def test_equity_kernel_settles_one_trade_per_bar():
+    """Test that at most one trade is settled per bar, as in the row-by-row loop"""
+    equity, returns = kernels.equity_arrays(np.arange(5), np.array([1, 1, 3]), np.array([10.0, 5.0, -20.0]), 100.0)
+    np.testing.assert_allclose(equity, [100, 110, 115, 95, 95])
+    assert returns[1] == pytest.approx(10.0)
+    assert returns[0] == 0
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_parallel_executors_match_serial(executor):
+    """Test that thread and process pools return the same per-symbol results in input order"""
+    universe = _universe()
+    serial = _backtester(universe).run_backtest()
+    parallel = _backtester(universe, executor=executor, max_workers=2).run_backtest()
+
+    assert list(parallel) == list(serial)
+    for symbol in universe:
+        pd.testing.assert_frame_equal(parallel[symbol]['trades'], serial[symbol]['trades'])
+        pd.testing.assert_frame_equal(parallel[symbol]['equity_curve'], serial[symbol]['equity_curve'])
+
+def test_invalid_engine_and_executor_rejected():
+    """Test that unknown engine and executor names raise ValueError"""
+    with pytest.raises(ValueError):
+        TurtleTradingStrategy(engine='gpu')
+    with pytest.raises(ValueError):
+        TurtleBacktester(executor='cluster')
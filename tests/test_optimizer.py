@@ -0,0 +1,110 @@
+"""
+Unit tests for the parameter optimizer
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.optimizer import BacktestObjective, ParameterOptimizer
+from src.synthetic_data import generate_universe
+
+SPACE = {
+    'entry_window': (10, 80),
+    'atr_multiplier': (1.0, 4.0),
+    'risk_percent': [0.005, 0.01, 0.02],
+}
+
+def _quadratic(params, fidelity=1.0):
+    """Smooth objective peaking at entry_window=40, atr_multiplier=2.5, risk_percent=0.01"""
+    return -(((params['entry_window'] - 40) / 70) ** 2 + ((params['atr_multiplier'] - 2.5) / 3) ** 2
+             + (0.0 if params['risk_percent'] == 0.01 else 0.05))
+
+def test_search_log_is_reproducible():
+    """Test that the same seed gives an identical search log"""
+    logs = []
+    for _ in range(2):
+        optimizer = ParameterOptimizer(_quadratic, SPACE, seed=7)
+        optimizer.tpe_search(20, n_startup=5)
+        logs.append([(record['params'], record['value']) for record in optimizer.log])
+    assert logs[0] == logs[1]
+
+    other = ParameterOptimizer(_quadratic, SPACE, seed=8)
+    other.tpe_search(20, n_startup=5)
+    assert [(record['params'], record['value']) for record in other.log] != logs[0]
+
+def test_searches_find_the_optimum_region(tmp_path):
+    """Test that random, TPE and successive halving approach the peak with few evaluations"""
+    grid = ParameterOptimizer(_quadratic, SPACE)
+    grid_best = grid.grid_search({'entry_window': list(range(10, 81, 5)),
+                                  'atr_multiplier': list(np.linspace(1.0, 4.0, 7)),
+                                  'risk_percent': SPACE['risk_percent']})
+
+    tpe = ParameterOptimizer(_quadratic, SPACE, seed=0)
+    best = tpe.tpe_search(40, n_startup=10)
+    assert best['value'] > grid_best['value'] - 0.01
+    assert tpe.evaluations < grid.evaluations / 5
+
+    halving = ParameterOptimizer(_quadratic, SPACE, seed=0)
+    best = halving.successive_halving(n_candidates=27, min_fidelity=1 / 9)
+    assert best['fidelity'] == 1.0
+    assert [record['rung'] for record in halving.log].count(2) == 3
+    assert halving.cost == pytest.approx(27 / 9 + 9 / 3 + 3)
+
+    path = tmp_path / 'search.json'
+    halving.to_json(str(path))
+    exported = json.loads(path.read_text(encoding='utf-8'))
+    assert exported['seed'] == 0
+    assert len(exported['log']) == len(halving.log)
+    assert exported['best']['value'] == best['value']
+
+def test_evaluations_are_cached_and_minimize_supported():
+    """Test the evaluation cache and minimization"""
+    calls = []
+
+    def objective(params, fidelity):
+        calls.append(params)
+        return params['x'] ** 2
+
+    optimizer = ParameterOptimizer(objective, {'x': (-5, 5)}, seed=1, maximize=False)
+    optimizer.evaluate({'x': 3})
+    optimizer.evaluate({'x': 3})
+    assert len(calls) == 1
+    assert optimizer.log[1]['cached']
+
+    best = optimizer.random_search(30)
+    assert best['params']['x'] in (-1, 0, 1)
+
+def test_nan_is_worst_and_infinity_keeps_its_rank():
+    """Test that NaN objectives rank worst while +inf (e.g. a profit factor without losses) ranks best"""
+    values = {0: np.nan, 1: 1.0, 2: np.inf, 3: -np.inf}
+    objective = lambda params, fidelity: values[params['x']]
+
+    maximizer = ParameterOptimizer(objective, {'x': [0, 1, 2, 3]})
+    assert maximizer.grid_search({'x': [0, 1, 2, 3]})['params'] == {'x': 2}
+    assert maximizer.log[0]['value'] == -np.inf
+
+    minimizer = ParameterOptimizer(objective, {'x': [0, 1, 2, 3]}, maximize=False)
+    assert minimizer.grid_search({'x': [0, 1, 2, 3]})['params'] == {'x': 3}
+    assert minimizer.log[0]['value'] == np.inf
+
+def test_backtest_objective_subsets():
+    """Test symbol and year subsets and evaluation through the backtester"""
+    universe = generate_universe(6, 300, seed=4)
+    objective = BacktestObjective(universe, metric='夏普比率', seed=3)
+
+    small = objective.subset_data(1 / 3)
+    assert len(small) == 2
+    assert set(small) <= set(objective.subset_data(2 / 3))
+
+    years = BacktestObjective(universe, subset='years')
+    recent = years.subset_data(0.5)
+    assert all(len(frame) == 150 for frame in recent.values())
+
+    params = {'entry_window': 20, 'exit_window': 10, 'atr_window': 14}
+    assert np.isfinite(objective(params, 1 / 3))
+    assert np.isfinite(objective(params))
+
+    with pytest.raises(ValueError):
+        BacktestObjective(universe, subset='months')
@@ -0,0 +1,59 @@
+"""
+Unit tests for the reference/fast engine parity harness
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.parity import EDGE_CASES, check_parity, compare_frames, edge_case_data, random_case, run_parity_suite
+
+def test_engines_agree_on_edge_and_random_cases():
+    """Test that both engines agree on every edge case and a batch of random cases"""
+    report = run_parity_suite(n_random=40, seed=123)
+    assert report.cases == len(EDGE_CASES) + 40
+    assert report.ok, report.summary()
+
+    pooled = run_parity_suite(n_random=6, seed=123, edge_cases=False, max_workers=2)
+    assert pooled.ok and pooled.cases == 6
+
+def test_random_cases_are_reproducible():
+    """Test that a failing case can be regenerated from its seed"""
+    label, data, params = random_case(7)
+    again = random_case(7)
+    assert label == again[0] and params == again[2]
+    pd.testing.assert_frame_equal(data, again[1])
+
+def test_compare_frames_reports_first_difference_per_column():
+    """Test first differing bar per column, NaN equality, tolerances and dtype checks"""
+    index = pd.date_range('2020-01-01', periods=10)
+    reference = pd.DataFrame({'a': np.arange(10.0), 'b': np.arange(10), 'c': np.full(10, np.nan)}, index=index)
+    fast = reference.copy()
+    fast.loc[index[3], 'a'] += 1e-12
+    fast.loc[index[6], 'a'] += 0.5
+    fast.loc[index[8], 'a'] += 0.5
+    fast['b'] = fast['b'].astype(np.float64)
+
+    mismatches = compare_frames(reference, fast, table='t')
+    assert [(m['column'], m['position']) for m in mismatches] == [('a', 6), ('b', None)]
+    assert mismatches[0]['index'] == index[6] and mismatches[0]['fast'] == 6.5
+    assert compare_frames(reference, fast, atol=1.0, check_dtype=False) == []
+    assert compare_frames(reference, fast.iloc[:5])[0]['column'] == '<rows>'
+
+def test_injected_kernel_bug_is_reported(monkeypatch):
+    """Test that a perturbed fast engine is caught at the right bar"""
+    data = edge_case_data('last_bar_crash', seed=0)
+    assert check_parity(data) == []
+
+    kernels = sys.modules['kernels']
+    equity_arrays = kernels.equity_arrays
+
+    def broken(*args):
+        equity, returns = equity_arrays(*args)
+        equity[100:] += 1.0
+        return equity, returns
+
+    monkeypatch.setattr(kernels, 'equity_arrays', broken)
+    mismatches = check_parity(data)
+    assert [(m['table'], m['column'], m['position']) for m in mismatches] == [('equity_curve', 'Equity', 100)]
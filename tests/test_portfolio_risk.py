@@ -0,0 +1,115 @@
+"""
+Unit tests for the correlation-aware portfolio risk limits
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.portfolio_risk import CorrelationRiskLimiter, RollingCorrelation, correlation_clusters
+from src.synthetic_data import generate_universe
+from src.turtle_backtest import TurtleBacktester
+
+def test_rolling_correlation_matches_full_recompute():
+    """Test that incremental updates match np.corrcoef over the trailing window"""
+    rng = np.random.default_rng(0)
+    returns = rng.normal(size=(95, 6))
+    returns[:, 5] = 0.0
+    rolling = RollingCorrelation(6, window=20, resync_every=50)
+
+    for i, row in enumerate(returns):
+        rolling.update(row)
+        if i >= 2 and i % 7 == 0:
+            expected = np.corrcoef(returns[max(0, i - 19):i + 1, :5].T)
+            corr = rolling.correlation()
+            np.testing.assert_allclose(corr[:5, :5], expected, atol=1e-10)
+            # Zero-variance symbols are uncorrelated with everything else
+            assert not corr[5, :5].any()
+    assert rolling.count == 20
+
+def test_correlation_clusters_group_by_threshold():
+    """Test leader clustering on a block-structured correlation matrix"""
+    corr = np.array([
+        [1.0, 0.9, 0.1, 0.8],
+        [0.9, 1.0, 0.2, 0.7],
+        [0.1, 0.2, 1.0, 0.0],
+        [0.8, 0.7, 0.0, 1.0],
+    ])
+    labels = correlation_clusters(corr, 0.75)
+    assert labels[0] == labels[1] == labels[3]
+    assert labels[2] != labels[0]
+
+def test_limiter_caps_correlated_units():
+    """Test per-symbol, cluster and direction caps, trimming and blocking"""
+    symbols = ['A', 'B', 'C', 'D']
+    limiter = CorrelationRiskLimiter(symbols, window=30, rebalance_every=30, min_periods=30,
+                                     max_units_per_symbol=2, max_units_closely_correlated=3,
+                                     max_units_loosely_correlated=10, max_units_per_direction=4)
+    rng = np.random.default_rng(1)
+    common = rng.normal(size=30)
+    for k in range(30):
+        # A, B and C move together, D is independent
+        limiter.update(np.array([common[k], common[k] * 1.1, common[k] * 0.9, rng.normal()]))
+    assert limiter.close_cluster[0] == limiter.close_cluster[1] == limiter.close_cluster[2]
+    assert limiter.close_cluster[3] != limiter.close_cluster[0]
+
+    assert limiter.request_units('A', 1, 2) == 2
+    assert limiter.allowed_units('A', 1) == 0            # per-symbol cap
+    assert limiter.request_units('B', 1, 2) == 1         # trimmed by the close cluster cap
+    assert limiter.request_units('C', 1) == 0            # blocked
+    assert limiter.request_units('C', -1) == 1           # opposite direction is counted separately
+    assert limiter.request_units('D', 1, 2) == 1         # direction cap
+    assert (limiter.blocked, limiter.trimmed) == (1, 2)
+
+    limiter.remove_units('A')
+    assert limiter.allowed_units('C', 1, 5) == 2
+
+def test_backtester_applies_risk_limiter():
+    """Test that a portfolio backtest drops or shrinks trades only when caps bind"""
+    universe = generate_universe(6, 250, seed=5)
+    index = next(iter(universe.values())).index
+    kwargs = dict(symbols=list(universe), start_date=str(index[0].date()), end_date=str(index[-1].date()))
+
+    def run(limiter):
+        backtester = TurtleBacktester(risk_limiter=limiter, **kwargs)
+        backtester.data = universe
+        return backtester.run_backtest()
+
+    unlimited = run(None)
+    loose = run(CorrelationRiskLimiter(list(universe), max_units_closely_correlated=100,
+                                       max_units_loosely_correlated=100, max_units_per_direction=100))
+    for symbol in universe:
+        pd.testing.assert_frame_equal(loose[symbol]['trades'], unlimited[symbol]['trades'])
+
+    limiter = CorrelationRiskLimiter(list(universe), max_units_per_direction=2)
+    limited = run(limiter)
+    assert limiter.blocked > 0
+    total = sum(len(result['trades']) for result in unlimited.values())
+    assert sum(len(result['trades']) for result in limited.values()) == total - limiter.blocked
+    assert not limiter.units.any()
+
+    # Running again with the same limiter starts from a clean state
+    counters = (limiter.blocked, limiter.trimmed)
+    again = run(limiter)
+    assert (limiter.blocked, limiter.trimmed) == counters
+    for symbol in universe:
+        pd.testing.assert_frame_equal(again[symbol]['trades'], limited[symbol]['trades'])
+
+    # The limiter needs every symbol in one process: process pools are rejected, thread pools are honoured
+    with pytest.raises(ValueError):
+        TurtleBacktester(risk_limiter=limiter, executor='process', **kwargs)
+    threaded = TurtleBacktester(risk_limiter=limiter, executor='thread', max_workers=2, **kwargs)
+    threaded.data = universe
+    result = threaded.run_backtest()
+    for symbol in universe:
+        pd.testing.assert_frame_equal(result[symbol]['trades'], limited[symbol]['trades'])
+
+def test_limiter_handles_large_universe():
+    """Test that incremental updates keep up with a 1,000 symbol universe"""
+    n_symbols = 1000
+    limiter = CorrelationRiskLimiter([f"S{k}" for k in range(n_symbols)], window=60, rebalance_every=20)
+    returns = np.random.default_rng(2).normal(scale=0.01, size=(120, n_symbols))
+    for row in returns:
+        limiter.update(row)
+    assert limiter.close_cluster.shape == (n_symbols,)
+    assert limiter.request_units('S0', 1) == pytest.approx(1.0)
@@ -0,0 +1,90 @@
+"""
+Unit tests for the memory-mapped result archive
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.result_archive import ResultArchive, create_archive
+from src.turtle_backtest import TurtleBacktester
+
+def _backtest(data, entry_window):
+    backtester = TurtleBacktester(symbol="TEST", start_date="2020-01-01", end_date="2020-04-10")
+    backtester.data = data
+    backtester.setup_strategy(entry_window=entry_window)
+    result = backtester.run_backtest()
+    return result, backtester.get_performance_metrics()
+
+def _write_runs(path, data, run_ids):
+    archive = ResultArchive(path)
+    with archive.writer() as writer:
+        for run_id in run_ids:
+            result, metrics = _backtest(data, 10 + run_id)
+            writer.write_result(run_id, result, metrics, params={'entry_window': 10 + run_id})
+
+def test_archive_round_trip_from_parallel_writers(tmp_path, sample_stock_data):
+    """Test that runs written from several processes can be sliced back individually"""
+    path = str(tmp_path / 'archive')
+    archive = create_archive(path, n_runs=6, bar_index=sample_stock_data.index)
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        list(executor.map(_write_runs, [path, path], [sample_stock_data] * 2, [[0, 2, 4], [1, 3]]))
+
+    np.testing.assert_array_equal(archive.completed_runs(), [0, 1, 2, 3, 4])
+    assert archive.equity.shape == (6, len(sample_stock_data))
+
+    params = archive.params()
+    assert params.loc[3, 'entry_window'] == 13
+
+    expected, expected_metrics = _backtest(sample_stock_data, 13)
+    equity = archive.equity_curve(3)
+    np.testing.assert_allclose(equity.values, expected['equity_curve']['Equity'].values)
+    assert archive.metric('夏普比率')[3] == pytest.approx(expected_metrics['夏普比率'])
+
+    trades = archive.trades(run_id=3)
+    assert len(trades) == len(expected['trades'])
+    np.testing.assert_allclose(trades['Profit'].values, expected['trades']['Profit'].values)
+    assert (trades['Entry_Date'].values == expected['trades']['Entry_Date'].values).all()
+
+    all_trades = archive.trades(columns=['Profit'])
+    assert list(all_trades.columns) == ['run_id', 'Profit']
+    assert set(all_trades['run_id']) == {0, 1, 2, 3, 4}
+    assert len(all_trades) == params['n_trades'].sum()
+
+def test_unaligned_archive_pads_short_runs(tmp_path):
+    """Test that runs shorter than the archive width are padded with NaN"""
+    archive = create_archive(str(tmp_path / 'archive'), n_runs=2, n_bars=5, metric_names=['score'])
+    with archive.writer() as writer:
+        writer.write_run(1, np.array([1.0, 2.0, 3.0]), metrics={'score': 0.5})
+        with pytest.raises(IndexError):
+            writer.write_run(2, np.array([1.0]))
+
+    np.testing.assert_array_equal(archive.equity[1], [1.0, 2.0, 3.0, np.nan, np.nan])
+    assert archive.metrics_frame().loc[1, 'score'] == 0.5
+    assert archive.trades().empty
+
+def test_rewritten_run_returns_only_latest_trades(tmp_path, sample_stock_data):
+    """Test that rewriting a run and orphaned trades from an interrupted write are not read back"""
+    archive = create_archive(str(tmp_path / 'archive'), n_runs=2, bar_index=sample_stock_data.index)
+    result, metrics = _backtest(sample_stock_data, 10)
+    n_trades = len(result['trades'])
+    assert n_trades > 0
+    with archive.writer() as writer:
+        writer.write_result(0, result, metrics, params={'entry_window': 10})
+        writer.write_result(1, result, metrics, params={'entry_window': 10})
+        writer.write_result(0, result, metrics, params={'entry_window': 10, 'retry': 1})
+        # 写入交易后、写入参数索引前中断
+        for f in writer._trade_files.values():
+            f.write(np.zeros(n_trades, dtype=np.int64).tobytes())
+
+    assert len(archive.trades(run_id=0)) == n_trades
+    assert len(archive.trades()) == 2 * n_trades
+    assert archive.params().loc[0, 'retry'] == 1
+
+    # 新写入的运行在同一个 ResultArchive 对象上可见
+    with archive.writer() as writer:
+        writer.write_result(1, result, metrics, params={'entry_window': 11})
+    assert archive.params().loc[1, 'entry_window'] == 11
+    np.testing.assert_allclose(archive.trades(run_id=1)['Profit'].values, result['trades']['Profit'].values)
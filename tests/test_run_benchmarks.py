@@ -0,0 +1,38 @@
+"""
+Unit tests for the benchmark regression check
+"""
+
+from benchmarks.run_benchmarks import MEMORY_NOISE_BYTES, WALL_NOISE_SECONDS, compare_results
+
+def _results(*records):
+    return {'results': [dict(record) for record in records]}
+
+def test_compare_passes_within_tolerance():
+    """Test that medians within the tolerance and tiny absolute changes are not flagged"""
+    baseline = _results({'case': 'a', 'wall_seconds': 0.9, 'median_seconds': 1.0, 'peak_memory_bytes': 50_000_000},
+                        {'case': 'b', 'wall_seconds': 0.001, 'median_seconds': 0.001})
+    current = _results({'case': 'a', 'wall_seconds': 0.5, 'median_seconds': 1.2, 'peak_memory_bytes': 60_000_000},
+                       {'case': 'b', 'wall_seconds': 0.002, 'median_seconds': 0.001 + WALL_NOISE_SECONDS / 2})
+    assert compare_results(current, baseline, tolerance=0.25) == []
+
+def test_compare_flags_wall_and_memory_regressions():
+    """Test that median time and peak memory beyond their tolerances are reported per metric"""
+    baseline = _results({'case': 'a', 'wall_seconds': 1.0, 'median_seconds': 1.0, 'peak_memory_bytes': 10_000_000},
+                        {'case': 'b', 'wall_seconds': 1.0, 'peak_memory_bytes': 100})
+    current = _results({'case': 'a', 'wall_seconds': 1.0, 'median_seconds': 1.5, 'peak_memory_bytes': 20_000_000},
+                       {'case': 'b', 'wall_seconds': 1.1, 'peak_memory_bytes': 100 + MEMORY_NOISE_BYTES // 2})
+    regressions = compare_results(current, baseline, tolerance=0.25, memory_tolerance=0.25)
+    assert [(item['case'], item['metric']) for item in regressions] == [('a', 'wall_seconds'),
+                                                                       ('a', 'peak_memory_bytes')]
+    assert regressions[0]['ratio'] == 1.5
+    assert regressions[1]['baseline'] == 10_000_000 and regressions[1]['current'] == 20_000_000
+    # 旧结果文件没有中位数时按 wall_seconds 比较
+    flagged = compare_results(current, baseline, tolerance=0.05)
+    assert ('b', 'wall_seconds') in [(item['case'], item['metric']) for item in flagged]
+
+def test_compare_skips_cases_missing_from_baseline():
+    """Test that cases absent from the baseline are ignored rather than flagged"""
+    baseline = _results({'case': 'a', 'wall_seconds': 1.0})
+    current = _results({'case': 'a', 'wall_seconds': 1.0}, {'case': 'new', 'wall_seconds': 100.0})
+    assert compare_results(current, baseline) == []
+    assert compare_results(current, {}) == []
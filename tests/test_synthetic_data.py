@@ -0,0 +1,30 @@
+"""
+Unit tests for the synthetic OHLCV generator
+"""
+
+import numpy as np
+
+from src.synthetic_data import generate_ohlcv, generate_universe
+
+def test_generate_ohlcv_consistent_bars():
+    """Test that generated bars have a consistent High/Low envelope"""
+    data = generate_ohlcv(2_000, seed=1)
+
+    assert list(data.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    assert len(data) == 2_000
+    assert data.index.is_monotonic_increasing
+    assert (data['High'] >= data[['Open', 'Close']].max(axis=1)).all()
+    assert (data['Low'] <= data[['Open', 'Close']].min(axis=1)).all()
+    assert (data['Low'] > 0).all()
+    assert (data['Volume'] > 0).all()
+
+def test_generate_universe_is_reproducible():
+    """Test that the same seed yields the same universe"""
+    first = generate_universe(5, 300, seed=7, chunk_size=2)
+    second = generate_universe(5, 300, seed=7, chunk_size=2)
+
+    assert list(first) == ['SYM0000', 'SYM0001', 'SYM0002', 'SYM0003', 'SYM0004']
+    for symbol in first:
+        np.testing.assert_array_equal(first[symbol].values, second[symbol].values)
+    # Different symbols get independent paths
+    assert not np.allclose(first['SYM0000']['Close'].values, first['SYM0001']['Close'].values)
@@ -0,0 +1,44 @@
+"""
+Unit tests for the universe breakout scanner
+"""
+
+import numpy as np
+import pytest
+
+from src.synthetic_data import generate_universe
+from src.turtle_trading_strategy import TurtleTradingStrategy
+from src.universe_scanner import UniverseScanner
+
+def test_scanner_matches_strategy_signals():
+    """Test that scanning any bar reproduces generate_signals given the prior position"""
+    strategy = TurtleTradingStrategy(entry_window=15, exit_window=7, atr_window=10)
+    scanner = UniverseScanner(strategy)
+    universe = generate_universe(3, 250, seed=3)
+
+    checked = 0
+    for symbol, data in universe.items():
+        signals = strategy.generate_signals(data)
+        for i in range(scanner.lookback, len(data)):
+            position = signals['Position'].iloc[i - 1]
+            positions = {symbol: (position, signals['Entry_Price'].iloc[i - 1])} if position != 0 else None
+            table = scanner.scan({symbol: data.iloc[:i + 1]}, positions, include_all=True)
+            assert table['Signal'].iloc[0] == signals['Signal'].iloc[i], (symbol, i)
+            assert table['N'].iloc[0] == pytest.approx(signals['ATR'].iloc[i])
+            checked += 1
+    assert checked > 600
+
+def test_scan_ranks_candidates_and_sizes_units():
+    """Test ranking, unit sizing and skipping symbols with too little history"""
+    universe = generate_universe(200, 40, seed=11)
+    universe['SHORT'] = universe['SYM0000'].iloc[:10]
+    scanner = UniverseScanner(account_value=1_000_000)
+
+    table = scanner.scan(universe)
+
+    assert 'SHORT' not in set(table['Symbol'])
+    assert len(table) > 0
+    assert set(table['Action']) <= {'long_entry', 'short_entry'}
+    assert (np.diff(table['Strength'].values) <= 0).all()
+    np.testing.assert_allclose(table['Unit_Size'], 1_000_000 * 0.01 / table['N'])
+    longs = table[table['Signal'] == 1]
+    assert (longs['Close'] > longs['Donchian_High']).all()